@@ -0,0 +1,597 @@
+# Stand-in Jamf Pro server for benchmarks and offline development.
+#
+# Serves the endpoints Jamf Commander uses (OAuth token, jamf-pro-version, the Jamf Pro API inventory
+# pages with sections, RSQL filters and sorting, the Classic API listings, groups, group members, record
+# details with subsets, and MDM commands) for a synthetic fleet of any size. Records are generated from their id, so a fleet
+# of 200k devices costs no memory until it is listed. Latency, errors and throttling can be injected.
+#
+#   python benchmarks/mock_jamf.py --computers 50000 --devices 20000 --latency 40 --error-rate 0.01
+#
+# Point the application at the printed URL; any client id and secret are accepted.
+# GET /mock/stats returns the requests served per endpoint; POST /mock/reset clears them.
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from xml.sax.saxutils import escape
+
+TOKEN_LIFETIME = 1200
+JAMF_PRO_VERSION = "11.12.0-mock"
+# Seconds asked for in the Retry-After of an injected 429
+RETRY_AFTER = 1
+
+COMPUTER_MODELS = [
+    ("MacBook Pro (14-inch, 2023)", "Mac14,9", "arm64"),
+    ("MacBook Air (M2, 2022)", "Mac14,2", "arm64"),
+    ("iMac (24-inch, 2021)", "iMac21,1", "arm64"),
+    ("Mac mini (2023)", "Mac14,3", "arm64"),
+    ("MacBook Pro (16-inch, 2019)", "MacBookPro16,1", "x86_64"),
+]
+DEVICE_MODELS = [
+    ("iPhone 15", "iPhone15,4", "MTLX3"),
+    ("iPhone 13", "iPhone14,5", "MLPF3"),
+    ("iPad Air (5th generation)", "iPad13,16", "MM9C3"),
+    ("iPad (10th generation)", "iPad13,18", "MPQ03"),
+    ("Apple TV 4K (3rd generation)", "AppleTV14,1", "MN873"),
+]
+MACOS_VERSIONS = [("14.6.1", "23G93"), ("15.0", "24A335"), ("15.1", "24B83"), ("13.7", "22H123")]
+IOS_VERSIONS = [("17.6.1", "21G101"), ("18.0", "22A3354"), ("18.1", "22B83")]
+APPLICATIONS = ["Safari", "Google Chrome", "Microsoft Word", "Slack", "Zoom", "Xcode", "Self Service", "1Password", "Firefox", "Keynote"]
+DEPARTMENTS = ["Engineering", "Sales", "Marketing", "Finance", "Support", "Design"]
+
+# Record detail paths, which are generated on every request rather than kept
+RECORD_PATH = re.compile(r"^JSSResource/(computers|mobiledevices)/id/")
+
+# Jamf Pro API inventory sections and the record key each one fills
+INVENTORY_SECTIONS = {"GENERAL": "general", "HARDWARE": "hardware", "OPERATING_SYSTEM": "operatingSystem", "USER_AND_LOCATION": "userAndLocation"}
+
+# Classic API list elements whose items are not simply the singular of the list name
+ITEM_TAGS = {"os_x_configuration_profiles": "os_x_configuration_profile", "configuration_profiles": "configuration_profile"}
+
+# Synthetic fleet; every record is derived from its id and the seed, so nothing is stored per record
+class Fleet:
+    def __init__(self, computers=1000, devices=1000, groups=20, policies=150, profiles=60, seed=1):
+        self.computers = computers
+        self.devices = devices
+        self.groups = groups
+        self.policies = policies
+        self.profiles = profiles
+        self.seed = seed
+        self.epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def _random(self, kind, record_id):
+        return random.Random(f"{self.seed}:{kind}:{record_id}")
+
+    def _report_date(self, rng):
+        return (self.epoch + timedelta(minutes=rng.randrange(0, 60 * 24 * 300))).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+    # Group sizes shrink with the group id: group 1 holds the whole fleet ("All Managed"), group n about 1/n of it
+    def group_members(self, kind, group_id):
+        size = self.computers if kind == "computers" else self.devices
+        if not 1 <= group_id <= self.groups:
+            return None
+        return range(group_id, size + 1, group_id)
+
+    def group_name(self, kind, group_id):
+        if group_id == 1:
+            return f"All Managed {'Computers' if kind == 'computers' else 'Devices'}"
+        return f"{DEPARTMENTS[group_id % len(DEPARTMENTS)]} {'Macs' if kind == 'computers' else 'Devices'} {group_id}"
+
+    def computer(self, record_id):
+        rng = self._random("computer", record_id)
+        model, identifier, architecture = rng.choice(COMPUTER_MODELS)
+        os_version, os_build = rng.choice(MACOS_VERSIONS)
+        report_date = self._report_date(rng)
+        serial = f"C02{record_id:07X}"
+        mac = ":".join(f"{byte:02X}" for byte in record_id.to_bytes(4, "big")) + ":AA:01"
+        user = f"user{record_id}"
+        return {
+            "general": {
+                "id": record_id, "name": f"MAC-{record_id:06d}", "serial_number": serial, "udid": f"UDID-C-{record_id:08d}",
+                "mac_address": mac, "ip_address": f"10.{record_id >> 16 & 255}.{record_id >> 8 & 255}.{record_id & 255}",
+                "report_date_utc": report_date, "remote_management": {"managed": "true"}, "supervised": "true",
+            },
+            "location": {"username": user, "department": rng.choice(DEPARTMENTS)},
+            "hardware": {
+                "model": model, "model_identifier": identifier, "processor_architecture": architecture,
+                "os_name": "macOS", "os_version": os_version, "os_build": os_build,
+                "total_ram": rng.choice([8192, 16384, 32768]), "processor_count": 1,
+            },
+            "software": {"applications": [
+                {"name": f"{name}.app", "path": f"/Applications/{name}.app", "version": f"{rng.randrange(1, 30)}.{rng.randrange(0, 10)}"}
+                for name in rng.sample(APPLICATIONS, rng.randrange(4, len(APPLICATIONS)))
+            ]},
+            "security": {"activation_lock": "false", "secure_boot_level": "full security", "firewall_enabled": str(rng.random() < 0.9).lower()},
+            "extension_attributes": [
+                {"id": number, "name": f"Attribute {number}", "type": "String", "value": f"value-{rng.randrange(100)}"}
+                for number in range(1, 6)
+            ],
+        }
+
+    def computer_basic(self, record_id):
+        computer = self.computer(record_id)
+        general, hardware = computer["general"], computer["hardware"]
+        return {
+            "id": record_id, "name": general["name"], "managed": True, "username": computer["location"]["username"],
+            "model": hardware["model"], "department": computer["location"]["department"], "building": "",
+            "mac_address": general["mac_address"], "udid": general["udid"], "serial_number": general["serial_number"],
+            "report_date_utc": general["report_date_utc"], "report_date_epoch": 0,
+        }
+
+    def mobile_device(self, record_id):
+        rng = self._random("device", record_id)
+        model, identifier, number = rng.choice(DEVICE_MODELS)
+        os_version, os_build = rng.choice(IOS_VERSIONS)
+        return {
+            "general": {
+                "id": record_id, "name": f"DEV-{record_id:06d}", "device_name": f"DEV-{record_id:06d}",
+                "serial_number": f"F{record_id:010X}", "udid": f"UDID-D-{record_id:08d}",
+                "wifi_mac_address": ":".join(f"{byte:02X}" for byte in record_id.to_bytes(4, "big")) + ":BB:02",
+                "ip_address": f"172.16.{record_id >> 8 & 255}.{record_id & 255}", "model": model,
+                "model_identifier": identifier, "model_number": number, "os_version": os_version, "os_build": os_build,
+                "last_inventory_update_utc": self._report_date(rng), "managed": "true", "supervised": "true",
+            },
+            "location": {"username": f"user{record_id}"},
+            "network": {"carrier": "Mock Mobile", "cellular_technology": "GSM", "roaming": "false"},
+            "security": {"passcode_present": "true", "data_protection": "true", "activation_lock_enabled": "false"},
+            "applications": [
+                {"application_name": name, "application_version": f"{rng.randrange(1, 30)}.0", "identifier": f"com.example.{name.lower().replace(' ', '')}"}
+                for name in rng.sample(APPLICATIONS, rng.randrange(3, 8))
+            ],
+            "extension_attributes": [
+                {"id": number, "name": f"Attribute {number}", "type": "String", "value": f"value-{rng.randrange(100)}"}
+                for number in range(1, 4)
+            ],
+        }
+
+    # Jamf Pro API api/v1/computers-inventory record with every section the mock knows
+    def computer_inventory(self, record_id):
+        computer = self.computer(record_id)
+        general, hardware, location = computer["general"], computer["hardware"], computer["location"]
+        return {
+            "id": str(record_id), "udid": general["udid"],
+            "general": {"name": general["name"], "lastIpAddress": general["ip_address"], "supervised": True,
+                        "reportDate": general["report_date_utc"].replace(".000+0000", "Z"), "remoteManagement": {"managed": True}},
+            "hardware": {"model": hardware["model"], "modelIdentifier": hardware["model_identifier"], "serialNumber": general["serial_number"],
+                         "macAddress": general["mac_address"], "processorArchitecture": hardware["processor_architecture"]},
+            "operatingSystem": {"name": "macOS", "version": hardware["os_version"], "build": hardware["os_build"]},
+            "userAndLocation": {"username": location["username"], "department": location["department"]},
+        }
+
+    # Jamf Pro API api/v2/mobile-devices/detail record with every section the mock knows
+    def mobile_device_inventory(self, record_id):
+        general = self.mobile_device(record_id)["general"]
+        return {
+            "mobileDeviceId": str(record_id), "deviceType": "tvOS" if general["model"].startswith("Apple TV") else "iOS",
+            "general": {"displayName": general["name"], "udid": general["udid"], "ipAddress": general["ip_address"],
+                        "osVersion": general["os_version"], "osBuild": general["os_build"], "managed": True, "supervised": True,
+                        "lastInventoryUpdateDate": general["last_inventory_update_utc"].replace(".000+0000", "Z")},
+            "hardware": {"serialNumber": general["serial_number"], "wifiMacAddress": general["wifi_mac_address"],
+                         "model": general["model"], "modelIdentifier": general["model_identifier"], "modelNumber": general["model_number"]},
+            "userAndLocation": {"username": f"user{record_id}"},
+        }
+
+    def mobile_device_listing_entry(self, record_id):
+        general = self.mobile_device(record_id)["general"]
+        return {
+            "id": record_id, "name": general["name"], "device_name": general["device_name"], "udid": general["udid"],
+            "serial_number": general["serial_number"], "phone_number": "", "wifi_mac_address": general["wifi_mac_address"],
+            "managed": True, "supervised": True, "model": general["model"], "model_identifier": general["model_identifier"],
+            "model_display": general["model"], "username": f"user{record_id}",
+        }
+
+# Function to render a Classic API style dict as XML: lists get a <size> and one element per item
+def to_xml(tag, value):
+    parts = []
+    _write_xml(tag, value, parts)
+    return '<?xml version="1.0" encoding="UTF-8"?>' + "".join(parts)
+
+def _write_xml(tag, value, parts):
+    if isinstance(value, dict):
+        parts.append(f"<{tag}>")
+        for key, item in value.items():
+            _write_xml(key, item, parts)
+        parts.append(f"</{tag}>")
+    elif isinstance(value, list):
+        item_tag = ITEM_TAGS.get(tag) or (tag[:-3] + "y" if tag.endswith("ies") else tag[:-1])
+        parts.append(f"<{tag}><size>{len(value)}</size>")
+        for item in value:
+            _write_xml(item_tag, item, parts)
+        parts.append(f"</{tag}>")
+    elif value is None:
+        parts.append(f"<{tag}/>")
+    else:
+        text = str(value).lower() if isinstance(value, bool) else str(value)
+        parts.append(f"<{tag}>{escape(text)}</{tag}>")
+
+# Function to read a dotted field ("general.name") of a Jamf Pro API record as text, "" when missing
+def field_text(record, field):
+    value = record
+    for key in field.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None or isinstance(value, (dict, list)) else str(value)
+
+# Key ordering values numerically when they are numbers, otherwise case-insensitively
+def sort_key(text):
+    try:
+        return (0, float(text), "")
+    except ValueError:
+        return (1, 0.0, text.lower())
+
+# Minimal RSQL filter as the Jamf Pro API takes it: comparisons (==, !=, <, <=, >, >=, =lt= ... =in=, =out=)
+# joined with ";" (and) and "," (or), parentheses, and "*" wildcards in == and !=
+class RsqlFilter:
+    OPERATORS = ("=in=", "=out=", "=lt=", "=le=", "=gt=", "=ge=", "==", "!=", "<=", ">=", "<", ">")
+    COMPARISONS = {"<": "lt", "=lt=": "lt", "<=": "le", "=le=": "le", ">": "gt", "=gt=": "gt", ">=": "ge", "=ge=": "ge"}
+
+    def __init__(self, text):
+        self.text = text
+        self.position = 0
+        self.tree = self._or()
+        if self.position != len(text):
+            raise ValueError(f"Unexpected {text[self.position:]!r} in filter")
+
+    def matches(self, record):
+        return self._evaluate(self.tree, record)
+
+    def _or(self):
+        terms = [self._and()]
+        while self._take(","):
+            terms.append(self._and())
+        return ("or", terms)
+
+    def _and(self):
+        terms = [self._term()]
+        while self._take(";"):
+            terms.append(self._term())
+        return ("and", terms)
+
+    def _term(self):
+        if self._take("("):
+            tree = self._or()
+            if not self._take(")"):
+                raise ValueError("Unbalanced parentheses in filter")
+            return tree
+        match = re.compile(r"[\w.]+").match(self.text, self.position)
+        if not match:
+            raise ValueError(f"Expected a field at {self.text[self.position:]!r}")
+        self.position = match.end()
+        operator = next((operator for operator in self.OPERATORS if self.text.startswith(operator, self.position)), None)
+        if operator is None:
+            raise ValueError(f"Expected an operator after {match.group()!r}")
+        self.position += len(operator)
+        if operator in ("=in=", "=out="):
+            if not self._take("("):
+                raise ValueError(f"Expected a list after {operator}")
+            values = [self._value()]
+            while self._take(","):
+                values.append(self._value())
+            if not self._take(")"):
+                raise ValueError("Unterminated list in filter")
+        else:
+            values = [self._value()]
+        return ("compare", match.group(), operator, values)
+
+    def _take(self, text):
+        if self.text.startswith(text, self.position):
+            self.position += len(text)
+            return True
+        return False
+
+    def _value(self):
+        quote = self.text[self.position:self.position + 1]
+        if quote in ("'", '"'):
+            self.position += 1
+            chars = []
+            while self.position < len(self.text) and self.text[self.position] != quote:
+                if self.text[self.position] == "\\":
+                    self.position += 1
+                chars.append(self.text[self.position:self.position + 1])
+                self.position += 1
+            if not self._take(quote):
+                raise ValueError("Unterminated string in filter")
+            return "".join(chars)
+        match = re.compile(r"[^;,()]+").match(self.text, self.position)
+        if not match:
+            raise ValueError(f"Expected a value at {self.text[self.position:]!r}")
+        self.position = match.end()
+        return match.group().strip()
+
+    def _evaluate(self, node, record):
+        if node[0] == "or":
+            return any(self._evaluate(term, record) for term in node[1])
+        if node[0] == "and":
+            return all(self._evaluate(term, record) for term in node[1])
+        _, field, operator, values = node
+        actual = field_text(record, field)
+        if operator in ("==", "!=", "=in=", "=out="):
+            matched = any(re.fullmatch(".*".join(map(re.escape, value.split("*"))), actual, re.IGNORECASE) for value in values)
+            return matched if operator in ("==", "=in=") else not matched
+        left, right = sort_key(actual), sort_key(values[0])
+        return {"lt": left < right, "le": left <= right, "gt": left > right, "ge": left >= right}[self.COMPARISONS[operator]]
+
+# Function to turn a Classic API subset name into the element it selects, e.g. ExtensionAttributes -> extension_attributes
+def subset_section(name):
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+class MockJamfServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fleet, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, seed=1):
+        super().__init__(address, MockJamfHandler)
+        self.fleet = fleet
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = set()
+        self.stats = {}
+        # Serialized listings, which are the same on every request
+        self.listings = {}
+
+    # Clients closing keep-alive connections are expected; anything else is still reported
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, endpoint, status, size):
+        with self.lock:
+            stats = self.stats.setdefault(endpoint, {"requests": 0, "bytes": 0, "errors": 0})
+            stats["requests"] += 1
+            stats["bytes"] += size
+            if status >= 400:
+                stats["errors"] += 1
+
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+class MockJamfHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_HEAD(self):
+        self.handle_request("HEAD")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def handle_request(self, method):
+        server = self.server
+        url = urlsplit(self.path)
+        path = unquote(url.path).strip("/")
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        if path.startswith("mock/"):
+            return self.mock_control(method, path)
+        if server.latency or server.jitter:
+            time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        endpoint = re.sub(r"/[0-9][0-9,]*(?=/|$)", "/{id}", path)
+        if path != "api/oauth/token":
+            roll = server.roll()
+            if roll < server.throttle_rate:
+                return self.respond(endpoint, 429, b"", "text/plain", {"Retry-After": str(RETRY_AFTER)})
+            if roll < server.throttle_rate + server.error_rate:
+                return self.respond(endpoint, 500, b"Injected error", "text/plain")
+            if method != "HEAD" and self.headers.get("Authorization", "")[7:] not in server.tokens:
+                return self.respond(endpoint, 401, b"Unauthorized", "text/plain")
+
+        wants_json = "json" in self.headers.get("Accept", "") or path.startswith("api/")
+        # Listings and group members are the same on every request; records and tokens are built each time
+        cache_key = (path, url.query, wants_json) if method == "GET" and not RECORD_PATH.match(path) else None
+        payload = server.listings.get(cache_key) if cache_key else None
+        status = 200
+        if payload is None:
+            try:
+                status, data = self.route(method, path, query, body)
+            except (ValueError, KeyError) as e:
+                status, data = 400, f"Bad request: {e}"
+            if data is None:
+                return self.respond(endpoint, status, b"", "text/plain")
+            if isinstance(data, str):
+                return self.respond(endpoint, status, data.encode(), "text/plain")
+            root_tag, value = data
+            # Jamf Pro API documents and jssuser are not wrapped in a root element
+            unwrapped = path.startswith("api/") or path == "JSSResource/jssuser"
+            payload = (json.dumps(value if unwrapped else {root_tag: value}) if wants_json else to_xml(root_tag, value)).encode()
+            if cache_key and status == 200:
+                server.listings[cache_key] = payload
+        etag = '"' + hashlib.sha1(payload).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.respond(endpoint, 304, b"", None, {"ETag": etag})
+        self.respond(endpoint, status, payload, "application/json" if wants_json else "application/xml", {"ETag": etag},
+                     head=method == "HEAD")
+
+    def respond(self, endpoint, status, payload, content_type, headers=None, head=False):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", f"{content_type};charset=UTF-8")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload and not head:
+            self.wfile.write(payload)
+        self.server.count(endpoint, status, len(payload))
+
+    def mock_control(self, method, path):
+        server = self.server
+        if path == "mock/stats":
+            with server.lock:
+                payload = json.dumps(server.stats).encode()
+            return self.respond("mock/stats", 200, payload, "application/json")
+        if path == "mock/reset" and method == "POST":
+            with server.lock:
+                server.stats.clear()
+            return self.respond("mock/reset", 204, b"", None)
+        return self.respond(path, 404, b"Not found", "text/plain")
+
+    # Returns (status, (root tag, value)), (status, text) or (status, None)
+    def route(self, method, path, query, body):
+        fleet = self.server.fleet
+        parts = path.split("/")
+
+        if method == "POST":
+            if path == "api/oauth/token":
+                form = {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+                if not form.get("client_id") or not form.get("client_secret"):
+                    return 401, "Missing client credentials"
+                token = f"mock-{hashlib.sha1(repr((time.time(), random.random())).encode()).hexdigest()}"
+                with self.server.lock:
+                    self.server.tokens.add(token)
+                return 200, ("token", {"access_token": token, "token_type": "Bearer", "expires_in": TOKEN_LIFETIME})
+            if len(parts) >= 4 and parts[1] in ("computercommands", "mobiledevicecommands") and parts[2] == "command":
+                root = "computer_command" if parts[1] == "computercommands" else "mobile_device_command"
+                ids = parts[-1].split(",")
+                return 201, (root, {"command": parts[3], "status": "Pending", "ids": len(ids)})
+            return 404, "Not found"
+
+        if method == "HEAD" and not path:
+            return 200, None
+        if path == "api/v1/jamf-pro-version":
+            return 200, ("version", {"version": JAMF_PRO_VERSION})
+        if path == "JSSResource/jssuser":
+            return 200, ("user", {"name": "benchmark", "version": JAMF_PRO_VERSION})
+        if path == "api/v1/computers-inventory":
+            return 200, ("results", self.inventory_page(query, fleet.computers, fleet.computer_inventory))
+        if path == "api/v2/mobile-devices/detail":
+            return 200, ("results", self.inventory_page(query, fleet.devices, fleet.mobile_device_inventory))
+        if path == "api/v2/mobile-devices":
+            return 200, ("results", self.inventory_page(query, fleet.devices, lambda record_id: {
+                "id": str(record_id), "name": f"DEV-{record_id:06d}", "serialNumber": f"F{record_id:010X}"}))
+
+        if parts[0] != "JSSResource" or len(parts) < 2:
+            return 404, "Not found"
+        resource = parts[1]
+        if resource == "computers":
+            if len(parts) == 2:
+                return 200, ("computers", [{"id": record_id, "name": f"MAC-{record_id:06d}"} for record_id in range(1, fleet.computers + 1)])
+            if parts[2:] == ["subset", "basic"]:
+                return 200, ("computers", [fleet.computer_basic(record_id) for record_id in range(1, fleet.computers + 1)])
+            return self.record("computer", parts, fleet.computers, fleet.computer)
+        if resource == "mobiledevices":
+            if len(parts) == 2:
+                return 200, ("mobile_devices", [fleet.mobile_device_listing_entry(record_id) for record_id in range(1, fleet.devices + 1)])
+            return self.record("mobile_device", parts, fleet.devices, fleet.mobile_device)
+        if resource in ("computergroups", "mobiledevicegroups"):
+            kind = "computers" if resource == "computergroups" else "devices"
+            list_tag = "computer_groups" if kind == "computers" else "mobile_device_groups"
+            if len(parts) == 2:
+                return 200, (list_tag, [{"id": group_id, "name": fleet.group_name(kind, group_id), "is_smart": group_id % 2 == 1}
+                                        for group_id in range(1, fleet.groups + 1)])
+            group_id = int(parts[3])
+            members = fleet.group_members(kind, group_id)
+            if members is None:
+                return 404, "Not found"
+            members_tag, prefix = ("computers", "MAC") if kind == "computers" else ("mobile_devices", "DEV")
+            return 200, (list_tag[:-1], {
+                "id": group_id, "name": fleet.group_name(kind, group_id), "is_smart": group_id % 2 == 1,
+                members_tag: [{"id": member_id, "name": f"{prefix}-{member_id:06d}"} for member_id in members],
+            })
+        if resource == "policies":
+            return 200, ("policies", [{"id": number, "name": f"Policy {number}"} for number in range(1, fleet.policies + 1)])
+        if resource == "osxconfigurationprofiles":
+            return 200, ("os_x_configuration_profiles", [{"id": number, "name": f"Profile {number}"} for number in range(1, fleet.profiles + 1)])
+        if resource == "mobiledeviceconfigurationprofiles":
+            return 200, ("configuration_profiles", [{"id": number, "name": f"Profile {number}"} for number in range(1, fleet.profiles + 1)])
+        return 404, "Not found"
+
+    # A record by /id/N, limited to the sections named by /subset/A&B when given
+    def record(self, tag, parts, size, build):
+        if len(parts) < 4 or parts[2] != "id":
+            return 404, "Not found"
+        record_id = int(parts[3])
+        if not 1 <= record_id <= size:
+            return 404, "Not found"
+        record = build(record_id)
+        if len(parts) >= 6 and parts[4] == "subset":
+            sections = {subset_section(name) for name in parts[5].split("&")}
+            record = {section: value for section, value in record.items() if section in sections}
+        return 200, (tag, record)
+
+    # A Jamf Pro API page: {"totalCount": n, "results": [...]} for page and page-size, with only the
+    # requested sections (GENERAL by default), after the filter and sort when given
+    # Filtering and sorting build every record of the fleet, so they cost the mock time on large fleets.
+    def inventory_page(self, query, size, build):
+        page = int(query.get("page", ["0"])[-1])
+        page_size = int(query.get("page-size", ["100"])[-1])
+        sections = {INVENTORY_SECTIONS[section] for section in query.get("section", ["GENERAL"])}
+        first = page * page_size
+        if "filter" not in query and "sort" not in query:
+            total = size
+            records = [build(record_id) for record_id in range(first + 1, min(size, first + page_size) + 1)]
+        else:
+            records = [build(record_id) for record_id in range(1, size + 1)]
+            if query.get("filter", [""])[-1]:
+                rsql_filter = RsqlFilter(query["filter"][-1])
+                records = [record for record in records if rsql_filter.matches(record)]
+            for entry in reversed(query.get("sort", [""])[-1].split(",")):
+                if entry:
+                    field, _, direction = entry.partition(":")
+                    records.sort(key=lambda record: sort_key(field_text(record, field)), reverse=direction.lower() == "desc")
+            total = len(records)
+            records = records[first:first + page_size]
+        return {"totalCount": total, "results": [
+            {key: value for key, value in record.items() if not isinstance(value, dict) or key in sections} for record in records
+        ]}
+
+# Function to start a mock server on a background thread and return it (port 0 picks a free port)
+def start_server(fleet=None, host="127.0.0.1", port=0, **options):
+    server = MockJamfServer((host, port), fleet or Fleet(), **options)
+    threading.Thread(target=server.serve_forever, name="mock-jamf", daemon=True).start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in Jamf Pro server with a synthetic fleet.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443, help="port to listen on, 0 for any free port (default: 8443)")
+    parser.add_argument("--computers", type=int, default=1000, help="number of computers (default: 1000)")
+    parser.add_argument("--devices", type=int, default=1000, help="number of mobile devices (default: 1000)")
+    parser.add_argument("--groups", type=int, default=20, help="groups per kind; group n holds about 1/n of the fleet (default: 20)")
+    parser.add_argument("--policies", type=int, default=150)
+    parser.add_argument("--profiles", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per request in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- variation of the latency in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429 with Retry-After")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    fleet = Fleet(args.computers, args.devices, args.groups, args.policies, args.profiles, args.seed)
+    server = MockJamfServer((args.host, args.port), fleet, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                            error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=args.seed)
+    print(f"Mock Jamf Pro listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# Startup benchmark for the Jamf Commander GUI.
+#
+# Launches main.py several times and reports, per run and as the median:
+#   first_paint  seconds from launch until the window has been drawn
+#   ready        seconds from launch until the full interface has been built
+# Then runs one launch under `python -X importtime` and lists the slowest imports
+# (cumulative microseconds), so regressions can be traced to the module that caused them.
+#
+# Needs a display; on a headless machine run it under Xvfb:
+#   xvfb-run python benchmarks/startup.py --runs 10
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MILESTONES = ("first_paint", "ready")
+
+# Function to launch the application once and return the seconds at which it reached each milestone
+def run_once(extra_args=()):
+    env = dict(os.environ, JAMF_STARTUP_BENCHMARK=repr(time.time()), JAMF_LOG_LEVEL="WARNING")
+    result = subprocess.run([sys.executable, *extra_args, "main.py"], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py exited with {result.returncode}: {result.stderr.strip()}")
+    timings = {}
+    for line in result.stdout.splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict) and "milestone" in entry:
+            timings[entry["milestone"]] = entry["seconds"]
+    return timings, result.stderr
+
+# Function to parse `-X importtime` output into {module: cumulative microseconds}
+def parse_importtime(stderr):
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        imports[module.strip()] = max(imports.get(module.strip(), 0), int(cumulative))
+    return imports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup benchmark for the Jamf Commander GUI.")
+    parser.add_argument("--runs", type=int, default=5, help="number of timed launches (default: 5)")
+    parser.add_argument("--top", type=int, default=15, help="number of imports listed (default: 15)")
+    parser.add_argument("--json", action="store_true", help="print the results as one JSON object")
+    args = parser.parse_args(argv)
+
+    runs = [run_once()[0] for _ in range(args.runs)]
+    summary = {milestone: statistics.median(run[milestone] for run in runs) for milestone in MILESTONES
+               if all(milestone in run for run in runs)}
+    _, stderr = run_once(["-X", "importtime"])
+    imports = sorted(parse_importtime(stderr).items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps({"runs": runs, "median": summary, "imports": dict(imports)}))
+        return 0
+    for number, run in enumerate(runs, 1):
+        print(f"run {number}: " + ", ".join(f"{milestone} {run.get(milestone, float('nan')):.3f}s" for milestone in MILESTONES))
+    print("median: " + ", ".join(f"{milestone} {seconds:.3f}s" for milestone, seconds in summary.items()))
+    print("\nslowest imports (cumulative, one launch):")
+    for module, microseconds in imports:
+        print(f"  {microseconds / 1000:8.1f} ms  {module}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
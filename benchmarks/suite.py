@@ -0,0 +1,259 @@
+# End-to-end performance benchmarks against the mock Jamf Pro server (benchmarks/mock_jamf.py).
+#
+# Starts a mock server with a synthetic fleet, then runs each scenario in a fresh Python process
+# (cold caches, its own working directory and a clean peak RSS) through the same code the GUI uses:
+#   dashboard      update_dashboard with the group listings, as after a login
+#   group_members  fetch_and_display_group_members for the largest computer group
+#   search         search_callback for groups, once cold (fetching the groups) and then warm
+#   details        detail records of the first --details members, parsed and formatted per detail tab
+# Each scenario reports wall time, requests sent, responses served from the cache, bytes received,
+# time spent parsing and the peak RSS of its process. Tk widgets are replaced by recorders and the
+# Tk event loop by a small scheduler, so no display is needed.
+#
+#   python benchmarks/suite.py --computers 100000 --devices 20000 --latency 30
+#   python benchmarks/suite.py --scenario group_members --runs 5 --json > results.json
+#
+# With --replay, no mock server is started: the scenarios are answered from an archive recorded
+# with JAMF_HTTP_RECORD (see src/recording.py), waiting the recorded latencies. Run the same replay
+# before and after a change to compare timings offline:
+#   python benchmarks/suite.py --replay slow-session.jsonl.gz --group 42 --scenario group_members
+import os
+import sys
+import json
+import time
+import heapq
+import argparse
+import itertools
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+SCENARIOS = ("dashboard", "group_members", "search", "details")
+SCENARIO_TIMEOUT = 600
+
+# Stands in for the Tk root: runs after() callbacks in time order on the calling thread
+class HeadlessRoot:
+    def __init__(self):
+        self.jobs = []
+        self.counter = itertools.count()
+
+    def after(self, delay_ms, func, *args):
+        heapq.heappush(self.jobs, (time.monotonic() + delay_ms / 1000, next(self.counter), func, args))
+
+    def run_until(self, done, timeout=SCENARIO_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while not done():
+            if time.monotonic() > deadline:
+                raise TimeoutError("Scenario did not finish in time")
+            due, _, func, args = heapq.heappop(self.jobs)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            func(*args)
+
+# Stands in for labels and (virtual) tree views, keeping what the application shows in them
+class Recorder:
+    def __init__(self):
+        self.options = {}
+        self.rows = []
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+
+    def append_rows(self, rows):
+        self.rows.extend(rows)
+
+def scenario_dashboard(root, runner, jamf_url, token, options):
+    from main import update_dashboard
+    from src.api import fetch_computer_groups, fetch_mobile_device_groups
+    labels = {name: Recorder() for name in ("version", "computers", "policies", "computer_profiles", "mobile_devices", "mobile_profiles")}
+    groups = {
+        "computer_groups": (lambda: fetch_computer_groups(jamf_url, token), lambda result: None),
+        "device_groups": (lambda: fetch_mobile_device_groups(jamf_url, token), lambda result: None),
+    }
+    update_dashboard(labels, jamf_url, token, groups)
+    root.run_until(lambda: runner.idle_status.startswith("Dashboard refreshed"))
+    return {name: label.options.get("text") for name, label in labels.items()}
+
+def scenario_group_members(root, runner, jamf_url, token, options):
+    from src.gui.tree_views import fetch_and_display_group_members
+    tree = Recorder()
+    fetch_and_display_group_members(options.group, "computers", tree)
+    root.run_until(lambda: not runner.active)
+    return {"members": len(tree.rows)}
+
+def scenario_search(root, runner, jamf_url, token, options):
+    from src.gui.search import search_callback
+    tree = Recorder()
+    start = time.perf_counter()
+    search_callback("computers", "Groups", "macs", tree)
+    root.run_until(lambda: not runner.active)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for term in itertools.islice(itertools.cycle(["macs 1", "finance", "all", "design macs", "1"]), options.searches):
+        search_callback("computers", "Groups", term, tree)
+        root.run_until(lambda: not runner.active)
+    warm = (time.perf_counter() - start) / max(1, options.searches)
+    return {"cold_seconds": round(cold, 4), "warm_seconds": round(warm, 4), "matches": len(tree.rows)}
+
+def scenario_details(root, runner, jamf_url, token, options):
+    from src.api import stream_group_members, DETAIL_SECTIONS
+    from src.prefetch import get_prefetcher
+    from src.cli import map_concurrently
+    member_ids = [member_id for _, member_id in itertools.islice(stream_group_members(jamf_url, token, "computers", options.group), options.details)]
+    prefetcher = get_prefetcher()
+
+    def load(member_id):
+        prefetcher.get_details("computers", member_id)
+        for title in DETAIL_SECTIONS["computers"]:
+            prefetcher.get_section("computers", member_id, title)
+        return True
+
+    loaded = sum(1 for member_id, result in map_concurrently(load, member_ids, options.workers) if result)
+    return {"records": loaded}
+
+# Function to read the peak resident set size of this process in bytes, or None where unavailable
+def peak_rss():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# Runs in the child process: log in, run one scenario and print its measurements as JSON
+def run_scenario(name, jamf_url, options):
+    sys.path.insert(0, ROOT_DIR)
+    os.environ["JAMF_PRO_URL"] = jamf_url
+    with open(".jcinf.json", "w") as file:
+        json.dump({"client_id": "benchmark", "client_secret": "benchmark", "grant_type": "client_credentials"}, file)
+
+    from src.utils import load_token, save_token
+    from src.metrics import get_metrics
+    from src.gui.tasks import init_task_runner
+    root = HeadlessRoot()
+    runner = init_task_runner(root, Recorder())
+    token = load_token()
+    if not token and options.replay:
+        # The recording started with a token read from disk, so it holds no login; any token will do
+        token = "REDACTED"
+        save_token(token, datetime.utcnow() + timedelta(hours=1))
+    if not token:
+        raise RuntimeError("Could not log in")
+
+    metrics = get_metrics()
+    metrics.reset()
+    start = time.perf_counter()
+    result = globals()[f"scenario_{name}"](root, runner, jamf_url, token, options)
+    elapsed = time.perf_counter() - start
+    snapshot = metrics.snapshot()
+    endpoints = snapshot["endpoints"].values()
+    print(json.dumps({
+        "scenario": name,
+        "seconds": round(elapsed, 4),
+        "requests": sum(stats["requests"] for stats in endpoints),
+        "cache_hits": sum(stats["cache_hits"] for stats in endpoints),
+        "retries": sum(stats["retries"] for stats in endpoints),
+        "errors": sum(stats["errors"] for stats in endpoints),
+        "bytes": sum(stats["bytes"] for stats in endpoints),
+        "parse_ms": round(sum(stats["total_ms"] for stats in snapshot["parsing"].values()), 2),
+        "peak_rss": peak_rss(),
+        "result": result,
+    }), flush=True)
+    runner.shutdown()
+    return 0
+
+# Function to start the mock server in its own process and return (process, url)
+def start_mock_server(options):
+    command = [sys.executable, os.path.join(BENCHMARKS_DIR, "mock_jamf.py"), "--port", "0",
+               "--computers", str(options.computers), "--devices", str(options.devices), "--groups", str(options.groups),
+               "--latency", str(options.latency), "--jitter", str(options.jitter),
+               "--error-rate", str(options.error_rate), "--throttle-rate", str(options.throttle_rate)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if "listening on" not in line:
+        process.kill()
+        raise RuntimeError("Mock server did not start")
+    return process, line.rsplit(" ", 1)[-1].strip()
+
+# Function to read the server URL a recording was made against
+def archive_base_url(path):
+    sys.path.insert(0, ROOT_DIR)
+    from src.recording import Archive
+    return Archive(path).header.get("base_url") or "https://replay.invalid"
+
+def launch_scenario(name, jamf_url, options):
+    argv = [sys.executable, os.path.abspath(__file__), "--run-scenario", name, "--url", jamf_url, "--group", str(options.group),
+            "--details", str(options.details), "--searches", str(options.searches), "--workers", str(options.workers)]
+    env = dict(os.environ)
+    if options.replay:
+        argv += ["--replay", options.replay]
+        env.update(JAMF_HTTP_REPLAY=os.path.abspath(options.replay), JAMF_REPLAY_SPEED=str(options.replay_speed))
+    with tempfile.TemporaryDirectory(prefix="jamf-benchmark-") as work_dir:
+        result = subprocess.run(argv, cwd=work_dir, env=env, capture_output=True, text=True, timeout=SCENARIO_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def format_row(name, runs):
+    median = lambda key: statistics.median(run[key] for run in runs)
+    rss = [run["peak_rss"] for run in runs if run["peak_rss"]]
+    return (f"{name:<14} {median('seconds'):>9.3f} {median('requests'):>9.0f} {median('cache_hits'):>7.0f} "
+            f"{median('bytes') / 1024:>11,.1f} {median('parse_ms'):>10.1f} {(max(rss) / 1048576 if rss else float('nan')):>9.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks against the mock Jamf Pro server.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="runs per scenario; medians are reported (default: 3)")
+    parser.add_argument("--computers", type=int, default=10000)
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=20.0, help="mock server latency per request in milliseconds (default: 20)")
+    parser.add_argument("--jitter", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--details", type=int, default=100, help="member records loaded by the details scenario (default: 100)")
+    parser.add_argument("--searches", type=int, default=20, help="warm searches in the search scenario (default: 20)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent detail loads in the details scenario (default: 4)")
+    parser.add_argument("--group", type=int, default=1, help="computer group loaded by the group_members and details scenarios (default: 1)")
+    parser.add_argument("--replay", metavar="ARCHIVE", help="answer requests from a recorded archive instead of a mock server")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="divide recorded latencies by this; 0 replays without waiting (default: 1)")
+    parser.add_argument("--json", action="store_true", help="print every run as JSON instead of a table")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scenario:
+        return run_scenario(args.run_scenario, args.url, args)
+
+    server = None
+    if args.replay:
+        jamf_url = archive_base_url(args.replay)
+    else:
+        server, jamf_url = start_mock_server(args)
+    try:
+        results = {name: [launch_scenario(name, jamf_url, args) for _ in range(args.runs)] for name in args.scenario or SCENARIOS}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps({"url": jamf_url, "computers": args.computers, "devices": args.devices, "latency_ms": args.latency, "results": results}))
+        return 0
+    print(f"{'scenario':<14} {'seconds':>9} {'requests':>9} {'cached':>7} {'KB received':>11} {'parse ms':>10} {'peak MB':>9}")
+    for name, runs in results.items():
+        print(format_row(name, runs))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
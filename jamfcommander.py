@@ -0,0 +1,6 @@
+import sys
+from src.cli import main
+
+# Headless entry point: python3 jamfcommander.py --help
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,109 +1,132 @@
 import os
-import subprocess
+import sys
+import json
+import time
 import logging
-from tkinter import Tk
-from src.auth import authenticate
-from src.utils import load_env_variables, save_url_to_env, get_size_from_xml, load_token
-from src.gui.gui import setup_gui
-from src.gui.data_fetching import fetch_computer_groups, fetch_mobile_device_groups, fetch_jamf_pro_version, fetch_computer_info, fetch_mobile_device_info, make_classic_api_request
-from src.gui.event_handlers import authenticate_callback, on_computer_member_click, on_device_member_click, display_general_info
+from functools import partial
 
-# Enable verbose logging
-logging.basicConfig(level=logging.DEBUG)
+# Modules that pull in requests, PyYAML and the GUI are imported inside the functions below,
+# after the window has been painted, so the window appears as soon as Tk is up.
+# (See benchmarks/startup.py for the time-to-first-paint and import time breakdown.)
 
-# Create a global variable to store the URL
-global_jamf_url = None  # Global variable for storing the authenticated Jamf Pro URL
+DEFAULT_LOG_LEVEL = "INFO"
 
-# Load environment variables from the .env file
-load_env_variables()
-
-# Function to clone or update the GitHub repository
+# Function to clone or update the MDM command repository (shallow, sparse, skipped while recent; see src/repo_sync.py)
+# Runs on a worker thread and returns the command catalog once it is ready
 def clone_or_update_repo():
-    repo_url = "https://github.com/apple/device-management.git"
-    repo_dir = os.path.join("tmp", "device-management")
-
-    if not os.path.exists(repo_dir):
-        logging.info(f"Cloning repository from {repo_url} to {repo_dir}")
-        subprocess.run(["git", "clone", repo_url, repo_dir], check=True)
-    else:
-        logging.info(f"Updating repository in {repo_dir}")
-        subprocess.run(["git", "-C", repo_dir, "pull"], check=True)
+    from src.repo_sync import sync_repo
+    return sync_repo()
 
 # Function to update the dashboard with relevant counts
-def update_dashboard(token):
-    global global_jamf_url
-
-    if not global_jamf_url:
+# labels maps each dashboard value to its label widget (bound in with functools.partial)
+# Extra jobs (such as the group listings) are fetched in the same concurrent batch
+def update_dashboard(labels, jamf_url, token, extra_jobs=None):
+    from src.gui.dashboard import load_dashboard, show_count
+    from src.api import fetch_jamf_pro_version
+    from src.counts import get_count
+    from src.gui.tasks import get_task_runner
+
+    if not jamf_url:
         logging.error("No Jamf URL available to fetch data.")
         return
 
-    # Jamf Pro Version (JSON response)
-    version = fetch_jamf_pro_version(global_jamf_url, token)
-    if version:
-        version_value.config(text=f"{version}")
-    else:
-        version_value.config(text="N/A")
-
-    # Managed Computers (Classic API)
-    computers_data = make_classic_api_request(global_jamf_url, 'JSSResource/computers', token)
-    if computers_data:
-        managed_computers_value.config(text=get_size_from_xml(computers_data))
-    else:
-        managed_computers_value.config(text="N/A")
-
-    # Computer Policies (Classic API)
-    policies_data = make_classic_api_request(global_jamf_url, 'JSSResource/policies', token)
-    if policies_data:
-        computer_policies_value.config(text=get_size_from_xml(policies_data))
-    else:
-        computer_policies_value.config(text="N/A")
-
-    # Computer Profiles (Classic API)
-    profiles_data = make_classic_api_request(global_jamf_url, 'JSSResource/osxconfigurationprofiles', token)
-    if profiles_data:
-        computer_profiles_value.config(text=get_size_from_xml(profiles_data))
-    else:
-        computer_profiles_value.config(text="N/A")
-
-    # Managed Mobile Devices (Classic API)
-    mobile_devices_data = make_classic_api_request(global_jamf_url, 'JSSResource/mobiledevices', token)
-    if mobile_devices_data:
-        managed_mobile_devices_value.config(text=get_size_from_xml(mobile_devices_data))
-    else:
-        managed_mobile_devices_value.config(text="N/A")
-
-    # Mobile Device Profiles (Classic API)
-    mobile_profiles_data = make_classic_api_request(global_jamf_url, 'JSSResource/mobiledeviceconfigurationprofiles', token)
-    if mobile_profiles_data:
-        mobile_profiles_value.config(text=get_size_from_xml(mobile_profiles_data))
-    else:
-        mobile_profiles_value.config(text="N/A")
-
-# Initialize the Tkinter root window
-root = Tk()
-
-# Set up the GUI and get references to the key UI elements
-entry_url, status_label, version_value, smart_computer_groups_value, static_computer_groups_value, \
-computer_policies_value, computer_profiles_value, smart_mobile_groups_value, \
-static_mobile_groups_value, mobile_profiles_value, managed_computers_value, \
-managed_mobile_devices_value, tree_computers, tree_devices, tree_computer_members, tree_device_members, \
-general_info_text_computers, general_info_text_devices = setup_gui(
-    root, 
-    lambda url: authenticate_callback(
-        url, status_label, update_dashboard, clone_or_update_repo, 
-        tree_computers, tree_devices, smart_computer_groups_value, static_computer_groups_value, 
-        smart_mobile_groups_value, static_mobile_groups_value
+    # Counts come from the cheapest available source (see src/counts.py)
+    jobs = {
+        # Jamf Pro Version (JSON response)
+        "version": (
+            partial(fetch_jamf_pro_version, jamf_url, token),
+            lambda version: labels["version"].config(text=f"{version}" if version else "N/A")
+        ),
+    }
+    # Managed Computers, Computer Policies, Computer Profiles, Managed Mobile Devices, Mobile Device Profiles
+    for resource in ("computers", "policies", "computer_profiles", "mobile_devices", "mobile_profiles"):
+        jobs[resource] = (
+            partial(get_count, jamf_url, resource, token),
+            partial(show_count, labels[resource])
+        )
+    if extra_jobs:
+        jobs.update(extra_jobs)
+
+    runner = get_task_runner()
+    runner.set_status("Refreshing dashboard...")
+    load_dashboard(jobs, runner, lambda elapsed: runner.set_status(f"Dashboard refreshed in {elapsed:.2f}s"))
+
+# Function to report a startup milestone to benchmarks/startup.py
+# JAMF_STARTUP_BENCHMARK holds the time.time() at which the benchmark launched this process
+def report_startup(milestone):
+    launched = os.getenv("JAMF_STARTUP_BENCHMARK")
+    if launched:
+        print(json.dumps({"milestone": milestone, "seconds": round(time.time() - float(launched), 4)}), flush=True)
+
+# Function to build the full interface into the already visible root window
+def finish_startup(root, loading_label):
+    from src.utils import load_env_variables
+    from src.gui.gui import setup_gui
+    from src.gui.tasks import init_task_runner
+    from src.session import prewarm_connection
+    from src.gui.event_handlers import authenticate_callback
+
+    # Load environment variables from the .env file
+    load_env_variables()
+    loading_label.destroy()
+
+    # Set up the GUI and get references to the key UI elements
+    entry_url, status_label, version_value, smart_computer_groups_value, static_computer_groups_value, \
+    computer_policies_value, computer_profiles_value, smart_mobile_groups_value, \
+    static_mobile_groups_value, mobile_profiles_value, managed_computers_value, \
+    managed_mobile_devices_value, tree_computers, tree_devices, tree_computer_members, tree_device_members, \
+    general_info_text_computers, general_info_text_devices, status_bar = setup_gui(
+        root,
+        lambda url: authenticate_callback(
+            url, status_label, dashboard, clone_or_update_repo,
+            tree_computers, tree_devices, smart_computer_groups_value, static_computer_groups_value,
+            smart_mobile_groups_value, static_mobile_groups_value
+        )
     )
-)
-
-# Bind the click events to the tree views
-tree_computer_members.bind("<ButtonRelease-1>", lambda event: on_computer_member_click(event, tree_computer_members, general_info_text_computers))
-tree_device_members.bind("<ButtonRelease-1>", lambda event: on_device_member_click(event, tree_device_members, general_info_text_devices))
-
-# Load the URL from the environment variable and pre-fill the entry field if available
-saved_url = os.getenv("JAMF_PRO_URL", "")
-if saved_url:
-    entry_url.insert(0, saved_url)
-
-# Start the GUI event loop
-root.mainloop()
\ No newline at end of file
+    dashboard = partial(update_dashboard, {
+        "version": version_value,
+        "computers": managed_computers_value,
+        "policies": computer_policies_value,
+        "computer_profiles": computer_profiles_value,
+        "mobile_devices": managed_mobile_devices_value,
+        "mobile_profiles": mobile_profiles_value,
+    })
+
+    # Run network and disk work off the Tk thread, reporting progress in the status bar
+    init_task_runner(root, status_bar)
+
+    # Load the URL from the environment variable and pre-fill the entry field if available
+    saved_url = os.getenv("JAMF_PRO_URL", "")
+    if saved_url:
+        entry_url.insert(0, saved_url)
+        prewarm_connection(saved_url)
+
+    root.update_idletasks()
+    report_startup("ready")
+    if os.getenv("JAMF_STARTUP_BENCHMARK"):
+        root.after_idle(root.destroy)
+
+def main():
+    # Logging is configured once, here; set JAMF_LOG_LEVEL=DEBUG for request-level output
+    level = os.getenv("JAMF_LOG_LEVEL", DEFAULT_LOG_LEVEL).upper()
+    logging.basicConfig(level=getattr(logging, level, logging.INFO))
+
+    # Initialize the Tkinter root window and paint it before any disk, network or catalog work
+    import tkinter as tk
+    root = tk.Tk()
+    root.title("Jamf Commander")
+    root.geometry("1200x800")
+    loading_label = tk.Label(root, text="Loading...", font=("Arial", 12))
+    loading_label.pack(expand=True)
+    root.wait_visibility()
+    root.update()
+    report_startup("first_paint")
+
+    root.after_idle(partial(finish_startup, root, loading_label))
+
+    # Start the GUI event loop
+    root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,209 +1,210 @@
-import requests
-import logging
-import xml.etree.ElementTree as ET
-from src.utils import make_classic_api_request, save_to_cache
-
-def make_classic_api_request(jamf_url, endpoint, token):
-    try:
-        headers = {"Accept": "application/xml", "Authorization": f"Bearer {token}"}
-        response = requests.get(f"{jamf_url}/{endpoint}", headers=headers)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        return response.text
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error making Classic API request to {endpoint}: {e}")
-        return None
+import json
+import time
+from src.client import JamfClient
+from src.xml_stream import iter_group_members, FieldExtractor, json_text
+from src.metrics import get_metrics, log_payload
 
 # Function to fetch the Jamf Pro version using the Jamf Pro API
 def fetch_jamf_pro_version(jamf_url, token):
-    try:
-        headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
-        response = requests.get(f"{jamf_url}/api/v1/jamf-pro-version", headers=headers)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        version_data = response.json()
-        return version_data.get('version', 'N/A')
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching Jamf Pro version: {e}")
+    version_data = JamfClient(jamf_url, token).get_json("api/v1/jamf-pro-version")
+    if version_data is None:
         return None
+    return version_data.get('version', 'N/A')
 
 # Function to fetch mobile device groups using the Classic API
 def fetch_mobile_device_groups(jamf_url, token):
-    try:
-        headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
-        response = requests.get(f"{jamf_url}/JSSResource/mobiledevicegroups", headers=headers)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        mobile_groups = response.json()
-
-        logging.debug(f"Fetched mobile device groups: {mobile_groups}")
-
-        groups = []
-        smart_count = 0
-        static_count = 0
-
-        for group in mobile_groups['mobile_device_groups']:
-            group_name = group['name']
-            group_type = "Smart" if group['is_smart'] else "Static"
-            group_id = group['id']
-            groups.append({
-                'name': group_name,
-                'type': group_type,
-                'id': group_id
-            })
-
-            if group['is_smart']:
-                smart_count += 1
-            else:
-                static_count += 1
-
-        return {
-            "groups": groups,
-            "smart_count": smart_count,
-            "static_count": static_count
-        }
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching mobile device groups: {e}")
-        return None
+    return fetch_groups(jamf_url, token, "JSSResource/mobiledevicegroups", "mobile_device_groups")
 
 # Function to fetch computer groups using the Classic API
 def fetch_computer_groups(jamf_url, token):
-    try:
-        headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
-        response = requests.get(f"{jamf_url}/JSSResource/computergroups", headers=headers)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        computer_groups = response.json()
-
-        logging.debug(f"Fetched computer groups: {computer_groups}")
-
-        groups = []
-        smart_count = 0
-        static_count = 0
-
-        for group in computer_groups['computer_groups']:
-            group_name = group['name']
-            group_type = "Smart" if group['is_smart'] else "Static"
-            group_id = group['id']
-            groups.append({
-                'name': group_name,
-                'type': group_type,
-                'id': group_id
-            })
-
-            if group['is_smart']:
-                smart_count += 1
-            else:
-                static_count += 1
-
-        return {
-            "groups": groups,
-            "smart_count": smart_count,
-            "static_count": static_count
-        }
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching computer groups: {e}")
-        return None
+    return fetch_groups(jamf_url, token, "JSSResource/computergroups", "computer_groups")
 
-# Function to fetch detailed information for a computer
-def fetch_computer_info(jamf_url, computer_id, token):
-    try:
-        headers = {"Accept": "application/xml", "Authorization": f"Bearer {token}"}
-        response = requests.get(f"{jamf_url}/JSSResource/computers/id/{computer_id}", headers=headers)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        return response.text
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching computer info: {e}")
+# Function to list the groups of a Classic API group listing with their smart/static counts
+def fetch_groups(jamf_url, token, endpoint, key):
+    listing = JamfClient(jamf_url, token).get_json(endpoint)
+    if listing is None:
         return None
 
-# Function to fetch detailed information for a mobile device
-def fetch_mobile_device_info(jamf_url, device_id, token):
-    try:
-        headers = {"Accept": "application/xml", "Authorization": f"Bearer {token}"}
-        response = requests.get(f"{jamf_url}/JSSResource/mobiledevices/id/{device_id}", headers=headers)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        return response.text
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching mobile device info: {e}")
-        return None
+    log_payload(f"Fetched {key.replace('_', ' ')}", listing)
 
-# Function to parse and format computer information
-def parse_computer_info(xml_data):
-    root = ET.fromstring(xml_data)
-    computer_info = {
-        "Computer Name": root.findtext(".//name"),
-        "Model": root.findtext(".//model"),
-        "Model Identifier": root.findtext(".//model_identifier"),
-        "Architecture Type": root.findtext(".//processor_architecture"),
-        "Serial Number": root.findtext(".//serial_number"),
-        "Primary MAC Address": root.findtext(".//mac_address"),
-        "IP Address": root.findtext(".//ip_address"),
-        "OS Version": root.findtext(".//os_version"),
-        "OS Build": root.findtext(".//os_build"),
-        "Jamf Pro Computer ID": root.findtext(".//id"),
-        "Last Inventory Update": root.findtext(".//report_date_utc"),
-        "Managed": root.findtext(".//managed"),
-        "Supervised": root.findtext(".//supervised")
+    groups = []
+    smart_count = 0
+    static_count = 0
+
+    for group in listing[key]:
+        groups.append({
+            'name': group['name'],
+            'type': "Smart" if group['is_smart'] else "Static",
+            'id': group['id']
+        })
+
+        if group['is_smart']:
+            smart_count += 1
+        else:
+            static_count += 1
+
+    return {
+        "groups": groups,
+        "smart_count": smart_count,
+        "static_count": static_count
     }
-    formatted_info = "\n".join([f"{key}: {value}" for key, value in computer_info.items() if value])
-    return formatted_info
+
+# Classic API subsets holding the fields shown for a selected computer or device
+COMPUTER_INFO_SUBSET = "General&Hardware"
+MOBILE_DEVICE_INFO_SUBSET = "General"
+
+# Function to fetch detailed information for a computer as the bytes of its JSON document
+# Only the given subset of the record is requested; pass subset=None for the whole record.
+def fetch_computer_info(jamf_url, computer_id, token, subset=COMPUTER_INFO_SUBSET):
+    return JamfClient(jamf_url, token).get(record_endpoint('computers', computer_id, subset))
+
+# Function to fetch detailed information for a mobile device as the bytes of its JSON document
+# Only the given subset of the record is requested; pass subset=None for the whole record.
+def fetch_mobile_device_info(jamf_url, device_id, token, subset=MOBILE_DEVICE_INFO_SUBSET):
+    return JamfClient(jamf_url, token).get(record_endpoint('mobiledevices', device_id, subset))
+
+# Function to build the Classic API endpoint of a record, optionally limited to subsets ("General&Hardware")
+def record_endpoint(resource, record_id, subset=None):
+    endpoint = f"JSSResource/{resource}/id/{record_id}"
+    if subset:
+        endpoint += f"/subset/{subset}"
+    return endpoint
+
+# Fields shown for a computer, as (label, path below <computer>) in display order
+COMPUTER_FIELDS = [
+    ("Computer Name", "general/name"),
+    ("Model", "hardware/model"),
+    ("Model Identifier", "hardware/model_identifier"),
+    ("Architecture Type", "hardware/processor_architecture"),
+    ("Serial Number", "general/serial_number"),
+    ("Primary MAC Address", "general/mac_address"),
+    ("IP Address", "general/ip_address"),
+    ("OS Version", "hardware/os_version"),
+    ("OS Build", "hardware/os_build"),
+    ("Jamf Pro Computer ID", "general/id"),
+    ("Last Inventory Update", "general/report_date_utc"),
+    ("Managed", "general/remote_management/managed"),
+    ("Supervised", "general/supervised"),
+]
+
+# Fields shown for a mobile device, as (label, path below <mobile_device>) in display order
+MOBILE_DEVICE_FIELDS = [
+    ("Mobile Device Name", "general/name"),
+    ("Model", "general/model"),
+    ("Model Identifier", "general/model_identifier"),
+    ("Model Number", "general/model_number"),
+    ("Serial Number", "general/serial_number"),
+    ("Wi-Fi MAC Address", "general/wifi_mac_address"),
+    ("IP Address", "general/ip_address"),
+    ("OS Version", "general/os_version"),
+    ("OS Build", "general/os_build"),
+    ("Jamf Pro Mobile Device ID", "general/id"),
+    ("Last Inventory Update", "general/last_inventory_update_utc"),
+    ("Managed", "general/managed"),
+    ("Supervised", "general/supervised"),
+]
+
+computer_extractor = FieldExtractor(COMPUTER_FIELDS, "computer")
+mobile_device_extractor = FieldExtractor(MOBILE_DEVICE_FIELDS, "mobile device")
+
+# Function to extract computer information into a dict of display labels to values
+def extract_computer_info(data):
+    return computer_extractor.extract_json(data)
+
+# Function to parse and format computer information
+def parse_computer_info(data):
+    return format_info(extract_computer_info(data))
+
+# Function to extract mobile device information into a dict of display labels to values
+def extract_mobile_device_info(data):
+    return mobile_device_extractor.extract_json(data)
 
 # Function to parse and format mobile device information
-def parse_mobile_device_info(xml_data):
-    root = ET.fromstring(xml_data)
-    device_info = {
-        "Mobile Device Name": root.findtext(".//name"),
-        "Model": root.findtext(".//model"),
-        "Model Identifier": root.findtext(".//model_identifier"),
-        "Model Number": root.findtext(".//model_number"),
-        "Serial Number": root.findtext(".//serial_number"),
-        "Wi-Fi MAC Address": root.findtext(".//wifi_mac_address"),
-        "IP Address": root.findtext(".//ip_address"),
-        "OS Version": root.findtext(".//os_version"),
-        "OS Build": root.findtext(".//os_build"),
-        "Jamf Pro Mobile Device ID": root.findtext(".//id"),
-        "Last Inventory Update": root.findtext(".//last_inventory_update_utc"),
-        "Managed": root.findtext(".//managed"),
-        "Supervised": root.findtext(".//supervised")
-    }
-    formatted_info = "\n".join([f"{key}: {value}" for key, value in device_info.items() if value])
-    return formatted_info
-
-# Function to fetch general information of a computer or device
-def fetch_general_info(jamf_url, item_id, item_type, token):
-    endpoint = f"JSSResource/{item_type}/id/{item_id}"
-    response = make_classic_api_request(jamf_url, endpoint, token)
-    if response:
-        # Cache the response
-        cache_filename = f"{item_type}_{item_id}_general.xml"
-        save_to_cache(cache_filename, response)
-        return response
-    return None
-
-# Function to fetch and display group members
-def fetch_and_display_group_members(jamf_url, group_id, group_type, token):
-    if group_type == "computers":
-        endpoint = f"JSSResource/computergroups/id/{group_id}"
-    else:
-        endpoint = f"JSSResource/mobiledevicegroups/id/{group_id}"
-
-    response = make_classic_api_request(jamf_url, endpoint, token)
-    if response:
-        members = parse_group_members(response)
-        return members
-    return None
-
-# Function to parse group members from XML data
-def parse_group_members(xml_data):
-    root = ET.fromstring(xml_data)
-    members = []
-    for computer in root.findall(".//computer"):
-        members.append((computer.find("name").text, computer.find("id").text))
-    for device in root.findall(".//mobile_device"):
-        members.append((device.find("name").text, device.find("id").text))
-    return members
-
-# Function to display group members in a treeview
-def display_group_members(members, tree_members):
-    # Clear the existing items in the treeview
-    for item in tree_members.get_children():
-        tree_members.delete(item)
-    # Add the new members to the treeview
-    for member in members:
-        tree_members.insert("", "end", values=member)
\ No newline at end of file
+def parse_mobile_device_info(data):
+    return format_info(extract_mobile_device_info(data))
+
+# Function to format extracted information as "label: value" lines, skipping empty values
+def format_info(info):
+    return "\n".join([f"{key}: {value}" for key, value in info.items() if value])
+
+# Detail tabs per member kind: tab title -> (Classic API subset, top-level element it returns)
+DETAIL_SECTIONS = {
+    "computers": {
+        "Hardware": ("Hardware", "hardware"),
+        "Applications": ("Software", "software"),
+        "Security": ("Security", "security"),
+        "Extension Attributes": ("ExtensionAttributes", "extension_attributes"),
+    },
+    "devices": {
+        "Network": ("Network", "network"),
+        "Applications": ("Applications", "applications"),
+        "Security": ("Security", "security"),
+        "Extension Attributes": ("ExtensionAttributes", "extension_attributes"),
+    },
+}
+
+# Function to format one section of a subset document (JSON bytes) as indented text
+# Records made only of simple values (an application, an extension attribute...) take one line each.
+def format_section(data, section_tag):
+    start = time.perf_counter()
+    document = json.loads(data)
+    get_metrics().record_parse("detail sections", time.perf_counter() - start)
+    record = next(iter(document.values()), None) if isinstance(document, dict) else None
+    section = record.get(section_tag) if isinstance(record, dict) else None
+    if section is None:
+        return "No information found."
+    lines = []
+    items = section.items() if isinstance(section, dict) else ((_item_key(section_tag), item) for item in section)
+    for key, value in items:
+        _format_value(key, value, 0, lines)
+    return "\n".join(lines) if lines else "No information found."
+
+def _format_value(key, value, depth, lines):
+    indent = "  " * depth
+    label = key.replace("_", " ").capitalize()
+    if isinstance(value, list):
+        if value:
+            lines.append(f"{indent}{label}:")
+        for item in value:
+            _format_value(_item_key(key), item, depth + 1, lines)
+        return
+    if not isinstance(value, dict):
+        text = json_text(value)
+        if text and text.strip():
+            lines.append(f"{indent}{label}: {text.strip()}")
+        return
+    if all(not isinstance(item, (dict, list)) for item in value.values()):
+        values = {tag: (json_text(item) or "").strip() for tag, item in value.items()}
+        name = values.pop("name", "")
+        if name and "value" in values:
+            lines.append(f"{indent}{name}: {values['value']}")
+            return
+        if name:
+            details = ", ".join(item for tag, item in values.items() if item and tag != "id")
+            lines.append(f"{indent}{name}" + (f" ({details})" if details else ""))
+            return
+    lines.append(f"{indent}{label}:")
+    for tag, item in value.items():
+        _format_value(tag, item, depth + 1, lines)
+
+# Function to name the items of a list the way the XML document tags them ("applications" -> "application")
+def _item_key(key):
+    if key.endswith("ies"):
+        return key[:-3] + "y"
+    return key[:-1] if key.endswith("s") else key
+
+# Classic API group documents listing the members of a computer or device group
+GROUP_ENDPOINTS = {
+    "computers": "JSSResource/computergroups/id/{}",
+    "devices": "JSSResource/mobiledevicegroups/id/{}",
+}
+
+# Function to yield (name, id) of every member of a group, parsed while the group downloads
+# Group documents are streamed as XML, whose members can be parsed before the whole document has arrived.
+# revalidate asks the server even when the group is in the response cache (see cached_stream).
+def stream_group_members(jamf_url, token, kind, group_id, revalidate=False):
+    chunks = JamfClient(jamf_url, token).stream(GROUP_ENDPOINTS[kind].format(group_id), revalidate=revalidate)
+    try:
+        yield from iter_group_members(chunks)
+    finally:
+        chunks.close()
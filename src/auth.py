@@ -2,6 +2,7 @@ import requests
 import logging
 from datetime import datetime, timedelta
 from src.utils import save_token, clear_token, load_credentials
+from src.session import get_session
 
 # Function to get an OAuth token from Jamf Pro
 def get_token(jamf_url, client_id, client_secret, grant_type):
@@ -16,15 +17,14 @@ def get_token(jamf_url, client_id, client_secret, grant_type):
         "grant_type": grant_type
     }
 
-    logging.debug(f"Requesting token from {token_url}")
-    logging.debug(f"Request headers: {headers}")
-    logging.debug(f"Request payload: {data}")
+    # The payload holds the client secret and the response the access token, so neither is logged
+    logging.debug(f"Requesting token from {token_url} for client {client_id}")
 
     try:
-        response = requests.post(token_url, headers=headers, data=data)
+        response = get_session().post(token_url, headers=headers, data=data)
         response.raise_for_status()  # Will raise an exception for any 4XX/5XX responses
         token_info = response.json()
-        logging.debug(f"Token received: {token_info}")
+        logging.debug(f"Token received, expires in {token_info.get('expires_in')}s")
         return token_info.get("access_token"), token_info.get("expires_in")
     except requests.exceptions.HTTPError as http_err:
         logging.error(f"HTTP error occurred: {http_err}")
@@ -34,7 +34,8 @@ def get_token(jamf_url, client_id, client_secret, grant_type):
         return None, None
 
 # Function to handle authentication process
-def authenticate(jamf_url, status_label):
+# status_label is optional so the login can run on a worker thread without touching Tk widgets
+def authenticate(jamf_url, status_label=None):
     logging.debug("Starting authentication process...")
 
     # Clear any existing token
@@ -46,7 +47,8 @@ def authenticate(jamf_url, status_label):
     logging.debug(f"Loaded credentials - Client ID: {client_id}, Grant Type: {grant_type}")
 
     if not client_id or not client_secret or not grant_type:
-        status_label.config(text="AUTH FAILED", fg="red")
+        if status_label:
+            status_label.config(text="AUTH FAILED", fg="red")
         logging.error("Missing credentials, authentication failed.")
         return None
 
@@ -57,10 +59,12 @@ def authenticate(jamf_url, status_label):
         # Calculate the expiry time
         expiry_time = datetime.utcnow() + timedelta(seconds=expires_in)
         save_token(token, expiry_time)  # Save token and expiry time for future API requests
-        status_label.config(text="AUTHENTICATED", fg="green")
+        if status_label:
+            status_label.config(text="AUTHENTICATED", fg="green")
         logging.debug("Authentication successful.")
         return token
     else:
-        status_label.config(text="AUTH FAILED", fg="red")
+        if status_label:
+            status_label.config(text="AUTH FAILED", fg="red")
         logging.error("Authentication failed.")
         return None
\ No newline at end of file
@@ -0,0 +1,289 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from src.session import get_session, response_size
+from src.metrics import get_metrics
+
+CACHE_DIR = os.path.join("tmp", "cache")
+# Total size of cached bodies kept on disk (override with JAMF_CACHE_MAX_BYTES)
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+# TTL in seconds for endpoints without a specific rule (override with JAMF_CACHE_DEFAULT_TTL)
+DEFAULT_TTL = 60
+
+# Per-endpoint TTLs in seconds, first matching pattern wins (0 disables caching)
+ENDPOINT_TTLS = [
+    (re.compile(r"api/oauth/token"), 0),
+    (re.compile(r"api/v1/jamf-pro-version$"), 3600),
+    (re.compile(r"JSSResource/(computer|mobiledevice)groups/id/"), 120),
+    (re.compile(r"JSSResource/(computer|mobiledevice)groups$"), 300),
+    (re.compile(r"JSSResource/(computers|mobiledevices)/id/"), 300),
+    (re.compile(r"JSSResource/"), 300),
+]
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Function to look up the TTL for a request URL
+def ttl_for_url(url):
+    path = url.split("?", 1)[0]
+    for pattern, ttl in ENDPOINT_TTLS:
+        if pattern.search(path):
+            return ttl
+    return int(os.getenv("JAMF_CACHE_DEFAULT_TTL", DEFAULT_TTL))
+
+# On-disk response cache with per-entry TTLs and LRU eviction by total bytes
+# Entries are keyed by URL and Accept header; each one is stored as a body file plus a JSON metadata file
+class ResponseCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("JAMF_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+        self._load_index()
+
+    # Return the metadata of a cached response (or None), marking it as recently used
+    def lookup(self, url, accept):
+        key = self._key(url, accept)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    # Check whether an entry is still within its TTL
+    def is_fresh(self, entry):
+        return time.time() - entry["stored_at"] < entry["ttl"]
+
+    # Read a cached body, or None if the file has gone missing
+    def read(self, entry):
+        try:
+            with open(self._body_path(entry["key"]), "rb") as body_file:
+                return body_file.read()
+        except OSError:
+            with self.lock:
+                self._remove(entry["key"])
+            return None
+
+    # Store a response body with its validators
+    def store(self, url, accept, body, headers, ttl):
+        key = self._key(url, accept)
+        entry = {
+            "key": key,
+            "url": url,
+            "accept": accept,
+            "size": len(body),
+            "ttl": ttl,
+            "stored_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type")
+        }
+        if entry["size"] > self.max_bytes:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._body_path(key), "wb") as body_file:
+            body_file.write(body)
+        self._write_meta(entry)
+        with self.lock:
+            self._remove(key, delete_files=False)
+            self.entries[key] = entry
+            self.total_bytes += entry["size"]
+            self._evict()
+
+    # Restart an entry's TTL after the server confirmed it has not changed
+    def refresh(self, entry):
+        entry["stored_at"] = time.time()
+        self._write_meta(entry)
+        with self.lock:
+            self.stats["revalidated"] += 1
+
+    def record(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    # Drop every cached response
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                self._remove(key)
+
+    def _key(self, url, accept):
+        return hashlib.sha1(f"{accept}|{url}".encode("utf-8")).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _meta_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write_meta(self, entry):
+        with open(self._meta_path(entry["key"]), "w") as meta_file:
+            json.dump(entry, meta_file)
+
+    def _remove(self, key, delete_files=True):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry["size"]
+        if delete_files:
+            for path in (self._body_path(key), self._meta_path(key)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key = next(iter(self.entries))
+            self._remove(key)
+            self.stats["evictions"] += 1
+
+    def _load_index(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, filename)) as meta_file:
+                    entries.append(json.load(meta_file))
+            except (OSError, ValueError):
+                continue
+        # Oldest first so the least recently stored entries are evicted first
+        for entry in sorted(entries, key=lambda entry: entry["stored_at"]):
+            if os.path.exists(self._body_path(entry["key"])):
+                self.entries[entry["key"]] = entry
+                self.total_bytes += entry["size"]
+        self._evict()
+        logging.debug(f"Loaded {len(self.entries)} cached responses ({self.total_bytes} bytes)")
+
+# Function to get the process-wide response cache
+def get_response_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+# Function to build a response object from a cached body
+def cached_response(url, entry, body):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.headers = CaseInsensitiveDict({"Content-Type": entry["content_type"] or entry["accept"]})
+    response.encoding = get_encoding_from_headers(response.headers) or "utf-8"
+    return response
+
+# Function to make a GET request through the response cache
+# Fresh entries are returned without touching the network, stale ones are revalidated
+# with If-None-Match/If-Modified-Since when the server sent validators.
+def cached_get(url, headers=None, ttl=None):
+    headers = dict(headers or {})
+    if ttl is None:
+        ttl = ttl_for_url(url)
+    if ttl <= 0:
+        return get_session().get(url, headers=headers)
+
+    cache = get_response_cache()
+    accept = headers.get("Accept", "*/*")
+    entry = cache.lookup(url, accept)
+    if entry is not None and cache.is_fresh(entry):
+        body = cache.read(entry)
+        if body is not None:
+            cache.record("hits")
+            get_metrics().record(url, "cache_hits")
+            logging.debug(f"Cache hit for {url}")
+            return cached_response(url, entry, body)
+
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = get_session().get(url, headers=headers)
+    if response.status_code == 304 and entry is not None:
+        body = cache.read(entry)
+        if body is not None:
+            cache.refresh(entry)
+            get_metrics().record(url, "revalidated")
+            logging.debug(f"Cache revalidated for {url}")
+            return cached_response(url, entry, body)
+        # The body disappeared underneath us; fetch it again without validators
+        headers.pop("If-None-Match", None)
+        headers.pop("If-Modified-Since", None)
+        response = get_session().get(url, headers=headers)
+
+    cache.record("misses")
+    if response.status_code == 200:
+        cache.store(url, accept, response.content, response.headers, ttl)
+    return response
+
+# Function to stream a GET response body in chunks through the response cache
+# A fresh cached body is yielded in one piece; otherwise the body is streamed from the server
+# and stored once it has been read to the end. Stopping early closes the connection without caching.
+# With revalidate, even a fresh entry is checked with the server (If-None-Match/If-Modified-Since),
+# for callers that must see the current body; a 304 still yields the cached one.
+def cached_stream(url, headers=None, chunk_size=65536, ttl=None, revalidate=False):
+    headers = dict(headers or {})
+    if ttl is None:
+        ttl = ttl_for_url(url)
+
+    cache = get_response_cache()
+    accept = headers.get("Accept", "*/*")
+    entry = cache.lookup(url, accept) if ttl > 0 else None
+    if entry is not None and cache.is_fresh(entry) and not revalidate:
+        body = cache.read(entry)
+        if body is not None:
+            cache.record("hits")
+            get_metrics().record(url, "cache_hits")
+            logging.debug(f"Cache hit for {url}")
+            yield body
+            return
+
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = get_session().get(url, headers=headers, stream=True)
+    try:
+        if response.status_code == 304 and entry is not None:
+            body = cache.read(entry)
+            if body is not None:
+                cache.refresh(entry)
+                get_metrics().record(url, "revalidated")
+                logging.debug(f"Cache revalidated for {url}")
+                yield body
+                return
+            # The body disappeared underneath us; fetch it again without validators
+            response.close()
+            headers.pop("If-None-Match", None)
+            headers.pop("If-Modified-Since", None)
+            response = get_session().get(url, headers=headers, stream=True)
+        response.raise_for_status()
+        chunks = []
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if ttl > 0:
+                chunks.append(chunk)
+            yield chunk
+        if ttl > 0:
+            cache.record("misses")
+            cache.store(url, accept, b"".join(chunks), response.headers, ttl)
+    finally:
+        get_metrics().record_bytes(url, response_size(response))
+        response.close()
@@ -0,0 +1,277 @@
+import os
+import sys
+import csv
+import json
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.utils import load_env_variables, load_token
+from src.client import JamfClient
+from src.api import fetch_computer_groups, fetch_mobile_device_groups, fetch_computer_info, fetch_mobile_device_info, extract_computer_info, extract_mobile_device_info, stream_group_members
+from src.counts import COUNT_SOURCES, get_count
+from src.pro_inventory import iter_inventory, SECTIONS
+from src.mdm_dispatch import dispatch_command, dispatch_to_group, UnfinishedDispatchError
+from src.metrics import get_metrics
+
+# Default number of requests in flight for counts and bulk detail retrieval (override with JAMF_CLI_WORKERS or --workers)
+DEFAULT_CLI_WORKERS = 8
+
+# Per kind: group fetcher, record listing endpoint and key, detail fetcher and extractor
+KINDS = {
+    "computers": {
+        "groups": fetch_computer_groups,
+        "listing": ("JSSResource/computers", "computers"),
+        "details": (fetch_computer_info, extract_computer_info),
+    },
+    "devices": {
+        "groups": fetch_mobile_device_groups,
+        "listing": ("JSSResource/mobiledevices", "mobile_devices"),
+        "details": (fetch_mobile_device_info, extract_mobile_device_info),
+    },
+}
+
+# Writes records to a stream as they are produced, one JSON object per line or as CSV rows
+# CSV columns are taken from the first record; later records are written with the same columns.
+class RecordWriter:
+    def __init__(self, stream, output_format):
+        self.stream = stream
+        self.output_format = output_format
+        self.csv_writer = None
+        self.count = 0
+
+    def write(self, record):
+        if self.output_format == "csv":
+            if self.csv_writer is None:
+                self.csv_writer = csv.DictWriter(self.stream, fieldnames=list(record), extrasaction="ignore")
+                self.csv_writer.writeheader()
+            self.csv_writer.writerow(record)
+        else:
+            self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+        self.count += 1
+
+# Function to run func over items with at most max_workers calls in flight, yielding (item, result) as each finishes
+# Items are submitted as slots free up, so a long id list never turns into one future per id up front.
+def map_concurrently(func, items, max_workers):
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cli") as executor:
+        pending = {}
+        items = iter(items)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_workers * 2:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                    break
+                pending[executor.submit(func, item)] = item
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result()
+                except Exception as e:
+                    logging.error(f"Request for {item} failed: {e}")
+                    yield item, None
+
+# Function to yield the ids to fetch details for, from --ids, --ids-file, --group or --all
+def iter_detail_ids(args, jamf_url, token):
+    if args.ids:
+        yield from (record_id.strip() for record_id in args.ids.split(",") if record_id.strip())
+    if args.ids_file:
+        stream = sys.stdin if args.ids_file == "-" else open(args.ids_file)
+        with stream:
+            yield from (line.strip() for line in stream if line.strip())
+    if args.group:
+        yield from (member_id for name, member_id in stream_group_members(jamf_url, token, args.kind, args.group))
+    if args.all:
+        endpoint, key = KINDS[args.kind]["listing"]
+        listing = JamfClient(jamf_url, token).get_json(endpoint) or {}
+        yield from (str(record["id"]) for record in listing.get(key, []))
+
+def run_counts(args, jamf_url, token, writer):
+    resources = args.resources or list(COUNT_SOURCES)
+    for resource, count in map_concurrently(lambda resource: get_count(jamf_url, resource, token), resources, args.workers):
+        writer.write({"resource": resource, "count": count})
+
+def run_groups(args, jamf_url, token, writer):
+    groups = KINDS[args.kind]["groups"](jamf_url, token)
+    if groups is None:
+        return 1
+    for group in groups["groups"]:
+        writer.write({"id": group["id"], "name": group["name"], "type": group["type"]})
+
+def run_members(args, jamf_url, token, writer):
+    for name, member_id in stream_group_members(jamf_url, token, args.kind, args.group):
+        writer.write({"group_id": args.group, "id": member_id, "name": name})
+
+def run_details(args, jamf_url, token, writer):
+    fetch_info, extract_info = KINDS[args.kind]["details"]
+
+    def fetch_details(record_id):
+        data = fetch_info(jamf_url, record_id, load_token() or token)
+        return extract_info(data) if data else None
+
+    failed = 0
+    for record_id, details in map_concurrently(fetch_details, iter_detail_ids(args, jamf_url, token), args.workers):
+        if details is None:
+            failed += 1
+            continue
+        writer.write(details)
+    if failed:
+        logging.error(f"Details of {failed} {args.kind} could not be fetched")
+        return 1
+
+# Function to flatten nested Jamf Pro API records into dotted columns for CSV ("general.name")
+def flatten_record(record, prefix=""):
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(flatten_record(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = json.dumps(value) if isinstance(value, list) else value
+    return flat
+
+def run_inventory(args, jamf_url, token, writer):
+    # Pages are requested as records are written, so --limit stops the download as well
+    records = iter_inventory(jamf_url, args.kind, sections=args.section, rsql_filter=args.filter, sort=args.sort,
+                             page_size=args.page_size, limit=args.limit)
+    for record in records:
+        writer.write(flatten_record(record) if args.format == "csv" else record)
+
+def run_dispatch(args, jamf_url, token, writer):
+    if not args.yes:
+        logging.error(f"Not sending {args.command_name}: add --yes to confirm")
+        return 1
+    params = dict(param.split("=", 1) for param in args.param)
+    progress = (lambda summary: writer.write(dict(summary, command=args.command_name))) if args.progress else None
+    try:
+        if args.group:
+            summary = dispatch_to_group(jamf_url, token, args.kind, args.group, args.command_name, params,
+                                        progress=progress, max_workers=args.workers, resume=args.resume)
+        else:
+            summary = dispatch_command(jamf_url, token, args.kind, args.command_name, iter_detail_ids(args, jamf_url, token),
+                                       params, progress=progress, max_workers=args.workers, resume=args.resume)
+    except UnfinishedDispatchError as e:
+        logging.error(f"{e}; add --resume to send the command only to the members it did not reach, or --new to start over")
+        return 1
+    writer.write(dict(summary, command=args.command_name))
+    return 1 if summary["failed"] or summary["unknown"] else 0
+
+def build_parser():
+    # Options shared by every command, accepted after the command name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--url", help="Jamf Pro URL (default: JAMF_PRO_URL from the environment or .env)")
+    common.add_argument("--format", choices=("jsonl", "csv"), default="jsonl", help="output format (default: jsonl)")
+    common.add_argument("--output", "-o", help="write to this file instead of standard output")
+    common.add_argument("--workers", type=int, default=int(os.getenv("JAMF_CLI_WORKERS", DEFAULT_CLI_WORKERS)),
+                        help=f"requests in flight at once (default: {DEFAULT_CLI_WORKERS})")
+    common.add_argument("--verbose", "-v", action="store_true", help="log debug output to standard error")
+    common.add_argument("--metrics", metavar="FILE", help="write request latency, size and parse time metrics to this JSON file")
+
+    parser = argparse.ArgumentParser(prog="jamfcommander", description="Headless Jamf Pro fleet queries.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    counts = commands.add_parser("counts", parents=[common], help="dashboard counts")
+    counts.add_argument("resources", nargs="*", help=f"resources to count: {', '.join(COUNT_SOURCES)} (default: all)")
+    counts.set_defaults(run=run_counts)
+
+    groups = commands.add_parser("groups", parents=[common], help="list computer or device groups")
+    groups.add_argument("kind", choices=list(KINDS))
+    groups.set_defaults(run=run_groups)
+
+    members = commands.add_parser("members", parents=[common], help="list the members of a group")
+    members.add_argument("kind", choices=list(KINDS))
+    members.add_argument("group", help="group id")
+    members.set_defaults(run=run_members)
+
+    details = commands.add_parser("details", parents=[common], help="fetch the details of many computers or devices concurrently")
+    details.add_argument("kind", choices=list(KINDS))
+    details.add_argument("--ids", help="comma-separated record ids")
+    details.add_argument("--ids-file", help="file with one record id per line ('-' for standard input)")
+    details.add_argument("--group", help="every member of this group id")
+    details.add_argument("--all", action="store_true", help="every record of the kind")
+    details.set_defaults(run=run_details)
+
+    inventory = commands.add_parser("inventory", parents=[common], help="page through the Jamf Pro API inventory, filtered and sorted by the server")
+    inventory.add_argument("kind", choices=list(KINDS))
+    inventory.add_argument("--section", action="append", default=[], type=str.upper, metavar="SECTION",
+                           help="inventory section to include, e.g. HARDWARE (repeatable; default: GENERAL)")
+    inventory.add_argument("--filter", help='RSQL filter, e.g. general.name=="MAC*";hardware.model=="MacBook Air*"')
+    inventory.add_argument("--sort", action="append", default=[], metavar="FIELD:DIRECTION", help="sort, e.g. general.name:asc (repeatable)")
+    inventory.add_argument("--page-size", type=int, help="records per request (default: JAMF_INVENTORY_PAGE_SIZE or 100)")
+    inventory.add_argument("--limit", type=int, help="stop after this many records")
+    inventory.set_defaults(run=run_inventory)
+
+    dispatch = commands.add_parser("dispatch", parents=[common], help="send an MDM command to a group or a list of records in batches")
+    dispatch.add_argument("kind", choices=list(KINDS))
+    dispatch.add_argument("command_name", metavar="command", help="Classic API command name, e.g. UpdateInventory")
+    dispatch.add_argument("--group", help="every member of this group id")
+    dispatch.add_argument("--ids", help="comma-separated record ids")
+    dispatch.add_argument("--ids-file", help="file with one record id per line ('-' for standard input)")
+    dispatch.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="command parameter (repeatable)")
+    dispatch.add_argument("--progress", action="store_true", help="write a progress record after every batch")
+    dispatch.add_argument("--yes", action="store_true", help="confirm sending the command")
+    rerun = dispatch.add_mutually_exclusive_group()
+    rerun.add_argument("--resume", action="store_true", default=None,
+                       help="if an earlier run of the same dispatch did not complete, skip the members it reached")
+    rerun.add_argument("--new", action="store_false", dest="resume", help="start a new dispatch even if an earlier run did not complete")
+    dispatch.set_defaults(run=run_dispatch, all=False)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "details" and not (args.ids or args.ids_file or args.group or args.all):
+        parser.error("details needs --ids, --ids-file, --group or --all")
+    if args.command == "dispatch":
+        if not (args.ids or args.ids_file or args.group):
+            parser.error("dispatch needs --group, --ids or --ids-file")
+        if any("=" not in param for param in args.param):
+            parser.error("--param takes NAME=VALUE")
+    if args.command == "inventory":
+        unknown = [section for section in args.section if section not in SECTIONS[args.kind]]
+        if unknown:
+            parser.error(f"unknown {args.kind} section: {', '.join(unknown)} (choose from {', '.join(SECTIONS[args.kind])})")
+    unknown = [resource for resource in getattr(args, "resources", []) if resource not in COUNT_SOURCES]
+    if unknown:
+        parser.error(f"unknown resource: {', '.join(unknown)}")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr, force=True)
+    load_env_variables()
+
+    jamf_url = (args.url or os.getenv("JAMF_PRO_URL", "")).rstrip("/")
+    if not jamf_url:
+        parser.error("no Jamf Pro URL given (use --url or set JAMF_PRO_URL)")
+    if not jamf_url.startswith("http://") and not jamf_url.startswith("https://"):
+        jamf_url = f"https://{jamf_url}"
+    # The token manager renews tokens against JAMF_PRO_URL
+    os.environ["JAMF_PRO_URL"] = jamf_url
+
+    token = load_token()
+    if not token:
+        logging.error("Authentication failed; check the credentials in .jcinf.json")
+        return 1
+
+    stream = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = RecordWriter(stream, args.format)
+        status = args.run(args, jamf_url, token, writer)
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); point stdout at devnull so the interpreter
+        # does not fail again flushing it at exit, and exit like a process killed by SIGPIPE
+        if not args.output:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 141
+    finally:
+        if args.output:
+            stream.close()
+        if args.metrics:
+            get_metrics().export(args.metrics)
+    logging.info(f"Wrote {writer.count} records")
+    return status or 0
@@ -0,0 +1,117 @@
+import json
+import logging
+import requests
+import xml.etree.ElementTree as ET
+from src.utils import load_token
+from src.session import get_session
+from src.cache import cached_get, cached_stream
+from src.xml_stream import read_size
+
+JSON = "application/json"
+XML = "application/xml"
+
+# Authenticated GET requests to the Classic API and the Jamf Pro API, through the shared
+# session and response cache
+# Bodies are requested as JSON, which every Classic API GET and the Jamf Pro API serve and which
+# parses several times faster than XML. XML is only asked for by stream(), whose readers parse a
+# body while it downloads and stop early (group members, listing sizes). Bodies are handed on as
+# the bytes that were received or read from the cache, without decoding them to str first.
+class JamfClient:
+    # token defaults to the current session token, looked up on every request so renewals are picked up
+    # ttl overrides the per-endpoint cache TTL of get(); 0 bypasses the response cache (bulk syncs,
+    # which must see the current data and would otherwise evict the entries the GUI relies on)
+    def __init__(self, jamf_url, token=None, ttl=None):
+        self.jamf_url = jamf_url.rstrip("/")
+        self.token = token
+        self.ttl = ttl
+
+    def url(self, endpoint):
+        return f"{self.jamf_url}/{endpoint}"
+
+    def headers(self, accept):
+        token = self.token or load_token()
+        if not token:
+            logging.error("No valid token available")
+            return None
+        return {"Authorization": f"Bearer {token}", "Accept": accept}
+
+    # Response to a GET request through the response cache, whatever its status, or None without a token
+    # Raises requests exceptions when no response arrives.
+    def response(self, endpoint, accept=JSON):
+        headers = self.headers(accept)
+        if headers is None:
+            return None
+        logging.debug(f"Requesting {endpoint} ({accept})")
+        return cached_get(self.url(endpoint), headers=headers, ttl=self.ttl)
+
+    # Body of a response as bytes, or None if the request failed
+    def get(self, endpoint, accept=JSON):
+        try:
+            response = self.response(endpoint, accept)
+            if response is None:
+                return None
+            response.raise_for_status()
+            return response.content
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error requesting {endpoint}: {e}")
+            return None
+
+    # Decoded JSON document of a response unless it still matches validators ({"etag", "last_modified"}
+    # of an earlier response), bypassing the response cache
+    # Returns (document, validators), with document None if the server answered 304 Not Modified,
+    # or None if the request failed.
+    def get_json_if_changed(self, endpoint, validators=None):
+        headers = self.headers(JSON)
+        if headers is None:
+            return None
+        validators = validators or {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            logging.debug(f"Requesting {endpoint} if changed")
+            response = get_session().get(self.url(endpoint), headers=headers)
+            if response.status_code == 304:
+                return None, validators
+            response.raise_for_status()
+            document = json.loads(response.content)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.error(f"Error requesting {endpoint}: {e}")
+            return None
+        return document, {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    # Decoded JSON document of a response, or None if the request failed
+    def get_json(self, endpoint):
+        body = self.get(endpoint)
+        if body is None:
+            return None
+        try:
+            # json.loads detects the encoding of bytes itself
+            return json.loads(body)
+        except ValueError as e:
+            logging.error(f"Error decoding JSON from {endpoint}: {e}")
+            return None
+
+    # Yield the body of a response in chunks of bytes as it downloads (XML by default, for the pull parsers)
+    # Closing the generator early closes the connection. revalidate checks a fresh cached body with the server.
+    def stream(self, endpoint, accept=XML, chunk_size=65536, revalidate=False):
+        headers = self.headers(accept)
+        if headers is None:
+            return
+        try:
+            logging.debug(f"Streaming {endpoint} ({accept})")
+            yield from cached_stream(self.url(endpoint), headers=headers, chunk_size=chunk_size, revalidate=revalidate)
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error streaming {endpoint}: {e}")
+
+    # The <size> of a Classic API listing, read without downloading the whole listing
+    def size(self, endpoint):
+        chunks = self.stream(endpoint)
+        try:
+            return read_size(chunks)
+        except ET.ParseError as e:
+            logging.error(f"Error parsing XML from {endpoint}: {e}")
+            return None
+        finally:
+            chunks.close()  # Stops the download once <size> has been read
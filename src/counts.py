@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import logging
+import requests
+from src.client import JamfClient
+from src.inventory import get_inventory_store
+
+# Max age in seconds of the local inventory store before its counts are no longer trusted
+# (override with JAMF_COUNT_STORE_MAX_AGE)
+DEFAULT_STORE_MAX_AGE = 900
+
+# Where each dashboard count can come from, cheapest first:
+#   inventory - record count in the local inventory store (no network)
+#   jamf_pro  - Jamf Pro API page of one record, reading totalCount
+#   classic   - Classic API listing, streamed only until its <size> element
+COUNT_SOURCES = {
+    "computers": {
+        "inventory": ("computers", "computers"),
+        "jamf_pro": "api/v1/computers-inventory?section=GENERAL&page-size=1",
+        "classic": "JSSResource/computers",
+    },
+    "mobile_devices": {
+        "inventory": ("devices", "mobile_devices"),
+        "jamf_pro": "api/v2/mobile-devices?page-size=1",
+        "classic": "JSSResource/mobiledevices",
+    },
+    "policies": {
+        "classic": "JSSResource/policies",
+    },
+    "computer_profiles": {
+        "classic": "JSSResource/osxconfigurationprofiles",
+    },
+    "mobile_profiles": {
+        "classic": "JSSResource/mobiledeviceconfigurationprofiles",
+    },
+}
+
+# Statuses meaning the server has no such endpoint (older Jamf Pro) or the account may not use it
+UNAVAILABLE_STATUSES = (403, 404)
+
+# Jamf Pro API endpoints the server cannot answer, skipped from then on
+# Other failures (network errors, 5xx, no token) only fall back to the next source for that call.
+_unavailable = set()
+
+# Function to count records in the local inventory store if it was synced recently
+def count_from_inventory(jamf_url, kind, resource):
+    max_age = int(os.getenv("JAMF_COUNT_STORE_MAX_AGE", DEFAULT_STORE_MAX_AGE))
+    store = get_inventory_store(jamf_url)
+    last_sync = store.last_sync(resource)
+    if not last_sync or time.time() - last_sync > max_age:
+        return None
+    return str(store.count(kind))
+
+# Function to read totalCount from a one-record page of a Jamf Pro API endpoint
+def count_from_jamf_pro(jamf_url, endpoint):
+    if (jamf_url, endpoint) in _unavailable:
+        return None
+    try:
+        response = JamfClient(jamf_url).response(endpoint)
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"Could not count from {endpoint}: {e}")
+        return None
+    if response is None:
+        return None
+    if response.status_code in UNAVAILABLE_STATUSES:
+        logging.info(f"{endpoint} answered {response.status_code}; counting from other sources from now on")
+        _unavailable.add((jamf_url, endpoint))
+        return None
+    if not response.ok:
+        logging.warning(f"Could not count from {endpoint}: HTTP {response.status_code}")
+        return None
+    try:
+        data = json.loads(response.content)
+    except ValueError as e:
+        logging.warning(f"Could not count from {endpoint}: {e}")
+        return None
+    if not isinstance(data, dict) or "totalCount" not in data:
+        # Answered, but not with a paged listing this version of the code understands
+        _unavailable.add((jamf_url, endpoint))
+        return None
+    return str(data["totalCount"])
+
+# Function to get a dashboard count from the cheapest source that can answer it
+def get_count(jamf_url, resource, token=None):
+    sources = COUNT_SOURCES[resource]
+    count = None
+    if "inventory" in sources:
+        count = count_from_inventory(jamf_url, *sources["inventory"])
+        source = "inventory"
+    if count is None and "jamf_pro" in sources:
+        count = count_from_jamf_pro(jamf_url, sources["jamf_pro"])
+        source = "jamf_pro"
+    if count is None and "classic" in sources:
+        count = JamfClient(jamf_url, token).size(sources["classic"])
+        source = "classic"
+    if count is not None:
+        logging.debug(f"Count for {resource} from {source}: {count}")
+    return count
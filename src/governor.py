@@ -0,0 +1,191 @@
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+from src.metrics import get_metrics
+
+# Defaults for the request governor (override with environment variables)
+DEFAULT_MAX_RPS = 20
+DEFAULT_MAX_IN_FLIGHT = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_LATENCY_TARGET = 2.0
+# (connect, read) timeout in seconds for requests sent without one, so a stalled server cannot hold a slot forever
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+# Longest Retry-After the governor is willing to wait for, in seconds
+MAX_RETRY_AFTER = 60
+# Minimum time between two concurrency cuts, so one burst of failures only halves the limit once
+DECREASE_INTERVAL = 1.0
+
+# Responses that mean the server is overloaded or briefly unavailable
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# Requests that are safe to send again
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD"])
+
+_governor = None
+_governor_lock = threading.Lock()
+
+# Function to read the delay asked for by a Retry-After header (seconds or HTTP date), or None
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+# Shared budget for every request sent to the Jamf Pro server
+# Requests are spaced to at most max_rps per second and at most `limit` are in flight at once.
+# The limit grows by about one per round trip while responses are quick and successful, and is
+# halved when the server answers 429/5xx, a request fails or latency exceeds the target (AIMD).
+# A Retry-After from the server pauses every new request until it has passed.
+class Governor:
+    def __init__(self, max_rps=None, max_in_flight=None, max_retries=None, backoff_factor=None, latency_target=None):
+        self.max_rps = float(os.getenv("JAMF_MAX_RPS", DEFAULT_MAX_RPS)) if max_rps is None else max_rps
+        self.max_in_flight = int(os.getenv("JAMF_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)) if max_in_flight is None else max_in_flight
+        self.max_retries = int(os.getenv("JAMF_MAX_RETRIES", DEFAULT_MAX_RETRIES)) if max_retries is None else max_retries
+        self.backoff_factor = float(os.getenv("JAMF_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF)) if backoff_factor is None else backoff_factor
+        self.latency_target = float(os.getenv("JAMF_LATENCY_TARGET", DEFAULT_LATENCY_TARGET)) if latency_target is None else latency_target
+
+        self.condition = threading.Condition()
+        self.limit = float(self.max_in_flight)
+        self.in_flight = 0
+        self.next_send = 0.0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.counters = {"requests": 0, "retries": 0, "throttled": 0, "errors": 0, "decreases": 0}
+
+    # Wait for the next send time, then for a free slot; every acquire() must be paired with release()
+    # The rate spacing is waited out before a slot is taken, so slots only count requests on the wire.
+    def acquire(self):
+        with self.condition:
+            now = time.monotonic()
+            send_at = max(now, self.next_send, self.paused_until)
+            if self.max_rps > 0:
+                self.next_send = send_at + 1 / self.max_rps
+        if send_at > now:
+            time.sleep(send_at - now)
+        with self.condition:
+            while True:
+                # A Retry-After may have paused requests while this one was waiting
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self.condition.wait(pause)
+                elif self.in_flight >= max(1, int(self.limit)):
+                    self.condition.wait()
+                else:
+                    break
+            self.in_flight += 1
+            self.counters["requests"] += 1
+
+    # Free the slot and adjust the concurrency limit from the outcome of the request
+    def release(self, latency=None, failed=False):
+        with self.condition:
+            self.in_flight -= 1
+            if failed or (latency is not None and latency > self.latency_target):
+                self._decrease()
+            else:
+                self.limit = min(self.max_in_flight, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    # Hold back every new request for the given number of seconds
+    def pause(self, seconds):
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.counters["throttled"] += 1
+
+    # Delay before retry number attempt (0-based): Retry-After if the server sent one, else full-jitter backoff
+    def retry_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER)
+        return random.uniform(0, self.backoff_factor * (2 ** attempt))
+
+    def record(self, counter):
+        with self.condition:
+            self.counters[counter] += 1
+
+    def stats(self):
+        with self.condition:
+            return dict(self.counters, limit=round(self.limit, 2), in_flight=self.in_flight)
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self.last_decrease < DECREASE_INTERVAL:
+            return
+        self.last_decrease = now
+        self.limit = max(1.0, self.limit / 2)
+        self.counters["decreases"] += 1
+        logging.debug(f"Request concurrency reduced to {int(self.limit)}")
+
+# Transport adapter that sends every request through a Governor
+# Idempotent requests answered with 429/5xx, or failing to connect, are retried with backoff.
+# For streamed responses the slot is released once the headers have arrived. Requests sent without
+# a timeout get the default (connect, read) timeout, so a stalled server fails and is retried.
+class GovernedAdapter(HTTPAdapter):
+    def __init__(self, governor, **kwargs):
+        self.governor = governor
+        self.timeout = (float(os.getenv("JAMF_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+                        float(os.getenv("JAMF_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)))
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        retryable = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self.governor.acquire()
+            start = time.monotonic()
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.governor.release(failed=True)
+                self.governor.record("errors")
+                if not retryable or attempt >= self.governor.max_retries:
+                    raise
+                delay = self.governor.retry_delay(attempt)
+                logging.debug(f"{request.method} {request.url} failed ({e}), retrying in {delay:.2f}s")
+            except Exception:
+                self.governor.release()
+                raise
+            else:
+                latency = time.monotonic() - start
+                overloaded = response.status_code in RETRY_STATUSES
+                self.governor.release(latency, failed=overloaded)
+                if not overloaded:
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    self.governor.pause(min(retry_after, MAX_RETRY_AFTER))
+                if not retryable or attempt >= self.governor.max_retries:
+                    return response
+                delay = self.governor.retry_delay(attempt, retry_after)
+                logging.debug(f"{request.method} {request.url} answered {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            self.governor.record("retries")
+            get_metrics().record(request.url, "retries")
+            time.sleep(delay)
+            attempt += 1
+
+# Function to get the process-wide governor shared by every session
+def get_governor():
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = Governor()
+    return _governor
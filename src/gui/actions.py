@@ -1,9 +1,21 @@
 import os
-import yaml
+import logging
+import threading
+from collections import defaultdict
 import tkinter as tk
-from tkinter import ttk
-
-def create_actions_section(tab, directory):
+from tkinter import ttk, messagebox
+from src.mdm_catalog import get_mdm_catalog, classic_mapping, classic_command
+from src.utils import load_token
+from src.gui.tasks import get_task_runner
+
+# Commands tabs created so far, as (tab, kind, loaded flag), refreshed when the repository is synced
+_sections = []
+# One lock per dispatch job, so a job run again only starts once the earlier run has stopped
+_dispatch_locks = defaultdict(threading.Lock)
+
+# kind limits the commands to those supported on computers or devices (see src/mdm_catalog.py);
+# Run sends the selected command to every member of the group selected in group_tree
+def create_actions_section(tab, kind=None, group_tree=None):
     # Create a notebook (tabbed layout) for Actions
     actions_notebook = ttk.Notebook(tab)
     actions_notebook.pack(expand=True, fill='both', pady=10)
@@ -11,24 +23,58 @@ def create_actions_section(tab, directory):
     # Create Commands tab for Actions
     tab_commands = ttk.Frame(actions_notebook)
     actions_notebook.add(tab_commands, text='Commands')
-
-    # Load YAML files and create dynamic form
-    load_yaml_and_create_form(tab_commands, directory)
-
-def load_yaml_and_create_form(tab, directory):
+    tab_commands.group_tree = group_tree
+
+    # Load the command catalog the first time the section is shown
+    loaded = [False]
+    def on_failed(error):
+        loaded[0] = False
+        for widget in tab_commands.winfo_children():
+            widget.destroy()
+        tk.Label(tab_commands, text="No commands available", font=("Arial", 12)).grid(row=0, column=0, padx=10, pady=5)
+
+    def on_map(event):
+        if loaded[0]:
+            return
+        loaded[0] = True
+        tk.Label(tab_commands, text="Loading commands...", font=("Arial", 12)).grid(row=0, column=0, padx=10, pady=5)
+        get_task_runner().submit(
+            f"mdm_catalog_{kind}", get_mdm_catalog,
+            on_done=lambda catalog: load_commands_and_create_form(tab_commands, catalog, kind, loaded),
+            on_error=on_failed,
+            description="MDM commands"
+        )
+    tab_commands.bind("<Map>", on_map, add="+")
+    _sections.append((tab_commands, kind, loaded))
+    return tab_commands
+
+# Function to rebuild the Commands tabs already shown from a freshly synced catalog
+def refresh_actions_sections(catalog):
+    for tab_commands, kind, loaded in _sections:
+        if getattr(tab_commands, "catalog", None) is catalog:
+            continue
+        if loaded[0] or tab_commands.winfo_ismapped():
+            loaded[0] = True
+            load_commands_and_create_form(tab_commands, catalog, kind, loaded)
+
+def load_commands_and_create_form(tab, catalog, kind=None, loaded=None):
     for widget in tab.winfo_children():
         widget.destroy()
 
+    tab.catalog = catalog
     row = 0
-    command_files = [f for f in os.listdir(directory) if f.endswith(".yaml")]
-    if not command_files:
+    commands = catalog.commands_for(kind)
+    if not commands:
         tk.Label(tab, text="No commands available", font=("Arial", 12)).grid(row=row, column=0, padx=10, pady=5)
+        if loaded is not None:
+            loaded[0] = False  # Look again once the command repository has been synced
         return
 
     # Dropdown for command selection
+    titles = {command["title"]: command for command in commands}
     tk.Label(tab, text="Select Command:", font=("Arial", 12)).grid(row=row, column=0, sticky="w", padx=10, pady=5)
     command_var = tk.StringVar()
-    command_dropdown = ttk.Combobox(tab, textvariable=command_var, values=command_files, state="readonly")
+    command_dropdown = ttk.Combobox(tab, textvariable=command_var, values=list(titles), state="readonly")
     command_dropdown.grid(row=row, column=1, padx=10, pady=5, sticky="w")
 
     # Run button
@@ -42,33 +88,114 @@ def load_yaml_and_create_form(tab, directory):
     form_frame.grid(row=row, column=0, columnspan=3, padx=10, pady=5, sticky="nsew")
     row += 1
 
+    # Progress of the last command sent from this section
+    progress_label = tk.Label(tab, text="", font=("Arial", 10))
+    progress_label.grid(row=row, column=0, columnspan=3, sticky="w", padx=10, pady=5)
+
+    fields = {}
     def on_command_select(event):
         selected_command = command_var.get()
         if selected_command:
-            create_dynamic_form(form_frame, os.path.join(directory, selected_command))
+            fields.clear()
+            fields.update(create_dynamic_form(form_frame, titles[selected_command], kind))
+            # Only commands with a Classic API equivalent can be sent (see CLASSIC_COMMANDS)
+            run_button.config(state="normal" if classic_mapping(titles[selected_command], kind) else "disabled")
 
     command_dropdown.bind("<<ComboboxSelected>>", on_command_select)
+    run_button.config(command=lambda: run_command(titles.get(command_var.get()), fields, kind, getattr(tab, "group_tree", None), progress_label))
 
-def create_dynamic_form(frame, yaml_file):
+# Function to send the selected command to every member of the selected group, after confirmation
+def run_command(command, fields, kind, group_tree, progress_label):
+    if command is None:
+        messagebox.showinfo("Send MDM command", "Select a command first.")
+        return
+    group = group_tree.selected_row() if group_tree is not None else None
+    if not group:
+        messagebox.showinfo("Send MDM command", "Select a group to send the command to.")
+        return
+    group_name, group_id = group[0], group[2]
+    values = {key: entry.get().strip() for key, entry in fields.items() if entry.get().strip()}
+    try:
+        request_type, params = classic_command(command, kind, values)
+    except ValueError as e:
+        messagebox.showinfo("Send MDM command", str(e))
+        return
+    from src.mdm_dispatch import dispatch_to_group, incomplete_dispatch_log
+    jamf_url = os.getenv("JAMF_PRO_URL", "")
+    # An earlier run of the same job that did not complete (stopped, superseded or still running) can be
+    # resumed, so members it reached are not sent the command twice, or left behind for a new job
+    if incomplete_dispatch_log(jamf_url, kind, request_type, params, f"group:{group_id}"):
+        resume = messagebox.askyesnocancel(
+            "Send MDM command",
+            f"An earlier run of \"{command['title']}\" to {group_name} did not complete.\n\n"
+            "Yes: resume it and only send the command to the members it did not reach.\n"
+            "No: start a new run and send the command to every member again."
+        )
+        if resume is None:
+            return
+    else:
+        resume = False
+        if not messagebox.askyesno("Send MDM command", f"Send \"{command['title']}\" to every member of {group_name}?"):
+            return
+
+    task_key = f"dispatch_{kind}_{request_type}_{group_id}"
+    def send(report):
+        token = load_token()
+        if not token or not jamf_url:
+            raise RuntimeError("Not logged in")
+        # The superseded run stops once its batches in flight have answered; waiting for it means the
+        # progress log holds their outcome before this run decides whom to send the command to
+        with _dispatch_locks[task_key]:
+            return dispatch_to_group(jamf_url, token, kind, group_id, request_type, params, progress=report, resume=resume)
+
+    def on_progress(summary):
+        progress_label.config(text=f"{command['title']}: {summary['sent']} of {summary['total'] - summary['skipped']} sent, "
+                                   f"{summary['failed']} failed, {summary['unknown']} unknown, {summary['skipped']} skipped")
+
+    def on_done(summary):
+        on_progress(summary)
+        logging.info(f"Dispatch log: {summary['log']}")
+
+    def on_failed(error):
+        progress_label.config(text=f"{command['title']}: failed ({error})")
+
+    progress_label.config(text=f"{command['title']}: sending to {group_name}...")
+    # Running the same command on the same group again supersedes the earlier run
+    get_task_runner().submit(
+        task_key, send,
+        on_progress=on_progress, on_done=on_done, on_error=on_failed, description=f"{command['title']} to {group_name}"
+    )
+
+# Build the form of a command from its catalog entry and return its entries by payload key
+# Only payload keys the Classic API takes as parameters get a field.
+def create_dynamic_form(frame, command, kind=None):
     for widget in frame.winfo_children():
         widget.destroy()
 
-    with open(yaml_file, 'r') as file:
-        command_data = yaml.safe_load(file)
-
     row = 0
-    for key, value in command_data.items():
-        if key not in ['title', 'description', 'payload', 'payloadkeys']:
-            tk.Label(frame, text=f"{key}:", font=("Arial", 12)).grid(row=row, column=0, sticky="w", padx=10, pady=5)
-            tk.Entry(frame, width=50).grid(row=row, column=1, padx=10, pady=5)
-            row += 1
+    fields = {}
+    mapping = classic_mapping(command, kind)
+    if mapping is None:
+        tk.Label(frame, text="This command cannot be sent through the Classic API.", font=("Arial", 10, "italic")).grid(row=row, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+        row += 1
+    for payload_key in command["payload_keys"]:
+        key = payload_key.get("key") if isinstance(payload_key, dict) else None
+        if not key or key == "RequestType" or mapping is None or key not in mapping[1]:
+            continue
+        label = f"{key} (required):" if payload_key.get("presence") == "required" else f"{key}:"
+        tk.Label(frame, text=label, font=("Arial", 12)).grid(row=row, column=0, sticky="w", padx=10, pady=5)
+        fields[key] = tk.Entry(frame, width=50)
+        fields[key].grid(row=row, column=1, padx=10, pady=5)
+        row += 1
 
     # Display command description
-    if 'description' in command_data:
-        tk.Label(frame, text=command_data['description'], font=("Arial", 10, "italic")).grid(row=row, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+    if command["description"]:
+        tk.Label(frame, text=command["description"], font=("Arial", 10, "italic")).grid(row=row, column=0, columnspan=2, sticky="w", padx=10, pady=5)
         row += 1
 
     # Display supported OSs
-    if 'payload' in command_data and 'supportedOS' in command_data['payload']:
-        supported_os_text = "Supported OSs: " + ", ".join([f"{os}: {details['introduced']}" for os, details in command_data['payload']['supportedOS'].items()])
-        tk.Label(frame, text=supported_os_text, font=("Arial", 10, "italic")).grid(row=row, column=0, columnspan=2, sticky="w", padx=10, pady=5)
\ No newline at end of file
+    if command["supported_os"]:
+        supported_os_text = "Supported OSs: " + ", ".join([f"{os}: {details['introduced']}" for os, details in command["supported_os"].items() if isinstance(details, dict) and 'introduced' in details])
+        tk.Label(frame, text=supported_os_text, font=("Arial", 10, "italic")).grid(row=row, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+
+    return fields
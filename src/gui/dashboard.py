@@ -0,0 +1,53 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of dashboard requests in flight at once (override with JAMF_DASHBOARD_WORKERS)
+DEFAULT_DASHBOARD_WORKERS = 6
+
+_executor = None
+
+# Function to get the bounded worker pool used for dashboard requests
+def get_dashboard_executor():
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv("JAMF_DASHBOARD_WORKERS", DEFAULT_DASHBOARD_WORKERS))
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard")
+    return _executor
+
+# Function to run the dashboard fetches concurrently and apply each result as soon as it arrives
+# Each job maps a name to a (fetch, apply) pair: fetch runs on a worker thread, apply runs on the Tk thread.
+# on_complete(elapsed) is called on the Tk thread once every job has been applied.
+def load_dashboard(jobs, runner, on_complete=None):
+    generation = runner.begin("dashboard")
+    start = time.perf_counter()
+    remaining = [len(jobs)]
+
+    def apply_result(name, result):
+        # Drop results from a refresh that has since been restarted
+        if not runner.is_current("dashboard", generation):
+            return
+        jobs[name][1](result)
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            elapsed = time.perf_counter() - start
+            logging.info(f"Dashboard refreshed in {elapsed:.2f}s ({len(jobs)} requests)")
+            if on_complete:
+                on_complete(elapsed)
+
+    def fetch_result(name, fetch):
+        try:
+            result = fetch()
+        except Exception as e:
+            logging.error(f"Error loading dashboard item {name}: {e}")
+            result = None
+        runner.call_soon(apply_result, name, result)
+
+    executor = get_dashboard_executor()
+    for name, (fetch, apply) in jobs.items():
+        executor.submit(fetch_result, name, fetch)
+
+# Function to show a count in a dashboard label
+def show_count(label, size):
+    label.config(text=size if size else "N/A")
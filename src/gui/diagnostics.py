@@ -0,0 +1,100 @@
+import logging
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from src.metrics import get_metrics
+
+# Refresh interval of the Diagnostics tab while it is shown
+REFRESH_MS = 2000
+
+ENDPOINT_COLUMNS = (
+    ("endpoint", "Endpoint", 360),
+    ("requests", "Requests", 70),
+    ("errors", "Errors", 60),
+    ("retries", "Retries", 60),
+    ("cache_hits", "Cache hits", 75),
+    ("p50_ms", "p50 ms", 65),
+    ("p95_ms", "p95 ms", 65),
+    ("max_ms", "Max ms", 65),
+    ("bytes", "KB", 75),
+)
+
+# Function to format a byte count in kilobytes for the endpoint table
+def format_kilobytes(size):
+    return f"{size / 1024:,.1f}"
+
+# Function to build the Diagnostics tab: per-endpoint request metrics, parse times, and the
+# governor and cache counters, refreshed every REFRESH_MS while the tab is shown and exportable as JSON
+def create_diagnostics_section(tab):
+    summary_label = tk.Label(tab, text="", font=("Arial", 11), justify="left", anchor="w")
+    summary_label.pack(fill="x", padx=10, pady=(10, 5))
+
+    endpoints_frame = ttk.LabelFrame(tab, text="Requests by endpoint")
+    endpoints_frame.pack(fill="both", expand=True, padx=10, pady=5)
+    endpoints_tree = ttk.Treeview(endpoints_frame, columns=[column for column, _, _ in ENDPOINT_COLUMNS], show="headings")
+    for column, heading, width in ENDPOINT_COLUMNS:
+        endpoints_tree.heading(column, text=heading)
+        endpoints_tree.column(column, width=width, anchor="w" if column == "endpoint" else "e", stretch=column == "endpoint")
+    endpoints_tree.pack(fill="both", expand=True)
+
+    parsing_frame = ttk.LabelFrame(tab, text="Parsing")
+    parsing_frame.pack(fill="x", padx=10, pady=5)
+    parsing_tree = ttk.Treeview(parsing_frame, columns=("parser", "records", "mean_ms", "max_ms", "total_ms"), show="headings", height=4)
+    for column, heading in (("parser", "Parser"), ("records", "Records"), ("mean_ms", "Mean ms"), ("max_ms", "Max ms"), ("total_ms", "Total ms")):
+        parsing_tree.heading(column, text=heading)
+        parsing_tree.column(column, anchor="w" if column == "parser" else "e", stretch=column == "parser")
+    parsing_tree.pack(fill="x")
+
+    buttons_frame = tk.Frame(tab)
+    buttons_frame.pack(fill="x", padx=10, pady=(5, 10))
+
+    refresh_job = [None]
+    def refresh():
+        if refresh_job[0] is not None:
+            tab.after_cancel(refresh_job[0])
+            refresh_job[0] = None
+        snapshot = get_metrics().snapshot()
+        governor = snapshot["governor"]
+        cache = snapshot["cache"]
+        summary_label.config(text=(
+            f"Requests: {governor['requests']}   Retries: {governor['retries']}   Throttled: {governor['throttled']}   "
+            f"Errors: {governor['errors']}   Concurrency limit: {governor['limit']} ({governor['in_flight']} in flight)\n"
+            f"Response cache: {cache['hits']} hits, {cache['misses']} misses, {cache['revalidated']} revalidated, "
+            f"{cache['evictions']} evictions   Uptime: {snapshot['uptime']:.0f}s"
+        ))
+
+        endpoints_tree.delete(*endpoints_tree.get_children())
+        for name, stats in snapshot["endpoints"].items():
+            values = [name] + [stats[column] if stats[column] is not None else "" for column, _, _ in ENDPOINT_COLUMNS[1:-1]]
+            endpoints_tree.insert("", "end", values=values + [format_kilobytes(stats["bytes"])])
+
+        parsing_tree.delete(*parsing_tree.get_children())
+        for name, stats in snapshot["parsing"].items():
+            parsing_tree.insert("", "end", values=(name, stats["records"], stats["mean_ms"], stats["max_ms"], stats["total_ms"]))
+
+        if tab.winfo_ismapped():
+            refresh_job[0] = tab.after(REFRESH_MS, refresh)
+
+    def on_map(event):
+        if refresh_job[0] is None:
+            refresh()
+
+    def export():
+        path = filedialog.asksaveasfilename(title="Export diagnostics", defaultextension=".json",
+                                            initialfile="jamfcommander-diagnostics.json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            get_metrics().export(path)
+        except OSError as e:
+            logging.error(f"Error exporting diagnostics: {e}")
+            messagebox.showerror("Export diagnostics", f"Could not write {path}: {e}")
+
+    def reset():
+        get_metrics().reset()
+        refresh()
+
+    tk.Button(buttons_frame, text="Refresh", command=refresh).pack(side="left")
+    tk.Button(buttons_frame, text="Reset", command=reset).pack(side="left", padx=5)
+    tk.Button(buttons_frame, text="Export JSON...", command=export).pack(side="left")
+
+    tab.bind("<Map>", on_map)
@@ -1,132 +1,191 @@
 import logging
 import os
 import tkinter as tk
-from src.gui.data_fetching import fetch_computer_info, fetch_mobile_device_info, fetch_computer_groups, fetch_mobile_device_groups
-from src.utils import save_url_to_env, load_token, make_classic_api_request
+from functools import partial
+from src.utils import save_url_to_env
 from src.auth import authenticate
-from src.api import parse_computer_info, parse_mobile_device_info
-from src.gui.tree_views import fetch_and_display_group_members  # Correct import
+from src.api import fetch_computer_groups, fetch_mobile_device_groups, format_info
+from src.gui.tree_views import fetch_and_display_group_members, group_rows, refresh_group_markers
+from src.gui.tasks import get_task_runner
+from src.gui.actions import refresh_actions_sections
+from src.inventory import sync_inventory, sync_due, get_inventory_store
+from src.search_index import index_groups, refresh_search_indexes
+from src.prefetch import get_prefetcher, rows_to_prefetch
+
+# Delay after a member list last scrolled or changed before the rows around it are prefetched
+PREFETCH_DELAY_MS = 150
 
 # Function to handle authentication and update the GUI accordingly
 def authenticate_callback(jamf_url, status_label, update_dashboard, clone_or_update_repo, tree_computers, tree_devices, smart_computer_groups_value, static_computer_groups_value, smart_mobile_groups_value, static_mobile_groups_value):
-    global global_jamf_url
-
     # Ensure the URL has a scheme (https://)
     if not jamf_url.startswith("http://") and not jamf_url.startswith("https://"):
         jamf_url = f"https://{jamf_url}"
 
     logging.debug(f"Attempting to authenticate with URL: {jamf_url}")
 
-    token = authenticate(jamf_url, status_label)  # Pass only jamf_url and status_label
-    if token:
+    # Continue on the Tk thread once the token request has finished
+    def on_authenticated(token):
+        global global_jamf_url
+
+        if not token:
+            status_label.config(text="AUTH FAILED", fg="red")
+            return
+
         status_label.config(text="AUTHENTICATED", fg="green")
         global_jamf_url = jamf_url  # Save the authenticated URL globally for future API calls
         save_url_to_env(jamf_url)   # Save the URL to .env after successful login
-        update_dashboard(token)  # Call this function to update the dashboard after successful authentication
-
-        # Clone or update the GitHub repository
-        clone_or_update_repo()
-
-        # Fetch computer groups
-        computer_groups = fetch_computer_groups(global_jamf_url, token)
-        if computer_groups:
-            for group in computer_groups['groups']:
-                tree_computers.insert("", "end", values=(group['name'], group['type'], group['id']))
-            smart_computer_groups_value.config(text=f"{computer_groups['smart_count']}")
-            static_computer_groups_value.config(text=f"{computer_groups['static_count']}")
-        else:
-            smart_computer_groups_value.config(text="N/A")
-            static_computer_groups_value.config(text="N/A")
-
-        # Fetch mobile device groups
-        mobile_groups = fetch_mobile_device_groups(global_jamf_url, token)
-        if mobile_groups:
-            for group in mobile_groups['groups']:
-                tree_devices.insert("", "end", values=(group['name'], group['type'], group['id']))
-            smart_mobile_groups_value.config(text=f"{mobile_groups['smart_count']}")
-            static_mobile_groups_value.config(text=f"{mobile_groups['static_count']}")
-        else:
-            smart_mobile_groups_value.config(text="N/A")
-            static_mobile_groups_value.config(text="N/A")
-    else:
+        # Fetch the dashboard counts and both group listings in one concurrent batch
+        group_jobs = {
+            "computer_groups": (
+                partial(fetch_computer_groups, global_jamf_url, token),
+                lambda groups: display_groups(groups, tree_computers, smart_computer_groups_value, static_computer_groups_value, "computers")
+            ),
+            "mobile_device_groups": (
+                partial(fetch_mobile_device_groups, global_jamf_url, token),
+                lambda groups: display_groups(groups, tree_devices, smart_mobile_groups_value, static_mobile_groups_value, "devices")
+            ),
+        }
+        update_dashboard(global_jamf_url, token, group_jobs)
+
+        # Clone or update the GitHub repository in the background, then refresh the Actions sections
+        get_task_runner().submit("repo_sync", clone_or_update_repo, on_done=refresh_actions_sections, description="MDM command repository")
+
+        # Bring the local inventory store up to date in the background, unless it was synced recently
+        # (a first sync requests the details of every computer; see "Inventory Sync" in the readme)
+        if os.getenv("JAMF_INVENTORY_SYNC", "1") != "0":
+            # The sync records the members of every group, so the changed markers are refreshed afterwards
+            get_task_runner().submit(
+                "inventory_sync", sync_inventory_and_index, global_jamf_url,
+                on_done=lambda summary: (refresh_group_markers(tree_computers, "computers"), refresh_group_markers(tree_devices, "devices")),
+                description="inventory sync"
+            )
+
+    def on_failed(error):
+        logging.error(f"Authentication error: {error}")
         status_label.config(text="AUTH FAILED", fg="red")
 
+    status_label.config(text="AUTHENTICATING...", fg="orange")
+    get_task_runner().submit("authenticate", authenticate, jamf_url, on_done=on_authenticated, on_error=on_failed, description="authentication")
+
+# Function to sync the inventory store if it is due and update the search indexes with the changed records
+# Returns the sync summary, or None when the store was synced within JAMF_INVENTORY_SYNC_INTERVAL
+def sync_inventory_and_index(jamf_url):
+    store = get_inventory_store(jamf_url)
+    summary = None
+    if sync_due(store):
+        summary = sync_inventory(jamf_url, store)
+    else:
+        logging.info("Inventory synced recently; skipping the sync after login")
+    refresh_search_indexes(jamf_url)
+    return summary
+
+# Function to list fetched groups in a tree view and show the smart/static counts
+def display_groups(groups, tree_view, smart_value, static_value, kind):
+    if groups:
+        index_groups(kind, groups['groups'])
+        # Logging in again updates the listed groups in place rather than starting the list over
+        tree_view.reconcile_rows(group_rows(kind, groups['groups']), key_column=2)
+        smart_value.config(text=f"{groups['smart_count']}")
+        static_value.config(text=f"{groups['static_count']}")
+    else:
+        smart_value.config(text="N/A")
+        static_value.config(text="N/A")
+
 # Function to handle computer group click event
 def on_computer_group_click(event, tree_computers, tree_computer_members):
-    selected_item = tree_computers.selection()[0]
-    group_id = tree_computers.item(selected_item, "values")[2]  # Assuming the group ID is in the third column
-    fetch_and_display_group_members(group_id, "computers", tree_computer_members)
+    selection = tree_computers.selection()
+    if not selection:
+        return
+    group_id = tree_computers.item(selection[0], "values")[2]  # Assuming the group ID is in the third column
+    fetch_and_display_group_members(group_id, "computers", tree_computer_members, tree_computers)
 
 # Function to handle device group click event
 def on_device_group_click(event, tree_devices, tree_device_members):
-    selected_item = tree_devices.selection()[0]
-    group_id = tree_devices.item(selected_item, "values")[2]  # Assuming the group ID is in the third column
-    fetch_and_display_group_members(group_id, "devices", tree_device_members)
-
-# Function to handle computer member click event
-def on_computer_member_click(event, tree_computer_members, general_info_text_computers):
-    selected_item = tree_computer_members.selection()[0]
-    member_id = tree_computer_members.item(selected_item, "values")[1]  # Assuming the member ID is in the second column
-    token = load_token()
-    if not token:
-        logging.error("No token found!")
+    selection = tree_devices.selection()
+    if not selection:
         return
-
-    jamf_url = os.getenv("JAMF_PRO_URL", "")
-    if not jamf_url:
-        logging.error("No Jamf URL found!")
+    group_id = tree_devices.item(selection[0], "values")[2]  # Assuming the group ID is in the third column
+    fetch_and_display_group_members(group_id, "devices", tree_device_members, tree_devices)
+
+# Function to handle computer member selection (mouse click or arrow keys)
+def on_computer_member_click(event, tree_computer_members, detail_tabs_computers):
+    show_member_details("computers", tree_computer_members, detail_tabs_computers, "computer_member", "computer details")
+
+# Function to handle device member selection (mouse click or arrow keys)
+def on_device_member_click(event, tree_device_members, detail_tabs_devices):
+    show_member_details("devices", tree_device_members, detail_tabs_devices, "device_member", "device details")
+
+# Function to show the details of the selected member, straight from the prefetch cache when possible
+# The general fields fill the first tab; the section tabs load their own subset when opened.
+def show_member_details(kind, tree_members, detail_tabs, task_key, description):
+    row = tree_members.selected_row()
+    if not row:
         return
-
-    general_info = fetch_computer_info(jamf_url, member_id, token)
-    if general_info:
-        formatted_info = parse_computer_info(general_info)
-        display_general_info(formatted_info, general_info_text_computers)
-
-# Function to handle device member click event
-def on_device_member_click(event, tree_device_members, general_info_text_devices):
-    selected_item = tree_device_members.selection()[0]
-    member_id = tree_device_members.item(selected_item, "values")[1]  # Assuming the member ID is in the second column
-    token = load_token()
-    if not token:
-        logging.error("No token found!")
+    member_id = row[1]  # The member ID is in the second column
+    # Scrolling re-selects the row on screen; the member shown already needs no reload
+    if member_id == getattr(tree_members, "shown_member", None):
+        return
+    tree_members.shown_member = member_id
+    detail_tabs.show_member(member_id)
+    text_widget = detail_tabs.general_text
+    prefetcher = get_prefetcher()
+    info = prefetcher.cached(kind, member_id)
+    if info is not None:
+        get_task_runner().cancel(task_key)
+        display_general_info(format_info(info), text_widget)
         return
 
-    jamf_url = os.getenv("JAMF_PRO_URL", "")
-    if not jamf_url:
-        logging.error("No Jamf URL found!")
+    def on_loaded(info):
+        if info:
+            display_general_info(format_info(info), text_widget)
+        else:
+            tree_members.shown_member = None  # Let a later click retry
+
+    def on_failed(error):
+        logging.error(f"Error loading {description}: {error}")
+        tree_members.shown_member = None
+
+    get_task_runner().submit(task_key, prefetcher.get_details, kind, member_id, on_done=on_loaded, on_error=on_failed, description=description, indicator=text_widget)
+
+# Function to build the load_section callback of the detail tabs of a member kind
+def detail_section_loader(kind):
+    def load_section(title, member_id, on_loaded, on_failed):
+        prefetcher = get_prefetcher()
+        text = prefetcher.cached_section(kind, member_id, title)
+        if text is not None:
+            on_loaded(text)
+            return
+
+        def on_error(error):
+            logging.error(f"Error loading {title} of {kind} {member_id}: {error}")
+            on_failed(error)
+
+        # One task key per tab, so moving to another member supersedes the same tab only
+        get_task_runner().submit(
+            f"{kind}_section_{title}", prefetcher.get_section, kind, member_id, title,
+            on_done=on_loaded, on_error=on_error, description=title.lower()
+        )
+    return load_section
+
+# Function to prefetch member details around the visible rows whenever a member list settles
+def bind_member_prefetch(tree_members, kind):
+    if os.getenv("JAMF_PREFETCH", "1") == "0":
         return
+    prefetch_job = [None]
+
+    def prefetch_visible():
+        prefetch_job[0] = None
+        get_prefetcher().prefetch(kind, rows_to_prefetch(tree_members.rows, tree_members.offset, tree_members.visible))
+
+    def schedule_prefetch(event=None):
+        if prefetch_job[0] is not None:
+            tree_members.after_cancel(prefetch_job[0])
+        prefetch_job[0] = tree_members.after(PREFETCH_DELAY_MS, prefetch_visible)
 
-    general_info = fetch_mobile_device_info(jamf_url, member_id, token)
-    if general_info:
-        formatted_info = parse_mobile_device_info(general_info)
-        display_general_info(formatted_info, general_info_text_devices)
+    tree_members.bind("<<ViewChanged>>", schedule_prefetch, add="+")
 
 # Function to display general information in the text widget
 def display_general_info(info, text_widget):
     text_widget.delete("1.0", tk.END)
     text_widget.insert(tk.END, info)
 
-# Function to fetch general information for computers or devices
-def fetch_general_info(member_id, member_type):
-    token = load_token()
-    if not token:
-        logging.error("No token found!")
-        return "No token found!"
-
-    jamf_url = os.getenv("JAMF_PRO_URL", "")
-    if not jamf_url:
-        logging.error("No Jamf URL found!")
-        return "No Jamf URL found!"
-
-    if member_type == "computers":
-        endpoint = f"JSSResource/computers/id/{member_id}"
-        response = make_classic_api_request(jamf_url, endpoint, token)
-        if response:
-            return parse_computer_info(response)
-    elif member_type == "devices":
-        endpoint = f"JSSResource/mobiledevices/id/{member_id}"
-        response = make_classic_api_request(jamf_url, endpoint, token)
-        if response:
-            return parse_mobile_device_info(response)
-
-    return "No information found."
\ No newline at end of file
@@ -10,4 +10,54 @@ def create_general_info_frame(parent, title):
 
 def display_general_info(info, text_widget):
     text_widget.delete("1.0", tk.END)
-    text_widget.insert(tk.END, info)
\ No newline at end of file
+    text_widget.insert(tk.END, info)
+
+# Notebook with a member's general information and one tab per detail section
+# Section tabs are only filled when they are opened: show_member() marks them all stale, and
+# the visible one is loaded through load_section(title, member_id, on_loaded, on_failed).
+class DetailTabs(ttk.Notebook):
+    def __init__(self, master, titles, load_section):
+        super().__init__(master)
+        self.general_text = self._add_tab("General")
+        self.section_texts = {title: self._add_tab(title) for title in titles}
+        self.load_section = load_section
+        self.member_id = None
+        self.loaded = set()
+        self.bind("<<NotebookTabChanged>>", lambda event: self._load_current())
+
+    # Switch the section tabs to another member and load the one on screen
+    def show_member(self, member_id):
+        self.member_id = member_id
+        self.loaded = set()
+        for text_widget in self.section_texts.values():
+            display_general_info("", text_widget)
+        self._load_current()
+
+    def _add_tab(self, title):
+        frame = ttk.Frame(self)
+        text_widget = tk.Text(frame, wrap="word", height=10)
+        text_widget.pack(fill="both", expand=True)
+        self.add(frame, text=title)
+        return text_widget
+
+    def _load_current(self):
+        title = self.tab(self.select(), "text")
+        if self.member_id is None or title not in self.section_texts or title in self.loaded:
+            return
+        self.loaded.add(title)
+        member_id = self.member_id
+        text_widget = self.section_texts[title]
+        display_general_info("Loading...", text_widget)
+
+        def on_loaded(content):
+            if member_id != self.member_id:
+                return
+            if content is None:
+                self.loaded.discard(title)  # Retry the next time the tab is opened
+                content = "No information found."
+            display_general_info(content, text_widget)
+
+        def on_failed(error):
+            on_loaded(None)
+
+        self.load_section(title, member_id, on_loaded, on_failed)
@@ -3,12 +3,19 @@ from tkinter import ttk
 import logging
 import os
 from src.utils import load_token
+from src.session import prewarm_connection
 from src.gui.actions import create_actions_section
+from src.gui.diagnostics import create_diagnostics_section
 from src.gui.filter import create_filter_section
 from src.gui.search import search_callback
 from src.gui.tree_views import fetch_and_display_group_members, update_tree_view
-from src.gui.event_handlers import authenticate_callback, on_computer_group_click, on_device_group_click, on_computer_member_click, on_device_member_click
-from src.gui.general_info import display_general_info
+from src.gui.event_handlers import authenticate_callback, on_computer_group_click, on_device_group_click, on_computer_member_click, on_device_member_click, bind_member_prefetch, detail_section_loader
+from src.gui.general_info import display_general_info, DetailTabs
+from src.api import DETAIL_SECTIONS
+from src.gui.virtual_tree import VirtualTreeview
+
+# Delay after the last keystroke in the URL field before pre-warming the connection
+PREWARM_DELAY_MS = 600
 
 def setup_gui(root, authenticate_callback):
     root.title("Jamf Commander")
@@ -23,6 +30,15 @@ def setup_gui(root, authenticate_callback):
     entry_url = tk.Entry(top_frame, width=50)
     entry_url.grid(row=0, column=1, padx=5)
 
+    # Pre-warm the connection to the server while the URL is still being typed
+    prewarm_job = [None]
+    def schedule_prewarm(event=None):
+        if prewarm_job[0] is not None:
+            root.after_cancel(prewarm_job[0])
+        prewarm_job[0] = root.after(PREWARM_DELAY_MS, lambda: prewarm_connection(entry_url.get()))
+    entry_url.bind("<KeyRelease>", schedule_prewarm)
+    entry_url.bind("<FocusOut>", schedule_prewarm)
+
     # Login Button
     tk.Button(top_frame, text="Login", command=lambda: authenticate_callback(entry_url.get())).grid(row=0, column=2, padx=5)
 
@@ -30,6 +46,10 @@ def setup_gui(root, authenticate_callback):
     status_label = tk.Label(top_frame, text="NOT AUTHENTICATED", fg="red", font=("Arial", 12, "bold"))
     status_label.grid(row=0, column=3, padx=5)
 
+    # Status bar along the bottom of the window
+    status_bar = tk.Label(root, text="", anchor="w", relief="sunken", font=("Arial", 10))
+    status_bar.pack(side="bottom", fill="x")
+
     # Create a notebook (tabbed layout)
     notebook = ttk.Notebook(root)
     notebook.pack(expand=True, fill='both', pady=20)
@@ -41,10 +61,13 @@ def setup_gui(root, authenticate_callback):
     notebook.add(tab_dashboard, text='Dashboard')
     notebook.add(tab_computers, text='Computers')
     notebook.add(tab_devices, text='Devices')
+    tab_diagnostics = ttk.Frame(notebook)
+    notebook.add(tab_diagnostics, text='Diagnostics')
+    create_diagnostics_section(tab_diagnostics)
 
     # Create filter sections for Computers and Devices tabs
-    filter_var_computers, search_var_computers = create_filter_section(tab_computers, lambda: search_callback("computers", filter_var_computers.get(), search_var_computers.get(), tree_computers))
-    filter_var_devices, search_var_devices = create_filter_section(tab_devices, lambda: search_callback("devices", filter_var_devices.get(), search_var_devices.get(), tree_devices))
+    filter_var_computers, search_var_computers = create_filter_section(tab_computers, lambda filter_type, search_term: search_callback("computers", filter_type, search_term, tree_computers, tree_computer_members))
+    filter_var_devices, search_var_devices = create_filter_section(tab_devices, lambda filter_type, search_term: search_callback("devices", filter_type, search_term, tree_devices, tree_device_members))
 
     # Version Label
     tk.Label(tab_dashboard, text="Jamf Pro Version:", font=("Arial", 12, "bold")).grid(row=0, column=0, sticky="w", padx=10, pady=5)
@@ -102,56 +125,66 @@ def setup_gui(root, authenticate_callback):
     device_members_frame.pack(side="left", fill="both", expand=True, padx=10, pady=10)
 
     # Computer Groups Treeview
-    tree_computers = ttk.Treeview(computer_groups_frame, columns=("group_name", "group_type", "group_id"), show="headings")
+    tree_computers = VirtualTreeview(computer_groups_frame, columns=("group_name", "group_type", "group_id", "changed"), show="headings")
     tree_computers.heading("group_name", text="Group Name")
     tree_computers.heading("group_type", text="Group Type")
     tree_computers.heading("group_id", text="Group ID")
+    tree_computers.heading("changed", text="Changed")
     tree_computers.column("group_name", width=200)
     tree_computers.column("group_type", width=100)
     tree_computers.column("group_id", width=100)
+    tree_computers.column("changed", width=70, anchor="center")
     tree_computers.pack(fill="both", expand=True)
 
     # Mobile Device Groups Treeview
-    tree_devices = ttk.Treeview(device_groups_frame, columns=("group_name", "group_type", "group_id"), show="headings")
+    tree_devices = VirtualTreeview(device_groups_frame, columns=("group_name", "group_type", "group_id", "changed"), show="headings")
     tree_devices.heading("group_name", text="Group Name")
     tree_devices.heading("group_type", text="Group Type")
     tree_devices.heading("group_id", text="Group ID")
+    tree_devices.heading("changed", text="Changed")
     tree_devices.column("group_name", width=200)
     tree_devices.column("group_type", width=100)
     tree_devices.column("group_id", width=100)
+    tree_devices.column("changed", width=70, anchor="center")
     tree_devices.pack(fill="both", expand=True)
 
     # Computer Members Treeview
-    tree_computer_members = ttk.Treeview(computer_members_frame, columns=("member_name", "member_id"), show="headings")
+    tree_computer_members = VirtualTreeview(computer_members_frame, columns=("member_name", "member_id"), show="headings")
     tree_computer_members.heading("member_name", text="Member Name")
     tree_computer_members.heading("member_id", text="Member ID")
     tree_computer_members.column("member_name", width=150)
     tree_computer_members.column("member_id", width=100)
+    tree_computer_members.tag_configure("added", background="#dff5df")
+    tree_computer_members.tag_configure("renamed", background="#fff3cd")
     tree_computer_members.pack(fill="both", expand=True)
 
     # Device Members Treeview
-    tree_device_members = ttk.Treeview(device_members_frame, columns=("member_name", "member_id"), show="headings")
+    tree_device_members = VirtualTreeview(device_members_frame, columns=("member_name", "member_id"), show="headings")
     tree_device_members.heading("member_name", text="Member Name")
     tree_device_members.heading("member_id", text="Member ID")
     tree_device_members.column("member_name", width=150)
     tree_device_members.column("member_id", width=100)
+    tree_device_members.tag_configure("added", background="#dff5df")
+    tree_device_members.tag_configure("renamed", background="#fff3cd")
     tree_device_members.pack(fill="both", expand=True)
 
     # General Information Frame for Computers
     general_info_frame_computers = ttk.LabelFrame(tab_computers, text="Computer Information")
     general_info_frame_computers.pack(side="left", fill="both", expand=True, padx=10, pady=10)
 
-    # General Information Textbox for Computers
-    general_info_text_computers = tk.Text(general_info_frame_computers, wrap="word", height=10)
-    general_info_text_computers.pack(fill="both", expand=True)
+    # General Information and detail section tabs for Computers
+    detail_tabs_computers = DetailTabs(general_info_frame_computers, DETAIL_SECTIONS["computers"], detail_section_loader("computers"))
+    detail_tabs_computers.pack(fill="both", expand=True)
+    general_info_text_computers = detail_tabs_computers.general_text
 
     # General Information Frame for Devices
     general_info_frame_devices = ttk.LabelFrame(tab_devices, text="Device Information")
     general_info_frame_devices.pack(side="left", fill="both", expand=True, padx=10, pady=10)
 
-    # General Information Textbox for Devices
-    general_info_text_devices = tk.Text(general_info_frame_devices, wrap="word", height=10)
-    general_info_text_devices.pack(fill="both", expand=True)
+    # General Information and detail section tabs for Devices
+    detail_tabs_devices = DetailTabs(general_info_frame_devices, DETAIL_SECTIONS["devices"], detail_section_loader("devices"))
+    detail_tabs_devices.pack(fill="both", expand=True)
+    general_info_text_devices = detail_tabs_devices.general_text
 
     # Actions Section for Computers
     actions_frame_computers = ttk.LabelFrame(tab_computers, text="Actions")
@@ -162,17 +195,20 @@ def setup_gui(root, authenticate_callback):
     actions_frame_devices.pack(side="right", fill="both", expand=True, padx=10, pady=10)
 
     # Create Actions section for Computers and Devices
-    create_actions_section(actions_frame_computers, 'tmp/device-management/mdm/commands')
-    create_actions_section(actions_frame_devices, 'tmp/device-management/mdm/commands')
+    # Commands come from the shared MDM catalog, filtered to what each platform supports
+    create_actions_section(actions_frame_computers, "computers", tree_computers)
+    create_actions_section(actions_frame_devices, "devices", tree_devices)
 
     # Bind the click events to the tree views
     tree_computers.bind("<ButtonRelease-1>", lambda event: on_computer_group_click(event, tree_computers, tree_computer_members))
     tree_devices.bind("<ButtonRelease-1>", lambda event: on_device_group_click(event, tree_devices, tree_device_members))
-    tree_computer_members.bind("<ButtonRelease-1>", lambda event: on_computer_member_click(event, tree_computer_members, general_info_text_computers))
-    tree_device_members.bind("<ButtonRelease-1>", lambda event: on_device_member_click(event, tree_device_members, general_info_text_devices))
+    tree_computer_members.bind("<<TreeviewSelect>>", lambda event: on_computer_member_click(event, tree_computer_members, detail_tabs_computers))
+    tree_device_members.bind("<<TreeviewSelect>>", lambda event: on_device_member_click(event, tree_device_members, detail_tabs_devices))
+    bind_member_prefetch(tree_computer_members, "computers")
+    bind_member_prefetch(tree_device_members, "devices")
 
     return (entry_url, status_label, version_value, smart_computer_groups_value, static_computer_groups_value,
             computer_policies_value, computer_profiles_value, smart_mobile_groups_value,
             static_mobile_groups_value, mobile_profiles_value, managed_computers_value,
             managed_mobile_devices_value, tree_computers, tree_devices, tree_computer_members, tree_device_members,
-            general_info_text_computers, general_info_text_devices)
\ No newline at end of file
+            general_info_text_computers, general_info_text_devices, status_bar)
\ No newline at end of file
@@ -1,37 +1,77 @@
 import logging
 import os
-from src.gui.data_fetching import fetch_computer_groups, fetch_mobile_device_groups
+from src.api import fetch_computer_groups, fetch_mobile_device_groups
 from src.utils import load_token
-from src.gui.tree_views import update_tree_view  # Ensure update_tree_view is imported
+from src.gui.tree_views import update_tree_view, display_group_members  # Ensure update_tree_view is imported
+from src.gui.tasks import get_task_runner
+from src.search_index import get_search_index, index_groups, refresh_record_index
+from src.pro_inventory import search_inventory
 
-def search_callback(tab_type, filter_type, search_term, tree_view):
+# Searches run against the local search index (see src/search_index.py); the network is only
+# used to fill the group index when the groups have not been loaded yet
+def search_callback(tab_type, filter_type, search_term, tree_view, tree_members=None):
     logging.info(f"Search for {filter_type} with term: {search_term} in {tab_type}")
 
-    token = load_token()
-    if not token:
-        logging.error("No token found!")
-        return
-
-    jamf_url = os.getenv("JAMF_PRO_URL", "")
-    if not jamf_url:
-        logging.error("No Jamf URL found!")
-        return
+    if filter_type == "Groups":
+        search_groups(tab_type, search_term, tree_view)
+    elif filter_type in ("Computers", "Devices"):
+        kind = "computers" if filter_type == "Computers" else "devices"
+        if kind != tab_type or tree_members is None:
+            logging.info(f"Search {filter_type.lower()} from the {filter_type} tab")
+            return
+        search_records(kind, search_term, tree_members)
 
+def search_groups(tab_type, search_term, tree_view):
     if tab_type == "computers":
-        if filter_type == "Groups":
-            groups_data = fetch_computer_groups(jamf_url, token)
-            if groups_data:
-                filtered_groups = [group for group in groups_data['groups'] if search_term.lower() in group['name'].lower()]
-                update_tree_view(tree_view, filtered_groups)
-        else:
-            # Implement search for individual computers if needed
-            pass
+        fetch_groups = fetch_computer_groups
     elif tab_type == "devices":
-        if filter_type == "Groups":
-            groups_data = fetch_mobile_device_groups(jamf_url, token)
-            if groups_data:
-                filtered_groups = [group for group in groups_data['groups'] if search_term.lower() in group['name'].lower()]
-                update_tree_view(tree_view, filtered_groups)
-        else:
-            # Implement search for individual devices if needed
-            pass
\ No newline at end of file
+        fetch_groups = fetch_mobile_device_groups
+    else:
+        return
+
+    def find_groups():
+        index = get_search_index(f"{tab_type}_groups")
+        if not len(index):
+            # Groups have not been listed yet this session; fetch them once and index them
+            token = load_token()
+            if not token:
+                logging.error("No token found!")
+                return None
+
+            jamf_url = os.getenv("JAMF_PRO_URL", "")
+            if not jamf_url:
+                logging.error("No Jamf URL found!")
+                return None
+
+            groups_data = fetch_groups(jamf_url, token)
+            if not groups_data:
+                return None
+            index = index_groups(tab_type, groups_data['groups'])
+        return index.search(search_term)
+
+    get_task_runner().submit(
+        f"{tab_type}_search", find_groups,
+        on_done=lambda filtered_groups: update_tree_view(tree_view, filtered_groups, tab_type) if filtered_groups is not None else None,
+        description="search", indicator=tree_view
+    )
+
+def search_records(kind, search_term, tree_members):
+    # Match names, serial numbers, MAC and IP addresses and Jamf IDs from the local inventory
+    def find_records():
+        index = get_search_index(kind)
+        if not len(index):
+            refresh_record_index(kind)
+        if not len(index):
+            # The local inventory has not been synced (e.g. JAMF_INVENTORY_SYNC=0); let the server filter instead
+            jamf_url = os.getenv("JAMF_PRO_URL", "")
+            if not jamf_url:
+                logging.error("No Jamf URL found!")
+                return None
+            return search_inventory(jamf_url, kind, search_term)
+        return [(record['name'], record['id']) for record in index.search(search_term)]
+
+    get_task_runner().submit(
+        f"{kind}_search", find_records,
+        on_done=lambda members: display_group_members(members, tree_members) if members is not None else None,
+        description="search", indicator=tree_members
+    )
\ No newline at end of file
@@ -0,0 +1,159 @@
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of background worker threads (override with JAMF_TASK_WORKERS)
+DEFAULT_TASK_WORKERS = 8
+# How often the Tk thread drains the result queue
+POLL_INTERVAL_MS = 50
+
+_runner = None
+
+# Runs blocking work on worker threads and hands results back to the Tk thread
+# Tasks are keyed: submitting a new task under a key supersedes the one already in flight,
+# and results of superseded tasks are dropped instead of being applied to the GUI
+class TaskRunner:
+    def __init__(self, root, status_widget=None, max_workers=None):
+        if max_workers is None:
+            max_workers = int(os.getenv("JAMF_TASK_WORKERS", DEFAULT_TASK_WORKERS))
+        self.root = root
+        self.status_widget = status_widget
+        self.idle_status = ""
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.generations = {}
+        self.futures = {}
+        self.active = {}
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    # Start a new generation for a key, superseding any task already running under it
+    def begin(self, key):
+        with self.lock:
+            generation = self.generations.get(key, 0) + 1
+            self.generations[key] = generation
+            previous = self.futures.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+        return generation
+
+    # Supersede the task running under a key without starting another one
+    def cancel(self, key):
+        self.begin(key)
+        if key in self.active:
+            self._clear_busy(key, self.active[key][1])
+
+    # Check whether a generation is still the latest one for its key
+    def is_current(self, key, generation):
+        with self.lock:
+            return self.generations.get(key) == generation
+
+    # Run func(*args) on a worker thread and call on_done(result) on the Tk thread
+    # With on_progress, func is called as func(report, *args): report(value) delivers partial results
+    # to on_progress on the Tk thread and returns False once the task has been superseded.
+    def submit(self, key, func, *args, on_done=None, on_error=None, on_progress=None, description=None, indicator=None):
+        generation = self.begin(key)
+        self._set_busy(key, description, indicator)
+        if on_progress is not None:
+            args = (self._reporter(key, generation, on_progress),) + args
+        future = self.executor.submit(self._run, key, generation, func, args, on_done, on_error, indicator)
+        with self.lock:
+            if self.generations.get(key) == generation:
+                self.futures[key] = future
+        return generation
+
+    # Schedule func(*args) on the Tk thread; safe to call from any worker thread
+    def call_soon(self, func, *args):
+        self.results.put((func, args))
+
+    # Set the message shown in the status widget while no task is running
+    def set_status(self, text):
+        self.idle_status = text
+        self._refresh_status()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reporter(self, key, generation, on_progress):
+        def report(value):
+            if not self.is_current(key, generation):
+                return False
+            self.call_soon(self._apply_progress, key, generation, on_progress, value)
+            return True
+        return report
+
+    def _apply_progress(self, key, generation, on_progress, value):
+        if self.is_current(key, generation):
+            on_progress(value)
+
+    def _run(self, key, generation, func, args, on_done, on_error, indicator):
+        if not self.is_current(key, generation):
+            return
+        try:
+            result = func(*args)
+        except Exception as e:
+            self.call_soon(self._finish, key, generation, on_error, e, indicator, True)
+            return
+        self.call_soon(self._finish, key, generation, on_done, result, indicator, False)
+
+    def _finish(self, key, generation, callback, value, indicator, failed):
+        if not self.is_current(key, generation):
+            logging.debug(f"Dropping result of superseded task {key}")
+            return
+        with self.lock:
+            self.futures.pop(key, None)
+        self._clear_busy(key, indicator)
+        if failed and callback is None:
+            logging.error(f"Task {key} failed: {value}")
+        elif callback is not None:
+            callback(value)
+
+    def _set_busy(self, key, description, indicator):
+        previous = self.active.get(key)
+        if previous is not None and previous[1] is not None and previous[1] is not indicator:
+            previous[1].config(cursor="")
+        self.active[key] = (description or key, indicator)
+        if indicator is not None:
+            indicator.config(cursor="watch")
+        self._refresh_status()
+
+    def _clear_busy(self, key, indicator):
+        self.active.pop(key, None)
+        if indicator is not None:
+            indicator.config(cursor="")
+        self._refresh_status()
+
+    def _refresh_status(self):
+        if self.status_widget is None:
+            return
+        if self.active:
+            descriptions = [description for description, indicator in self.active.values()]
+            self.status_widget.config(text="Loading: " + ", ".join(descriptions) + "...")
+        else:
+            self.status_widget.config(text=self.idle_status)
+
+    def _poll(self):
+        while True:
+            try:
+                func, args = self.results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                logging.error(f"Error applying task result: {e}")
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+# Function to create the process-wide task runner for the Tk root window
+def init_task_runner(root, status_widget=None):
+    global _runner
+    _runner = TaskRunner(root, status_widget)
+    return _runner
+
+# Function to get the task runner created by init_task_runner
+def get_task_runner():
+    if _runner is None:
+        raise RuntimeError("Task runner has not been initialised")
+    return _runner
@@ -1,55 +1,118 @@
-import xml.etree.ElementTree as ET
 import logging
 import os
+from src.gui.tasks import get_task_runner
+from src.utils import load_token
+from src.api import stream_group_members
+from src.xml_stream import batched
+from src.membership import get_membership_tracker, summarize_diff, CHANGED_MARKER
+
+# Number of members added to the tree per update while a group is still downloading
+MEMBER_BATCH_SIZE = 500
+
+def fetch_and_display_group_members(group_id, group_type, tree_members, tree_groups=None):
+    tracker = get_membership_tracker()
+    runner = get_task_runner()
+    group = (os.getenv("JAMF_PRO_URL", ""), group_type, str(group_id))
+    # Clicking the group already on screen refreshes it in place, keeping the scroll position and selection
+    refreshing = getattr(tree_members, "group", None) == group
 
-def fetch_and_display_group_members(group_id, group_type, tree_members, make_classic_api_request, load_token, save_to_cache):
     # Fetch the list of computers or devices in the selected group
-    if group_type == "computers":
-        endpoint = f"JSSResource/computergroups/id/{group_id}"
-    else:
-        endpoint = f"JSSResource/mobiledevicegroups/id/{group_id}"
-
-    token = load_token()
-    if not token:
-        logging.error("No token found!")
-        return
-
-    jamf_url = os.getenv("JAMF_PRO_URL", "")
-    if not jamf_url:
-        logging.error("No Jamf URL found!")
-        return
-
-    response = make_classic_api_request(jamf_url, endpoint, token)
-    if response:
-        # Parse the XML response and display the group members
-        members = parse_group_members(response)
-        display_group_members(members, tree_members)
-        # Cache the response
-        cache_filename = f"{group_type}_{group_id}.xml"
-        save_to_cache(cache_filename, response)
-
-def parse_group_members(xml_data):
-    root = ET.fromstring(xml_data)
-    members = []
-    for computer in root.findall(".//computer"):
-        members.append((computer.find("name").text, computer.find("id").text))
-    for device in root.findall(".//mobile_device"):
-        members.append((device.find("name").text, device.find("id").text))
-    return members
+    def fetch_members(report):
+        token = load_token()
+        if not token:
+            logging.error("No token found!")
+            return None
+
+        jamf_url = os.getenv("JAMF_PRO_URL", "")
+        if not jamf_url:
+            logging.error("No Jamf URL found!")
+            return None
+
+        # Show the members as last viewed straight away; once the group has downloaded,
+        # only the rows that differ are changed in the tree
+        previous = tracker.viewed_members(group_type, group_id)
+        if previous is not None and not report(("snapshot", [(name, member_id) for member_id, name in previous.items()])):
+            return None
+
+        # Parse the XML as it downloads; a group viewed for the first time is handed to the
+        # Tk thread in batches, so the tree starts filling before the whole group has arrived.
+        # A group viewed before is checked with the server, so the diff is never taken from a cached copy.
+        stream = stream_group_members(jamf_url, token, group_type, group_id, revalidate=previous is not None)
+        members = {}
+        try:
+            for batch in batched(stream, MEMBER_BATCH_SIZE):
+                if not report(("append", batch) if previous is None else ("loading", None)):
+                    # Another group was clicked; stop downloading this one
+                    return None
+                members.update((member_id, name) for name, member_id in batch)
+        finally:
+            stream.close()
+        return {"count": len(members), "diff": tracker.record_view(group_type, group_id, members, previous)}
+
+    def on_progress(update):
+        action, rows = update
+        if action == "snapshot" and not refreshing:
+            display_group_members(rows, tree_members)
+        elif action == "append":
+            append_group_members(rows, tree_members)
+
+    def on_done(result):
+        if result is None:
+            return
+        tree_members.group = group
+        if result["diff"] is None:
+            runner.set_status(f"Group {group_id}: {result['count']} members")
+        else:
+            apply_member_changes(result["diff"], tree_members)
+            runner.set_status(f"Group {group_id}: {summarize_diff(result['diff'])} since last view")
+        if tree_groups is not None:
+            refresh_group_markers(tree_groups, group_type)
+
+    # A click on another group supersedes the one still loading
+    if not refreshing:
+        display_group_members([], tree_members)
+    runner.submit(
+        f"{group_type}_group_members", fetch_members,
+        on_progress=on_progress, on_done=on_done,
+        description="group members", indicator=tree_members
+    )
 
 def display_group_members(members, tree_members):
-    # Clear the existing items in the treeview
-    for item in tree_members.get_children():
-        tree_members.delete(item)
-    # Add the new members to the treeview
-    for member in members:
-        tree_members.insert("", "end", values=member)
-
-def update_tree_view(tree_view, data):
-    # Clear the existing items in the treeview
-    for item in tree_view.get_children():
-        tree_view.delete(item)
-
-    # Insert the filtered data into the treeview
-    for entry in data:
-        tree_view.insert("", "end", values=(entry['name'], entry['type'], entry['id']))
\ No newline at end of file
+    # Replace the rows of the (virtualized) treeview in one call; they no longer show a whole group
+    tree_members.set_rows(members)
+    tree_members.group = None
+
+def append_group_members(members, tree_members):
+    tree_members.append_rows(members)
+
+# Function to apply a membership diff (see src/membership.py) to a member list, highlighting the
+# added and renamed rows; the scroll position and selection are kept
+def apply_member_changes(diff, tree_members):
+    tree_members.apply_changes(
+        added=[(name, member_id) for member_id, name in diff["added"].items()],
+        removed=diff["removed"],
+        changed={member_id: (new, member_id) for member_id, (old, new) in diff["renamed"].items()},
+        key_column=1,
+        tags={**dict.fromkeys(diff["added"], ("added",)), **dict.fromkeys(diff["renamed"], ("renamed",))}
+    )
+
+# Function to build group tree rows, marking groups whose members changed since they were last viewed
+def group_rows(kind, groups):
+    changed = get_membership_tracker().changed_groups(kind)
+    return [(group['name'], group['type'], group['id'], CHANGED_MARKER if str(group['id']) in changed else "")
+            for group in groups]
+
+# Function to update the changed markers of a group tree, rewriting only the rows whose marker changed
+def refresh_group_markers(tree_groups, kind):
+    changed = get_membership_tracker().changed_groups(kind)
+    updates = {}
+    for row in tree_groups.rows:
+        marker = CHANGED_MARKER if str(row[2]) in changed else ""
+        if tuple(row[3:4]) != (marker,):
+            updates[row[2]] = tuple(row[:3]) + (marker,)
+    if updates:
+        tree_groups.apply_changes(changed=updates, key_column=2)
+
+def update_tree_view(tree_view, data, kind):
+    # Replace the rows with the filtered data
+    tree_view.set_rows(group_rows(kind, data))
@@ -0,0 +1,225 @@
+from tkinter import ttk, Pack, Grid, Place
+
+# Row height used until the first row has been drawn and can be measured
+DEFAULT_ROW_HEIGHT = 20
+# Height of the column headings above the first row
+HEADING_HEIGHT = 25
+
+# Treeview that only materialises the rows currently visible
+# Rows live in a plain Python list (set_rows/append_rows); the widget keeps one Tk item per
+# visible line and rewrites their values as the list is scrolled, so a 40k-member group costs
+# the same to display as a 40-member one. Like tkinter.scrolledtext.ScrolledText, the widget
+# sits in a frame together with its scrollbar and forwards pack/grid/place to that frame.
+# A <<ViewChanged>> virtual event is generated whenever the rows on screen may have changed.
+# Slots are only rewritten when what they show changes, so updating a few rows of a long list
+# (apply_changes, reconcile_rows) costs a few Tk calls and keeps the scroll position and selection.
+# The selected row is kept as an index into the list (self.selected), since its Tk item only exists
+# while it is on screen; scrolling it out of view and back selects it again.
+class VirtualTreeview(ttk.Treeview):
+    def __init__(self, master=None, **kw):
+        self.frame = ttk.Frame(master)
+        self.vbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.vbar.pack(side="right", fill="y")
+        super().__init__(self.frame, **kw)
+        super().pack(side="left", fill="both", expand=True)
+
+        # Geometry methods act on the frame so the scrollbar moves with the tree
+        tree_methods = vars(ttk.Treeview).keys()
+        geometry_methods = vars(Pack).keys() | vars(Grid).keys() | vars(Place).keys()
+        for method in geometry_methods.difference(tree_methods):
+            if method[0] != "_" and method not in ("config", "configure"):
+                setattr(self, method, getattr(self.frame, method))
+
+        self.rows = []
+        self.offset = 0
+        # Tags of rows by the value of their key column, and the (values, tags) each slot shows
+        self.row_tags = {}
+        self.key_column = 0
+        self.shown = []
+        self.selected = None
+        self.visible = int(self.cget("height"))
+        self.row_height = None
+        self.render_pending = False
+
+        self.bind("<Configure>", self._on_resize, add="+")
+        self.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        self.bind("<Button-4>", lambda event: self._scroll_by(-3), add="+")
+        self.bind("<Button-5>", lambda event: self._scroll_by(3), add="+")
+        self.bind("<Up>", lambda event: self._move_selection(-1), add="+")
+        self.bind("<Down>", lambda event: self._move_selection(1), add="+")
+        self.bind("<Prior>", lambda event: self._move_selection(-self.visible), add="+")
+        self.bind("<Next>", lambda event: self._move_selection(self.visible), add="+")
+        self.bind("<Home>", lambda event: self._move_selection(-len(self.rows)), add="+")
+        self.bind("<End>", lambda event: self._move_selection(len(self.rows)), add="+")
+
+    # Replace every row with a new sequence of value tuples
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self.row_tags = {}
+        self.offset = 0
+        self.selected = None
+        self._render()
+
+    # Replace every row while keeping the scroll position and the selected row (found by its key column)
+    def reconcile_rows(self, rows, key_column=0):
+        selected = self.selected_row()
+        self.rows = list(rows)
+        self.selected = self._find_row(selected[key_column], key_column) if selected else None
+        self._render()
+
+    # Update rows in place, identifying them by the value of their key column:
+    # removed holds keys, changed maps keys to new rows, added rows go to the end.
+    # tags, when given, replaces the Tk tags of rows by key (e.g. to highlight them) until set_rows.
+    def apply_changes(self, added=(), removed=(), changed=None, key_column=0, tags=None):
+        selected = self.selected_row()
+        removed = set(removed)
+        changed = changed or {}
+        if removed or changed:
+            self.rows = [changed.get(row[key_column], row) for row in self.rows if row[key_column] not in removed]
+        self.rows.extend(added)
+        if tags is not None:
+            self.key_column = key_column
+            self.row_tags = dict(tags)
+        self.selected = self._find_row(selected[key_column], key_column) if selected else None
+        self._render()
+
+    # Add rows to the end; the display is refreshed once per idle cycle however many batches arrive
+    def append_rows(self, rows):
+        start = len(self.rows)
+        self.rows.extend(rows)
+        if start < self.offset + self.visible:
+            self._schedule_render()
+        else:
+            self._update_scrollbar()
+
+    # Remove every row with a single Tk call
+    def clear(self):
+        self.rows = []
+        self.row_tags = {}
+        self.offset = 0
+        self.selected = None
+        self._render()
+
+    def row_count(self):
+        return len(self.rows)
+
+    # Index in the backing list of the selected row (on screen or not), or None
+    def selected_index(self):
+        return self.selected if self.selected is not None and self.selected < len(self.rows) else None
+
+    # Values of the selected row, or None
+    def selected_row(self):
+        index = self.selected_index()
+        return self.rows[index] if index is not None else None
+
+    # Scroll so the row at index is visible and select it
+    def select_row(self, index):
+        if not self.rows:
+            return
+        index = max(0, min(index, len(self.rows) - 1))
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible:
+            self.offset = index - self.visible + 1
+        self.selected = index
+        self._render()
+
+    def _find_row(self, key, key_column):
+        return next((index for index, row in enumerate(self.rows) if row[key_column] == key), None)
+
+    def _schedule_render(self):
+        if not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self._render_pending)
+
+    def _render_pending(self):
+        self.render_pending = False
+        self._render()
+
+    # Rewrite the visible items so they show rows[offset:offset + visible], selecting the selected
+    # row's item when it is among them
+    def _render(self):
+        self.offset = max(0, min(self.offset, len(self.rows) - self.visible))
+        window = self.rows[self.offset:self.offset + self.visible]
+        slots = list(self.get_children())
+        if len(slots) > len(window):
+            self.delete(*slots[len(window):])
+            slots = slots[:len(window)]
+        del self.shown[len(slots):]
+        self.shown += [None] * (len(slots) - len(self.shown))
+        for position, values in enumerate(window):
+            tags = self.row_tags.get(values[self.key_column], ()) if self.row_tags else ()
+            if position < len(slots):
+                if self.shown[position] != (values, tags):
+                    self.item(slots[position], values=values, tags=tags)
+                    self.shown[position] = (values, tags)
+            else:
+                slots.append(self.insert("", "end", values=values, tags=tags))
+                self.shown.append((values, tags))
+
+        selected = self.selected_index()
+        if selected is not None and self.offset <= selected < self.offset + len(window):
+            slot = slots[selected - self.offset]
+            if self.selection() != (slot,):
+                self.selection_set(slot)
+            self.focus(slot)
+        elif self.selection():
+            self.selection_remove(*self.selection())
+        self._update_scrollbar()
+        self.event_generate("<<ViewChanged>>")
+
+    def _update_scrollbar(self):
+        if not self.rows:
+            self.vbar.set(0, 1)
+            return
+        total = len(self.rows)
+        self.vbar.set(self.offset / total, min(1, (self.offset + self.visible) / total))
+
+    def _scroll_by(self, lines):
+        self.offset = max(0, min(self.offset + lines, len(self.rows) - self.visible))
+        self._render()
+        return "break"
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.offset = int(float(args[0]) * len(self.rows))
+            self._render()
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            self._scroll_by(amount * self.visible if unit == "pages" else amount)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS reports small deltas
+        if abs(event.delta) >= 120:
+            return self._scroll_by(-(event.delta // 120) * 3)
+        return self._scroll_by(-event.delta)
+
+    def _move_selection(self, step):
+        if not self.rows:
+            return "break"
+        selected = self.selected_index()
+        target = 0 if selected is None else max(0, min(selected + step, len(self.rows) - 1))
+        self.select_row(target)
+        return "break"
+
+    def _on_resize(self, event):
+        if self.row_height is None:
+            children = self.get_children()
+            bbox = self.bbox(children[0]) if children else None
+            if bbox:
+                self.row_height = bbox[3]
+        row_height = self.row_height or DEFAULT_ROW_HEIGHT
+        visible = max(1, (event.height - HEADING_HEIGHT) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
+
+    # A click or a keyboard selection made by Tk: remember which row it picked. An empty Tk selection
+    # only clears the selected row when that row is on screen (off screen, _render removed its item).
+    def _on_select(self, event):
+        selection = self.selection()
+        if selection:
+            self.selected = self.offset + self.index(selection[0])
+        elif self.selected is not None and self.offset <= self.selected < self.offset + len(self.get_children()):
+            self.selected = None
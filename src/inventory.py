@@ -0,0 +1,430 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from src.client import JamfClient
+from src.pro_inventory import iter_inventory_pages, record_value, rsql, rsql_any
+from src.membership import MembershipTracker, membership_hash
+
+# Directory of the inventory stores, one SQLite file per Jamf Pro server (override with JAMF_INVENTORY_DIR)
+INVENTORY_DIR = os.path.join("tmp", "inventory")
+# Number of detail/membership requests in flight during a sync (override with JAMF_SYNC_WORKERS)
+DEFAULT_SYNC_WORKERS = 4
+# Seconds after a sync during which logins do not sync again (override with JAMF_INVENTORY_SYNC_INTERVAL)
+DEFAULT_SYNC_INTERVAL = 6 * 3600
+# Most new devices named in an incremental sync's filter; with more, every device is paged through
+MAX_FILTERED_IDS = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS computers (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    serial_number TEXT,
+    mac_address TEXT,
+    ip_address TEXT,
+    model TEXT,
+    model_identifier TEXT,
+    os_version TEXT,
+    os_build TEXT,
+    managed INTEGER,
+    username TEXT,
+    report_date_utc TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS mobile_devices (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    serial_number TEXT,
+    wifi_mac_address TEXT,
+    ip_address TEXT,
+    model TEXT,
+    model_identifier TEXT,
+    os_version TEXT,
+    os_build TEXT,
+    managed INTEGER,
+    supervised INTEGER,
+    username TEXT,
+    last_inventory_update_utc TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS groups (
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    name TEXT,
+    is_smart INTEGER,
+    PRIMARY KEY (kind, id)
+);
+CREATE TABLE IF NOT EXISTS group_members (
+    kind TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    PRIMARY KEY (kind, group_id, member_id)
+);
+CREATE TABLE IF NOT EXISTS membership_snapshots (
+    kind TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    content_hash TEXT,
+    member_count INTEGER,
+    taken_at REAL,
+    viewed_hash TEXT,
+    viewed_at REAL,
+    PRIMARY KEY (kind, group_id)
+);
+CREATE TABLE IF NOT EXISTS viewed_members (
+    kind TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    name TEXT,
+    PRIMARY KEY (kind, group_id, member_id)
+);
+CREATE TABLE IF NOT EXISTS group_sync (
+    kind TEXT NOT NULL,
+    group_id INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    members_hash TEXT,
+    PRIMARY KEY (kind, group_id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    resource TEXT PRIMARY KEY,
+    last_sync REAL,
+    last_full_sync REAL
+);
+CREATE INDEX IF NOT EXISTS computers_serial ON computers (serial_number);
+CREATE INDEX IF NOT EXISTS computers_mac ON computers (mac_address);
+CREATE INDEX IF NOT EXISTS computers_name ON computers (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS mobile_devices_serial ON mobile_devices (serial_number);
+CREATE INDEX IF NOT EXISTS mobile_devices_mac ON mobile_devices (wifi_mac_address);
+CREATE INDEX IF NOT EXISTS mobile_devices_name ON mobile_devices (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS group_members_member ON group_members (kind, member_id);
+"""
+
+# Record tables by kind, using the same "computers"/"devices" naming as the GUI
+TABLES = {"computers": "computers", "devices": "mobile_devices"}
+
+_stores = {}
+_store_lock = threading.Lock()
+
+# Function to get the path of the inventory store of a Jamf Pro server
+# Every server gets a file of its own, so records of one server are never shown or looked up on another.
+def inventory_db_path(jamf_url):
+    server = jamf_url.strip().rstrip("/").lower()
+    if server and "://" not in server:
+        server = f"https://{server}"
+    host = re.sub(r"[^\w.-]", "_", urlsplit(server).netloc or server) or "default"
+    digest = hashlib.sha1(server.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(os.getenv("JAMF_INVENTORY_DIR", INVENTORY_DIR), f"{host}-{digest}.sqlite3")
+
+# Local SQLite copy of the fleet of one server: computers, mobile devices, groups and memberships
+# Each thread gets its own connection; WAL mode lets the GUI read while a sync is writing.
+class InventoryStore:
+    def __init__(self, path=None):
+        self.path = path or inventory_db_path(os.getenv("JAMF_PRO_URL", ""))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    # Get this thread's connection to the database
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    # Count the records of a kind ("computers" or "devices")
+    def count(self, kind):
+        return self.connection().execute(f"SELECT COUNT(*) FROM {TABLES[kind]}").fetchone()[0]
+
+    # Count smart and static groups of a kind
+    def group_counts(self, kind):
+        rows = self.connection().execute(
+            "SELECT is_smart, COUNT(*) FROM groups WHERE kind = ? GROUP BY is_smart", (kind,)
+        ).fetchall()
+        counts = {bool(is_smart): count for is_smart, count in rows}
+        return {"smart_count": counts.get(True, 0), "static_count": counts.get(False, 0)}
+
+    # List groups of a kind in the same shape as fetch_computer_groups
+    def groups(self, kind):
+        rows = self.connection().execute(
+            "SELECT id, name, is_smart FROM groups WHERE kind = ? ORDER BY name COLLATE NOCASE", (kind,)
+        ).fetchall()
+        return [{"name": row["name"], "type": "Smart" if row["is_smart"] else "Static", "id": row["id"]} for row in rows]
+
+    # List the (name, id) members of a group
+    def group_members(self, kind, group_id):
+        table = TABLES[kind]
+        return [tuple(row) for row in self.connection().execute(
+            f"SELECT r.name, r.id FROM group_members m JOIN {table} r ON r.id = m.member_id "
+            "WHERE m.kind = ? AND m.group_id = ? ORDER BY r.name COLLATE NOCASE",
+            (kind, int(group_id))
+        )]
+
+    # Get a single record as a dict, or None
+    def get(self, kind, record_id):
+        row = self.connection().execute(f"SELECT * FROM {TABLES[kind]} WHERE id = ?", (int(record_id),)).fetchone()
+        return dict(row) if row else None
+
+    # Iterate over every record of a kind as dicts
+    def records(self, kind):
+        for row in self.connection().execute(f"SELECT * FROM {TABLES[kind]}"):
+            yield dict(row)
+
+    # Get the time of the last successful sync of a resource (0 if never synced)
+    def last_sync(self, resource):
+        row = self.connection().execute("SELECT last_sync FROM sync_state WHERE resource = ?", (resource,)).fetchone()
+        return row[0] if row else 0
+
+    def mark_synced(self, resource, full):
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO sync_state (resource, last_sync, last_full_sync) VALUES (?, ?, ?) "
+                "ON CONFLICT(resource) DO UPDATE SET last_sync = excluded.last_sync, "
+                "last_full_sync = COALESCE(excluded.last_full_sync, sync_state.last_full_sync)",
+                (resource, now, now if full else None)
+            )
+
+# Function to get the process-wide inventory store of a server (by default the current JAMF_PRO_URL)
+def get_inventory_store(jamf_url=None):
+    path = inventory_db_path(jamf_url or os.getenv("JAMF_PRO_URL", ""))
+    store = _stores.get(path)
+    if store is None:
+        with _store_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = _stores[path] = InventoryStore(path)
+    return store
+
+# Function to run fetch(item) for many items with bounded concurrency, yielding (item, result)
+def fetch_concurrently(fetch, items, max_workers=None):
+    if max_workers is None:
+        max_workers = int(os.getenv("JAMF_SYNC_WORKERS", DEFAULT_SYNC_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync") as executor:
+        yield from zip(items, executor.map(fetch, items))
+
+# Sync requests bypass the response cache (ttl=0): a listing cached by an earlier sync or by the GUI
+# would hide changes, and bulk detail responses would evict the entries the GUI relies on.
+
+# Function to sync computers, only pulling details for records whose report_date_utc changed
+def sync_computers(store, jamf_url, full=False):
+    client = JamfClient(jamf_url, ttl=0)
+    listing = client.get_json("JSSResource/computers/subset/basic")
+    if listing is None:
+        raise RuntimeError("Could not fetch the computer listing")
+
+    conn = store.connection()
+    known = dict(conn.execute("SELECT id, report_date_utc FROM computers").fetchall())
+    listed = {computer["id"]: computer for computer in listing.get("computers", [])}
+    changed = [record_id for record_id, computer in listed.items()
+               if full or known.get(record_id) != computer.get("report_date_utc")]
+    removed = [record_id for record_id in known if record_id not in listed]
+
+    # report_date_utc is only written together with the details below, so a record whose detail
+    # request fails keeps its old report date and is fetched again by the next sync
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT INTO computers (id, name, serial_number, mac_address, model, managed, username, synced_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+            "serial_number = excluded.serial_number, mac_address = excluded.mac_address, model = excluded.model, "
+            "managed = excluded.managed, username = excluded.username, synced_at = excluded.synced_at",
+            [(record_id, c.get("name"), c.get("serial_number"), c.get("mac_address"), c.get("model"),
+              int(bool(c.get("managed"))), c.get("username"), now)
+             for record_id, c in ((record_id, listed[record_id]) for record_id in changed)]
+        )
+        conn.executemany("DELETE FROM computers WHERE id = ?", [(record_id,) for record_id in removed])
+        conn.executemany("DELETE FROM group_members WHERE kind = 'computers' AND member_id = ?", [(record_id,) for record_id in removed])
+
+    def fetch_detail(record_id):
+        return client.get_json(f"JSSResource/computers/id/{record_id}/subset/General&Hardware")
+
+    updated = 0
+    for record_id, detail in fetch_concurrently(fetch_detail, changed):
+        if not detail:
+            continue
+        general = detail["computer"].get("general", {})
+        hardware = detail["computer"].get("hardware", {})
+        with conn:
+            conn.execute(
+                "UPDATE computers SET ip_address = ?, model_identifier = ?, os_version = ?, os_build = ?, report_date_utc = ?, synced_at = ? WHERE id = ?",
+                (general.get("ip_address"), hardware.get("model_identifier"), hardware.get("os_version"),
+                 hardware.get("os_build"), listed[record_id].get("report_date_utc"), time.time(), record_id)
+            )
+        updated += 1
+
+    store.mark_synced("computers", full)
+    return {"listed": len(listed), "changed": len(changed), "details": updated, "removed": len(removed)}
+
+# Function to sync mobile devices
+# The Classic listing has no inventory timestamp, so it is only used to find new and removed devices.
+# The records themselves come from the Jamf Pro API inventory, a page of devices per request; an
+# incremental sync asks the server for the devices whose lastInventoryUpdateDate is not older than
+# the latest one stored, plus the devices stored without one (new, or never fetched).
+def sync_mobile_devices(store, jamf_url, full=False):
+    client = JamfClient(jamf_url, ttl=0)
+    listing = client.get_json("JSSResource/mobiledevices")
+    if listing is None:
+        raise RuntimeError("Could not fetch the mobile device listing")
+
+    conn = store.connection()
+    known = dict(conn.execute("SELECT id, last_inventory_update_utc FROM mobile_devices").fetchall())
+    listed = {device["id"]: device for device in listing.get("mobile_devices", [])}
+    removed = [record_id for record_id in known if record_id not in listed]
+    missing = [record_id for record_id in listed if not known.get(record_id)]
+
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO mobile_devices (id, name, serial_number, wifi_mac_address, model, model_identifier, username, synced_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(record_id, d.get("name"), d.get("serial_number"), d.get("wifi_mac_address"), d.get("model"),
+              d.get("model_identifier"), d.get("username"), now)
+             for record_id, d in ((record_id, listed[record_id]) for record_id in missing)]
+        )
+        conn.executemany("DELETE FROM mobile_devices WHERE id = ?", [(record_id,) for record_id in removed])
+        conn.executemany("DELETE FROM group_members WHERE kind = 'devices' AND member_id = ?", [(record_id,) for record_id in removed])
+
+    # Many missing devices are cheaper to page through unfiltered than to name in the filter
+    latest = max(filter(None, known.values()), default=None)
+    rsql_filter = None
+    if not full and latest and len(missing) <= MAX_FILTERED_IDS:
+        rsql_filter = rsql_any(rsql("general.lastInventoryUpdateDate", latest, ">="),
+                               rsql("mobileDeviceId", [str(record_id) for record_id in missing]) if missing else None)
+    # Oldest first, so a sync that fails part way has stored a prefix and the next one resumes after it
+    pages = iter_inventory_pages(jamf_url, "devices", sections=("GENERAL", "HARDWARE", "USER_AND_LOCATION"),
+                                 rsql_filter=rsql_filter, sort=("general.lastInventoryUpdateDate:asc", "mobileDeviceId:asc"), ttl=0)
+
+    changed = 0
+    updated = 0
+    for page in pages:
+        rows = []
+        for record in page["results"]:
+            record_id = int(record_value(record, "mobileDeviceId"))
+            updated_at = record_value(record, "general.lastInventoryUpdateDate")
+            if record_id not in listed or (not full and known.get(record_id) and known[record_id] == updated_at):
+                continue
+            rows.append((
+                record_value(record, "general.displayName"), record_value(record, "hardware.serialNumber"),
+                record_value(record, "hardware.wifiMacAddress"), record_value(record, "general.ipAddress"),
+                record_value(record, "hardware.model"), record_value(record, "hardware.modelIdentifier"),
+                record_value(record, "general.osVersion"), record_value(record, "general.osBuild"),
+                int(bool(record_value(record, "general.managed"))), int(bool(record_value(record, "general.supervised"))),
+                record_value(record, "userAndLocation.username"), updated_at, time.time(), record_id
+            ))
+        with conn:
+            conn.executemany(
+                "UPDATE mobile_devices SET name = ?, serial_number = ?, wifi_mac_address = ?, ip_address = ?, model = ?, "
+                "model_identifier = ?, os_version = ?, os_build = ?, managed = ?, supervised = ?, username = ?, "
+                "last_inventory_update_utc = ?, synced_at = ? WHERE id = ?",
+                rows
+            )
+        changed += len(page["results"])
+        updated += len(rows)
+
+    store.mark_synced("mobile_devices", full)
+    return {"listed": len(listed), "changed": changed, "details": updated, "removed": len(removed)}
+
+# Function to sync the groups of a kind and their memberships
+# Each group is requested with the ETag/Last-Modified of its last download, so unchanged groups
+# cost a 304 without a body. Where the server sends no validators, memberships whose hash has not
+# changed are not written again. full=True downloads and rewrites every group.
+def sync_groups(store, jamf_url, kind, full=False):
+    if kind == "computers":
+        list_endpoint, list_key, detail_endpoint, detail_key, members_key = \
+            "JSSResource/computergroups", "computer_groups", "JSSResource/computergroups/id", "computer_group", "computers"
+    else:
+        list_endpoint, list_key, detail_endpoint, detail_key, members_key = \
+            "JSSResource/mobiledevicegroups", "mobile_device_groups", "JSSResource/mobiledevicegroups/id", "mobile_device_group", "mobile_devices"
+
+    client = JamfClient(jamf_url, ttl=0)
+    listing = client.get_json(list_endpoint)
+    if listing is None:
+        raise RuntimeError(f"Could not fetch the {kind} group listing")
+    groups = listing.get(list_key, [])
+
+    conn = store.connection()
+    with conn:
+        conn.execute("DELETE FROM groups WHERE kind = ?", (kind,))
+        conn.executemany(
+            "INSERT INTO groups (kind, id, name, is_smart) VALUES (?, ?, ?, ?)",
+            [(kind, group["id"], group["name"], int(bool(group["is_smart"]))) for group in groups]
+        )
+        for table in ("group_members", "membership_snapshots", "viewed_members", "group_sync"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE kind = ? AND group_id NOT IN (SELECT id FROM groups WHERE kind = ?)",
+                (kind, kind)
+            )
+    known = {} if full else {
+        row["group_id"]: dict(row) for row in conn.execute(
+            "SELECT group_id, etag, last_modified, members_hash FROM group_sync WHERE kind = ?", (kind,))
+    }
+
+    def fetch_members(group_id):
+        return client.get_json_if_changed(f"{detail_endpoint}/{group_id}", known.get(group_id))
+
+    # Keep a content hash of each membership, so groups that changed since they were last viewed can be marked
+    tracker = MembershipTracker(store)
+    memberships = 0
+    unchanged = 0
+    for group_id, result in fetch_concurrently(fetch_members, [group["id"] for group in groups]):
+        if not result:
+            continue
+        detail, validators = result
+        if detail is None:
+            unchanged += 1
+            continue
+        members = detail[detail_key].get(members_key, [])
+        named = {str(member["id"]): member.get("name") for member in members}
+        members_hash = membership_hash(named)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO group_sync (kind, group_id, etag, last_modified, members_hash) VALUES (?, ?, ?, ?, ?)",
+                (kind, group_id, validators["etag"], validators["last_modified"], members_hash)
+            )
+            if known.get(group_id, {}).get("members_hash") == members_hash:
+                unchanged += 1
+                continue
+            conn.execute("DELETE FROM group_members WHERE kind = ? AND group_id = ?", (kind, group_id))
+            conn.executemany(
+                "INSERT OR IGNORE INTO group_members (kind, group_id, member_id) VALUES (?, ?, ?)",
+                [(kind, group_id, member["id"]) for member in members]
+            )
+        tracker.record_snapshot(kind, group_id, named)
+        memberships += len(members)
+
+    store.mark_synced(f"{kind}_groups", full)
+    return {"groups": len(groups), "unchanged": unchanged, "memberships": memberships}
+
+# Function to tell whether the inventory of a store was last synced more than interval seconds ago
+def sync_due(store, interval=None):
+    if interval is None:
+        interval = int(os.getenv("JAMF_INVENTORY_SYNC_INTERVAL", DEFAULT_SYNC_INTERVAL))
+    return time.time() - store.last_sync("computers") >= interval
+
+# Function to bring the local inventory up to date
+# The first run (or full=True) pulls every record; later runs only pull records that changed
+def sync_inventory(jamf_url, store=None, full=False):
+    store = store or get_inventory_store(jamf_url)
+    start = time.perf_counter()
+    full = full or store.last_sync("computers") == 0
+    summary = {
+        "computers": sync_computers(store, jamf_url, full),
+        "devices": sync_mobile_devices(store, jamf_url, full),
+        "computer_groups": sync_groups(store, jamf_url, "computers", full),
+        "device_groups": sync_groups(store, jamf_url, "devices", full),
+    }
+    summary["elapsed"] = time.perf_counter() - start
+    logging.info(f"Inventory {'full' if full else 'incremental'} sync finished in {summary['elapsed']:.2f}s: {summary}")
+    return summary
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+REPO_DIR = os.path.join("tmp", "device-management")
+COMMANDS_DIR = os.path.join(REPO_DIR, "mdm", "commands")
+INDEX_FILE = os.path.join("tmp", "mdm_catalog.json")
+# Bump when the layout of an index entry changes so older index files are rebuilt
+INDEX_VERSION = 1
+
+# supportedOS names that each kind of managed record runs
+PLATFORMS = {
+    "computers": ("macOS",),
+    "devices": ("iOS", "iPadOS", "tvOS", "visionOS", "watchOS"),
+}
+
+# Apple MDM request types that the Classic API command endpoints can send, per kind, as
+# (Classic command name, {Apple payload key: Classic parameter name}). The Classic API has its own
+# command and parameter names, and parameters travel as /name/value path segments, so only commands
+# listed here can be run; payload keys without a Classic parameter are not offered.
+CLASSIC_COMMANDS = {
+    "computers": {
+        "DeviceLock": ("DeviceLock", {"PIN": "passcode"}),
+        "EraseDevice": ("EraseDevice", {"PIN": "passcode"}),
+        "UnlockUserAccount": ("UnlockUserAccount", {"UserName": "username"}),
+        "DeleteUser": ("DeleteUser", {"UserName": "username"}),
+        "EnableRemoteDesktop": ("EnableRemoteDesktop", {}),
+        "DisableRemoteDesktop": ("DisableRemoteDesktop", {}),
+    },
+    "devices": {
+        "DeviceInformation": ("UpdateInventory", {}),
+        "DeviceLock": ("DeviceLock", {}),
+        "EraseDevice": ("EraseDevice", {}),
+        "ClearPasscode": ("ClearPasscode", {}),
+        "ClearRestrictionsPassword": ("ClearRestrictionsPassword", {}),
+        "RestartDevice": ("RestartDevice", {}),
+        "ShutDownDevice": ("ShutDownDevice", {}),
+        "DisableLostMode": ("DisableLostMode", {}),
+        "PlayLostModeSound": ("PlayLostModeSound", {}),
+    },
+}
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+# Function to read the commit checked out in a git repository without running git, or None
+def read_git_head(repo_dir):
+    git_dir = os.path.join(repo_dir, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as file:
+            head = file.read().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[5:]
+        ref_path = os.path.join(git_dir, *ref.split("/"))
+        if os.path.exists(ref_path):
+            with open(ref_path) as file:
+                return file.read().strip()
+        with open(os.path.join(git_dir, "packed-refs")) as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+# Function to identify the state of the commands directory: the git HEAD, or file names and mtimes outside a checkout
+def catalog_version(commands_dir=COMMANDS_DIR, repo_dir=REPO_DIR):
+    head = read_git_head(repo_dir)
+    if head:
+        return f"{INDEX_VERSION}:{head}"
+    if not os.path.isdir(commands_dir):
+        return None
+    entries = sorted((entry.name, entry.stat().st_mtime) for entry in os.scandir(commands_dir) if entry.name.endswith(".yaml"))
+    return f"{INDEX_VERSION}:{hashlib.sha1(repr(entries).encode()).hexdigest()}"
+
+# Function to parse every command definition into an index entry per file
+# PyYAML is imported here rather than at startup, as it is only needed when the index is rebuilt
+def build_catalog(commands_dir=COMMANDS_DIR):
+    import yaml
+    # libyaml's loader is several times faster; fall back to the pure Python one if PyYAML was built without it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    start = time.perf_counter()
+    commands = {}
+    for file_name in sorted(os.listdir(commands_dir)):
+        if not file_name.endswith(".yaml"):
+            continue
+        try:
+            with open(os.path.join(commands_dir, file_name)) as file:
+                command_data = yaml.load(file, Loader=loader)
+        except (OSError, yaml.YAMLError) as e:
+            logging.error(f"Error reading MDM command {file_name}: {e}")
+            continue
+        if not isinstance(command_data, dict):
+            continue
+        payload = command_data.get("payload") or {}
+        commands[file_name] = {
+            "file": file_name,
+            "title": str(command_data.get("title") or file_name[:-5]),
+            "description": command_data.get("description"),
+            "request_type": payload.get("requesttype"),
+            "supported_os": payload.get("supportedOS") or {},
+            # Top-level keys shown as form fields, and the schema of the command payload
+            "keys": [key for key in command_data if key not in ("title", "description", "payload", "payloadkeys")],
+            "payload_keys": command_data.get("payloadkeys") or [],
+        }
+    logging.info(f"Indexed {len(commands)} MDM commands in {time.perf_counter() - start:.2f}s")
+    return commands
+
+# Index of the MDM commands in the device-management repository
+# The parsed definitions are saved to INDEX_FILE together with the version they were built from,
+# so the YAML tree is only parsed again when the repository has moved to another commit.
+class MdmCatalog:
+    def __init__(self, commands):
+        self.commands = commands
+
+    def __len__(self):
+        return len(self.commands)
+
+    # Commands sorted by title, limited to those supported on a kind ("computers"/"devices") if given
+    def commands_for(self, kind=None):
+        commands = sorted(self.commands.values(), key=lambda command: command["title"].lower())
+        if kind is None:
+            return commands
+        return [command for command in commands if is_supported(command, PLATFORMS[kind])]
+
+    def get(self, file_name):
+        return self.commands.get(file_name)
+
+# Function to look up how a catalog command is sent through the Classic API: (Classic command name,
+# {Apple payload key: Classic parameter name}), or None if the Classic API cannot send it
+def classic_mapping(command, kind):
+    request_type = command["request_type"] or command["file"][:-5]
+    return CLASSIC_COMMANDS.get(kind, {}).get(request_type)
+
+# Function to turn form values keyed by Apple payload key into the Classic command name and parameters
+def classic_command(command, kind, values):
+    mapping = classic_mapping(command, kind)
+    if mapping is None:
+        raise ValueError(f"{command['title']} cannot be sent through the Classic API")
+    name, parameters = mapping
+    unknown = [key for key in values if key not in parameters]
+    if unknown:
+        raise ValueError(f"{command['title']} has no Classic API parameter for {', '.join(unknown)}")
+    return name, {parameters[key]: value for key, value in values.items()}
+
+# Function to check whether a command is available on any of the given platforms
+def is_supported(command, platforms):
+    supported_os = command["supported_os"]
+    if not supported_os:
+        return True
+    for platform in platforms:
+        details = supported_os.get(platform)
+        if isinstance(details, dict) and details.get("introduced") not in (None, "n/a"):
+            return True
+    return False
+
+# Function to load the catalog, rebuilding and saving the index if the repository has changed
+def load_catalog(commands_dir=COMMANDS_DIR, repo_dir=REPO_DIR, index_file=INDEX_FILE):
+    version = catalog_version(commands_dir, repo_dir)
+    if version is None:
+        logging.debug(f"No MDM commands found in {commands_dir}")
+        return MdmCatalog({})
+
+    try:
+        with open(index_file) as file:
+            index = json.load(file)
+        if index.get("version") == version:
+            return MdmCatalog(index["commands"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    commands = build_catalog(commands_dir)
+    try:
+        temp_file = f"{index_file}.tmp"
+        with open(temp_file, "w") as file:
+            json.dump({"version": version, "commands": commands}, file, default=str)
+        os.replace(temp_file, index_file)
+    except OSError as e:
+        logging.error(f"Error saving MDM command index: {e}")
+    return MdmCatalog(commands)
+
+# Function to get the shared catalog, loading it on first use
+def get_mdm_catalog():
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None or not _catalog.commands:
+            _catalog = load_catalog()
+        return _catalog
+
+# Function to drop the loaded catalog so the next use picks up a repository update
+def invalidate_mdm_catalog():
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
@@ -0,0 +1,233 @@
+import os
+import glob
+import json
+import uuid
+import time
+import hashlib
+import logging
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from src.session import get_session
+from src.governor import get_governor, parse_retry_after
+from src.api import stream_group_members
+
+DISPATCH_DIR = os.path.join("tmp", "dispatch")
+# Defaults for command dispatch (override with environment variables)
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_DISPATCH_WORKERS = 4
+# Longest request URL sent; batches are cut short before the id list would exceed it
+MAX_URL_LENGTH = 2000
+# Answers meaning the server did not take the command and asks to be called again later. Commands
+# are not idempotent, so other errors (500, 502, 504, timeouts) are never retried: the server may
+# already have queued the command.
+DISPATCH_RETRY_STATUSES = frozenset([429, 503])
+
+# Classic API command endpoints; ids are appended comma-separated so one request covers a batch
+COMMAND_ENDPOINTS = {
+    "computers": "JSSResource/computercommands/command",
+    "devices": "JSSResource/mobiledevicecommands/command",
+}
+
+# Function to build the command URL of a batch (parameters become /name/value path segments)
+def command_url(jamf_url, kind, command, params, ids):
+    url = f"{jamf_url}/{COMMAND_ENDPOINTS[kind]}/{quote(command, safe='')}"
+    for name, value in (params or {}).items():
+        url += f"/{quote(str(name), safe='')}/{quote(str(value), safe='')}"
+    return f"{url}/id/{','.join(str(member_id) for member_id in ids)}"
+
+# Function to split ids into batches of at most batch_size that keep the command URL under MAX_URL_LENGTH
+def pack_batches(ids, base_length, batch_size):
+    batches = []
+    batch = []
+    length = base_length
+    for member_id in ids:
+        added = len(str(member_id)) + (1 if batch else 0)
+        if batch and (len(batch) >= batch_size or length + added > MAX_URL_LENGTH):
+            batches.append(batch)
+            batch = []
+            length = base_length
+            added = len(str(member_id))
+        batch.append(member_id)
+        length += added
+    if batch:
+        batches.append(batch)
+    return batches
+
+# Append-only JSON-lines record of a dispatch job: a header line, then one line per member and attempt,
+# and a "completed" line once a run has gone through every batch. Every job gets a log of its own (see
+# new_dispatch_log_path); reopening the log of a job that never completed resumes it: members whose
+# latest status is "sent" are not sent the command again, and neither are members whose status is
+# "unknown" (the server failed after the command may have been queued; check them in Jamf Pro).
+class DispatchLog:
+    def __init__(self, path, header):
+        self.path = path
+        self.lock = threading.Lock()
+        self.statuses = {}
+        self.completed = False
+        if os.path.exists(path):
+            self.header, self.statuses, self.completed = read_dispatch_log(path)
+            # A crash can leave the last line cut short; entries appended from now on start on a line of their own
+            if not self._ends_with_newline():
+                self._append([], "\n")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.header = dict(header, created=time.time())
+            self._append([self.header])
+
+    # Members that must not be sent the command again
+    def sent(self):
+        return {member_id for member_id, status in self.statuses.items() if status in ("sent", "unknown")}
+
+    def record(self, ids, status, batch, error=None):
+        entries = []
+        for member_id in ids:
+            entry = {"id": str(member_id), "status": status, "batch": batch, "time": time.time()}
+            if error:
+                entry["error"] = error
+            entries.append(entry)
+        with self.lock:
+            self._append(entries)
+            for member_id in ids:
+                self.statuses[str(member_id)] = status
+
+    # Mark the job finished, so sending the same command again starts a new job
+    def complete(self):
+        with self.lock:
+            self._append([{"completed": time.time()}])
+            self.completed = True
+
+    def _append(self, entries, prefix=""):
+        with open(self.path, "a") as file:
+            file.write(prefix + "".join(json.dumps(entry) + "\n" for entry in entries))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as file:
+            if file.seek(0, os.SEEK_END) == 0:
+                return True
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b"\n"
+
+# Function to read a progress log: returns (header, latest status by member id, completed flag)
+def read_dispatch_log(path):
+    header, statuses, completed = {}, {}, False
+    with open(path) as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            if "id" in entry:
+                statuses[str(entry["id"])] = entry["status"]
+            elif "completed" in entry:
+                completed = True
+            elif not header:
+                header = entry
+    return header, statuses, completed
+
+# Function to identify a dispatch job: the same command with the same parameters, sent to the same
+# target (a group or a list of ids) on the same server
+def dispatch_job_key(jamf_url, kind, command, params, target):
+    job = json.dumps([jamf_url.rstrip("/").lower(), kind, command, params or {}, target], sort_keys=True)
+    return f"{kind}-{command}-{hashlib.sha1(job.encode()).hexdigest()[:12]}"
+
+# Function to get the path of the progress log of a new run of a job (one log per run, named by start time)
+def new_dispatch_log_path(jamf_url, kind, command, params, target):
+    job_key = dispatch_job_key(jamf_url, kind, command, params, target)
+    return os.path.join(DISPATCH_DIR, f"{job_key}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.jsonl")
+
+# Function to find the progress log of the latest run of a job that did not complete, or None
+def incomplete_dispatch_log(jamf_url, kind, command, params, target):
+    job_key = dispatch_job_key(jamf_url, kind, command, params, target)
+    for path in sorted(glob.glob(os.path.join(DISPATCH_DIR, f"{job_key}-*.jsonl")), key=os.path.getmtime, reverse=True):
+        return None if read_dispatch_log(path)[2] else path
+    return None
+
+# Function to send one batch, waiting out 429/503 answers (POSTs are not retried by the governor)
+def send_batch(url, token):
+    headers = {"Accept": "application/xml", "Authorization": f"Bearer {token}"}
+    governor = get_governor()
+    attempt = 0
+    while True:
+        response = get_session().post(url, headers=headers)
+        if response.status_code not in DISPATCH_RETRY_STATUSES or attempt >= governor.max_retries:
+            response.raise_for_status()
+            return response
+        delay = governor.retry_delay(attempt, parse_retry_after(response.headers.get("Retry-After")))
+        logging.debug(f"Command batch answered {response.status_code}, retrying in {delay:.2f}s")
+        time.sleep(delay)
+        attempt += 1
+
+# Raised when a job has an earlier run that did not complete and the caller did not say whether to resume it
+class UnfinishedDispatchError(Exception):
+    def __init__(self, log_path):
+        super().__init__(f"An earlier run of this dispatch did not complete (progress log: {log_path})")
+        self.log_path = log_path
+
+# Function to send an MDM command to many computers or devices in concurrent batches
+# resume decides what happens when an earlier run of the same job did not complete: True resumes it
+# (ids it sent are skipped, see DispatchLog), False starts a new job, None raises UnfinishedDispatchError.
+# progress(summary) is called after every batch and may return False to stop before the remaining
+# batches are sent; a stopped run stays incomplete, a run that went through every batch is completed.
+# Returns a summary dict: total, sent (by this run), failed, unknown (may or may not have been queued),
+# skipped (handled by an earlier run), stopped and the path of the progress log.
+def dispatch_command(jamf_url, token, kind, command, member_ids, params=None, target=None, progress=None,
+                     batch_size=None, max_workers=None, resume=None):
+    batch_size = batch_size or int(os.getenv("JAMF_MDM_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    max_workers = max_workers or int(os.getenv("JAMF_DISPATCH_WORKERS", DEFAULT_DISPATCH_WORKERS))
+    member_ids = list(dict.fromkeys(str(member_id) for member_id in member_ids))
+    target = target or sorted(member_ids)
+    log_path = incomplete_dispatch_log(jamf_url, kind, command, params, target)
+    if log_path and resume is None:
+        raise UnfinishedDispatchError(log_path)
+    if not log_path or not resume:
+        log_path = new_dispatch_log_path(jamf_url, kind, command, params, target)
+    log = DispatchLog(log_path, {"url": jamf_url, "kind": kind, "command": command, "params": params or {}, "target": target})
+    already_sent = log.sent()
+    pending = [member_id for member_id in member_ids if member_id not in already_sent]
+    summary = {"total": len(member_ids), "sent": 0, "failed": 0, "unknown": 0,
+               "skipped": len(member_ids) - len(pending), "log": log_path}
+    base_length = len(command_url(jamf_url, kind, command, params, []))
+    batches = pack_batches(pending, base_length, batch_size)
+    logging.info(f"Sending {command} to {len(pending)} {kind} in {len(batches)} batches ({summary['skipped']} already sent)")
+
+    stop = threading.Event()
+    summary_lock = threading.Lock()
+
+    def run_batch(number, ids):
+        if stop.is_set():
+            return
+        try:
+            send_batch(command_url(jamf_url, kind, command, params, ids), token)
+        except requests.exceptions.RequestException as e:
+            status = getattr(e.response, "status_code", None)
+            # A server error or a response that never came may follow a command that was queued anyway
+            outcome = "unknown" if (status or 0) >= 500 or isinstance(e, requests.exceptions.ReadTimeout) else "failed"
+            log.record(ids, outcome, number, f"HTTP {status}" if status else str(e))
+            with summary_lock:
+                summary[outcome] += len(ids)
+        else:
+            log.record(ids, "sent", number)
+            with summary_lock:
+                summary["sent"] += len(ids)
+        if progress and progress(dict(summary)) is False:
+            stop.set()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dispatch") as executor:
+        futures = [executor.submit(run_batch, number, ids) for number, ids in enumerate(batches)]
+        for future in as_completed(futures):
+            future.result()
+    summary["stopped"] = stop.is_set()
+    if not summary["stopped"]:
+        log.complete()
+    logging.info(f"{command}: {summary['sent']} of {len(pending)} {kind} sent, {summary['failed']} failed, "
+                 f"{summary['unknown']} unknown, {summary['skipped']} skipped")
+    return summary
+
+# Function to send an MDM command to every member of a group
+def dispatch_to_group(jamf_url, token, kind, group_id, command, params=None, progress=None, **kwargs):
+    member_ids = [member_id for name, member_id in stream_group_members(jamf_url, token, kind, group_id)]
+    return dispatch_command(jamf_url, token, kind, command, member_ids, params, target=f"group:{group_id}", progress=progress, **kwargs)
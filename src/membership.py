@@ -0,0 +1,121 @@
+import time
+import hashlib
+import logging
+import threading
+
+# Marker shown next to groups whose members changed since they were last viewed
+CHANGED_MARKER = "●"
+
+_trackers = {}
+_tracker_lock = threading.Lock()
+
+# Function to hash a membership ({member id: name}) independently of the order the members came in
+def membership_hash(members):
+    digest = hashlib.sha1()
+    for member_id in sorted(members, key=str):
+        digest.update(f"{member_id}\t{members[member_id] or ''}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+# Function to compare two memberships ({member id: name})
+# Returns {"added": {id: name}, "removed": {id: name}, "renamed": {id: (old name, new name)}}.
+def diff_memberships(old, new):
+    return {
+        "added": {member_id: new[member_id] for member_id in new if member_id not in old},
+        "removed": {member_id: old[member_id] for member_id in old if member_id not in new},
+        "renamed": {member_id: (old[member_id], new[member_id])
+                    for member_id in new if member_id in old and old[member_id] != new[member_id]},
+    }
+
+# Function to describe a diff in a few words, e.g. "3 added, 1 removed"
+def summarize_diff(diff):
+    parts = [f"{len(diff[change])} {change}" for change in ("added", "removed", "renamed") if diff[change]]
+    return ", ".join(parts) or "no changes"
+
+# Group memberships as last seen, kept in the inventory store
+# membership_snapshots holds the content hash of each group as last fetched (by a sync or a click)
+# and the hash the user last viewed; a group whose two hashes differ has changed since it was
+# viewed. viewed_members holds the rows last viewed, so a click only applies the difference to the
+# tree, and only the difference is written back.
+class MembershipTracker:
+    def __init__(self, store):
+        self.store = store
+
+    # Record the current membership of a group without marking it viewed (used by inventory syncs)
+    def record_snapshot(self, kind, group_id, members):
+        with self.store.connection() as conn:
+            conn.execute(
+                "INSERT INTO membership_snapshots (kind, group_id, content_hash, member_count, taken_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(kind, group_id) DO UPDATE SET content_hash = excluded.content_hash, "
+                "member_count = excluded.member_count, taken_at = excluded.taken_at",
+                (kind, int(group_id), membership_hash(members), len(members), time.time())
+            )
+
+    # Members of a group as last viewed ({member id (str): name}, in the order they were first shown), or None
+    def viewed_members(self, kind, group_id):
+        conn = self.store.connection()
+        viewed = conn.execute(
+            "SELECT 1 FROM membership_snapshots WHERE kind = ? AND group_id = ? AND viewed_hash IS NOT NULL",
+            (kind, int(group_id))
+        ).fetchone()
+        if viewed is None:
+            return None
+        rows = conn.execute(
+            "SELECT member_id, name FROM viewed_members WHERE kind = ? AND group_id = ? ORDER BY rowid",
+            (kind, int(group_id))
+        )
+        return {str(member_id): name for member_id, name in rows}
+
+    # Record the membership the user is now looking at and return its diff against the previous view
+    # (None for a group never viewed before). previous is the result of viewed_members, if already read.
+    def record_view(self, kind, group_id, members, previous=None):
+        group_id = int(group_id)
+        if previous is None:
+            previous = self.viewed_members(kind, group_id)
+        diff = diff_memberships(previous, members) if previous is not None else None
+        content_hash = membership_hash(members)
+        now = time.time()
+        with self.store.connection() as conn:
+            if diff is None:
+                conn.execute("DELETE FROM viewed_members WHERE kind = ? AND group_id = ?", (kind, group_id))
+                written = members.items()
+            else:
+                conn.executemany(
+                    "DELETE FROM viewed_members WHERE kind = ? AND group_id = ? AND member_id = ?",
+                    [(kind, group_id, int(member_id)) for member_id in diff["removed"]]
+                )
+                conn.executemany(
+                    "UPDATE viewed_members SET name = ? WHERE kind = ? AND group_id = ? AND member_id = ?",
+                    [(new, kind, group_id, int(member_id)) for member_id, (old, new) in diff["renamed"].items()]
+                )
+                written = diff["added"].items()
+            conn.executemany(
+                "INSERT OR REPLACE INTO viewed_members (kind, group_id, member_id, name) VALUES (?, ?, ?, ?)",
+                [(kind, group_id, int(member_id), name) for member_id, name in written]
+            )
+            conn.execute(
+                "INSERT INTO membership_snapshots (kind, group_id, content_hash, member_count, taken_at, viewed_hash, viewed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(kind, group_id) DO UPDATE SET content_hash = excluded.content_hash, "
+                "member_count = excluded.member_count, taken_at = excluded.taken_at, "
+                "viewed_hash = excluded.viewed_hash, viewed_at = excluded.viewed_at",
+                (kind, group_id, content_hash, len(members), now, content_hash, now)
+            )
+        if diff is not None:
+            logging.debug(f"Group {group_id} ({kind}) since last view: {summarize_diff(diff)}")
+        return diff
+
+    # Ids (str) of the groups of a kind whose members changed since they were last viewed
+    def changed_groups(self, kind):
+        rows = self.store.connection().execute(
+            "SELECT group_id FROM membership_snapshots WHERE kind = ? AND viewed_hash IS NOT NULL AND content_hash != viewed_hash",
+            (kind,)
+        )
+        return {str(group_id) for (group_id,) in rows}
+
+# Function to get the process-wide membership tracker of a server, backed by its inventory store
+def get_membership_tracker(jamf_url=None):
+    from src.inventory import get_inventory_store
+    store = get_inventory_store(jamf_url)
+    with _tracker_lock:
+        if store.path not in _trackers:
+            _trackers[store.path] = MembershipTracker(store)
+        return _trackers[store.path]
@@ -0,0 +1,155 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+# Upper bounds of the latency histogram buckets in milliseconds; slower requests fall in a last, open bucket
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Path segments that identify a single record (ids, or comma-separated id lists of a command batch)
+ID_SEGMENT = re.compile(r"^[0-9][0-9,]*$")
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+# Function to name the endpoint of a request URL, with record ids replaced so requests for different records add up
+# e.g. https://jamf.example.com/JSSResource/computers/id/42/subset/General -> JSSResource/computers/id/{id}/subset/General
+def endpoint_name(url):
+    path = urlsplit(url).path.strip("/")
+    return "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+# Function to log a payload at DEBUG level only when payload logging is switched on (JAMF_LOG_PAYLOADS=1)
+# The payload is formatted by the logging module, so nothing is formatted when it is switched off.
+def log_payload(message, payload):
+    if os.getenv("JAMF_LOG_PAYLOADS") == "1" and logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("%s: %s", message, payload)
+
+def _new_endpoint():
+    return {"requests": 0, "errors": 0, "retries": 0, "cache_hits": 0, "revalidated": 0,
+            "bytes": 0, "seconds": 0.0, "max_seconds": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+
+# Function to estimate a latency percentile in milliseconds from histogram buckets (the bucket's upper bound)
+def _percentile(buckets, max_ms, fraction):
+    total = sum(buckets)
+    if not total:
+        return None
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, buckets):
+        seen += count
+        if seen >= total * fraction:
+            return min(bound, round(max_ms, 2))
+    return round(max_ms, 2)
+
+# Process-wide counters for every Jamf request: per-endpoint latency histograms, bytes received,
+# errors, retries and cache hits, plus the time spent parsing responses.
+# Recording is a dict update under a lock, cheap enough to stay on for every request.
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.endpoints = {}
+            self.parsing = {}
+
+    def _endpoint(self, url):
+        name = endpoint_name(url)
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = _new_endpoint()
+        return stats
+
+    # A response (or a failure to get one) after `seconds`; size is the number of bytes received, if known
+    def record_request(self, url, seconds, size=None, failed=False):
+        milliseconds = seconds * 1000
+        bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound), len(LATENCY_BUCKETS_MS))
+        with self.lock:
+            stats = self._endpoint(url)
+            stats["requests"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["buckets"][bucket] += 1
+            if size:
+                stats["bytes"] += size
+            if failed:
+                stats["errors"] += 1
+
+    # Bytes of a streamed body, counted once it has been read
+    def record_bytes(self, url, size):
+        if not size:
+            return
+        with self.lock:
+            self._endpoint(url)["bytes"] += size
+
+    # counter is "retries", "cache_hits" or "revalidated"
+    def record(self, url, counter):
+        with self.lock:
+            self._endpoint(url)[counter] += 1
+
+    # Time spent turning one response into Python data, by parser name
+    def record_parse(self, name, seconds):
+        with self.lock:
+            stats = self.parsing.setdefault(name, {"records": 0, "seconds": 0.0, "max_seconds": 0.0})
+            stats["records"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    # JSON-serialisable copy of everything recorded, with the request governor and response cache counters
+    def snapshot(self):
+        with self.lock:
+            endpoints = {}
+            for name, stats in sorted(self.endpoints.items()):
+                max_ms = stats["max_seconds"] * 1000
+                endpoints[name] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "cache_hits": stats["cache_hits"],
+                    "revalidated": stats["revalidated"],
+                    "bytes": stats["bytes"],
+                    "mean_ms": round(stats["seconds"] * 1000 / stats["requests"], 2) if stats["requests"] else None,
+                    "p50_ms": _percentile(stats["buckets"], max_ms, 0.5),
+                    "p95_ms": _percentile(stats["buckets"], max_ms, 0.95),
+                    "max_ms": round(max_ms, 2),
+                    "histogram": {f"<={bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, stats["buckets"])}
+                                 | {f">{LATENCY_BUCKETS_MS[-1]}ms": stats["buckets"][-1]},
+                }
+            parsing = {
+                name: {
+                    "records": stats["records"],
+                    "total_ms": round(stats["seconds"] * 1000, 2),
+                    "mean_ms": round(stats["seconds"] * 1000 / stats["records"], 3),
+                    "max_ms": round(stats["max_seconds"] * 1000, 3),
+                }
+                for name, stats in sorted(self.parsing.items())
+            }
+            snapshot = {"started": self.started, "uptime": round(time.time() - self.started, 1),
+                        "endpoints": endpoints, "parsing": parsing}
+
+        # Imported here so recording metrics never pulls in requests
+        from src.governor import get_governor
+        from src.cache import get_response_cache
+        snapshot["governor"] = get_governor().stats()
+        snapshot["cache"] = dict(get_response_cache().stats)
+        return snapshot
+
+    # Write a snapshot to a JSON file and return its path
+    def export(self, path):
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+        logging.info(f"Exported diagnostics to {path}")
+        return path
+
+# Function to get the process-wide metrics
+def get_metrics():
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
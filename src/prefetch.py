@@ -0,0 +1,208 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import load_token
+from src.api import fetch_computer_info, fetch_mobile_device_info, extract_computer_info, extract_mobile_device_info, format_section, DETAIL_SECTIONS
+from src.inventory import get_inventory_store
+
+# Number of parsed detail records kept in memory (override with JAMF_DETAIL_CACHE_SIZE)
+DEFAULT_DETAIL_CACHE_SIZE = 500
+# Number of detail requests in flight while prefetching (override with JAMF_PREFETCH_WORKERS)
+DEFAULT_PREFETCH_WORKERS = 4
+# Rows above and below the visible window that are prefetched too (override with JAMF_PREFETCH_AHEAD)
+DEFAULT_PREFETCH_AHEAD = 10
+
+# How to fetch and parse the details of each kind of group member
+DETAIL_LOADERS = {
+    "computers": (fetch_computer_info, extract_computer_info),
+    "devices": (fetch_mobile_device_info, extract_mobile_device_info),
+}
+
+# Inventory column holding the report date that a cached detail record is only valid for
+REPORT_DATE_COLUMNS = {"computers": "report_date_utc", "devices": "last_inventory_update_utc"}
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+# In-memory LRU of parsed detail records keyed by (kind, id, report date), and of formatted
+# detail tabs keyed by (kind, id, report date, tab title)
+class DetailCache:
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or int(os.getenv("JAMF_DETAIL_CACHE_SIZE", DEFAULT_DETAIL_CACHE_SIZE))
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key):
+        with self.lock:
+            info = self.entries.get(key)
+            if info is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return info
+
+    def put(self, key, info):
+        with self.lock:
+            self.entries[key] = info
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+# Fetches member details ahead of the user and serves them from a DetailCache
+# prefetch() is called with the rows around the visible window of a member list; only the
+# latest call per kind is worked through, so scrolling away or picking another group drops
+# the queued requests of the previous one. get_details() joins a prefetch already in flight.
+class DetailPrefetcher:
+    def __init__(self, cache=None, max_workers=None):
+        self.cache = cache or DetailCache()
+        max_workers = max_workers or int(os.getenv("JAMF_PREFETCH_WORKERS", DEFAULT_PREFETCH_WORKERS))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.lock = threading.Lock()
+        self.generations = {}
+        # Queued or running fetches by key, and the latest prefetch generation that asked for each
+        self.pending = {}
+        self.wanted = {}
+
+    # Cache key for a member; the report date comes from the inventory store when it knows the record
+    def key(self, kind, member_id):
+        try:
+            record = get_inventory_store().get(kind, member_id)
+        except Exception as e:
+            logging.debug(f"Inventory lookup for {kind} {member_id} failed: {e}")
+            record = None
+        report_date = record[REPORT_DATE_COLUMNS[kind]] if record else None
+        return (kind, str(member_id), report_date)
+
+    # Parsed details if they are already cached, without any network access
+    def cached(self, kind, member_id):
+        return self.cache.get(self.key(kind, member_id))
+
+    # Parsed details of a member, fetching them if needed (blocks, so call it from a worker thread)
+    def get_details(self, kind, member_id):
+        key = self.key(kind, member_id)
+        info = self.cache.get(key)
+        if info is not None:
+            return info
+        with self.lock:
+            future = self.pending.get(key)
+        if future is not None:
+            info = future.result()
+            if info is not None:
+                return info
+        return self._load(key)
+
+    # Formatted text of a detail tab if it is already cached, without any network access
+    def cached_section(self, kind, member_id, title):
+        return self.cache.get(self.key(kind, member_id) + (title,))
+
+    # Formatted text of one detail tab (see DETAIL_SECTIONS), fetching only that subset on first use (blocks)
+    def get_section(self, kind, member_id, title):
+        key = self.key(kind, member_id) + (title,)
+        text = self.cache.get(key)
+        if text is not None:
+            return text
+        credentials = self._credentials()
+        if not credentials:
+            return None
+
+        fetch_info, extract_info = DETAIL_LOADERS[kind]
+        subset, section_tag = DETAIL_SECTIONS[kind][title]
+        data = fetch_info(credentials[0], member_id, credentials[1], subset=subset)
+        if not data:
+            return None
+        text = format_section(data, section_tag)
+        self.cache.put(key, text)
+        return text
+
+    # Queue detail requests for the given members, superseding the previous prefetch of this kind
+    def prefetch(self, kind, member_ids):
+        with self.lock:
+            generation = self.generations.get(kind, 0) + 1
+            self.generations[kind] = generation
+        queued = 0
+        for member_id in member_ids:
+            key = self.key(kind, member_id)
+            if key in self.cache:
+                continue
+            with self.lock:
+                self.wanted[key] = generation
+                if key in self.pending:
+                    continue
+                self.pending[key] = self.executor.submit(self._prefetch_one, key)
+            queued += 1
+        if queued:
+            logging.debug(f"Prefetching details of {queued} {kind}")
+
+    def _prefetch_one(self, key):
+        try:
+            with self.lock:
+                if self.wanted.get(key) != self.generations.get(key[0]):
+                    return None
+            return self._load(key)
+        except Exception as e:
+            logging.debug(f"Prefetch of {key[0]} {key[1]} failed: {e}")
+            return None
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+                self.wanted.pop(key, None)
+
+    def _load(self, key):
+        kind, member_id, report_date = key
+        credentials = self._credentials()
+        if not credentials:
+            return None
+
+        fetch_info, extract_info = DETAIL_LOADERS[kind]
+        data = fetch_info(credentials[0], member_id, credentials[1])
+        if not data:
+            return None
+        info = extract_info(data)
+        self.cache.put(key, info)
+        return info
+
+    # (jamf_url, token) of the current session, or None when not logged in
+    def _credentials(self):
+        token = load_token()
+        if not token:
+            logging.error("No token found!")
+            return None
+
+        jamf_url = os.getenv("JAMF_PRO_URL", "")
+        if not jamf_url:
+            logging.error("No Jamf URL found!")
+            return None
+        return jamf_url, token
+
+# Function to get the shared detail prefetcher
+def get_prefetcher():
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = DetailPrefetcher()
+        return _prefetcher
+
+# Function to get the member ids to prefetch around the visible window of a member list
+# rows are (name, id) tuples; the visible rows come first, then neighbours outward from the window
+def rows_to_prefetch(rows, offset, visible, ahead=None):
+    ahead = int(os.getenv("JAMF_PREFETCH_AHEAD", DEFAULT_PREFETCH_AHEAD)) if ahead is None else ahead
+    end = min(len(rows), offset + visible)
+    ids = [row[1] for row in rows[offset:end]]
+    for step in range(ahead):
+        if end + step < len(rows):
+            ids.append(rows[end + step][1])
+        if offset - 1 - step >= 0:
+            ids.append(rows[offset - 1 - step][1])
+    return ids
@@ -0,0 +1,131 @@
+import os
+import logging
+from urllib.parse import urlencode
+from src.client import JamfClient
+
+# Records per page (override with JAMF_INVENTORY_PAGE_SIZE); Jamf Pro caps page-size at MAX_PAGE_SIZE
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 2000
+# Most records a search against the server returns
+DEFAULT_SEARCH_LIMIT = 500
+
+# Jamf Pro API inventory endpoints by kind; both take page, page-size, section, filter (RSQL) and sort
+# (the plain api/v2/mobile-devices listing takes neither section nor filter, its /detail variant does)
+INVENTORY_ENDPOINTS = {
+    "computers": "api/v1/computers-inventory",
+    "devices": "api/v2/mobile-devices/detail",
+}
+
+# Sections each endpoint can return; only GENERAL is returned when none is asked for
+SECTIONS = {
+    "computers": ("GENERAL", "DISK_ENCRYPTION", "PURCHASING", "APPLICATIONS", "STORAGE", "USER_AND_LOCATION",
+                  "CONFIGURATION_PROFILES", "PRINTERS", "SERVICES", "HARDWARE", "LOCAL_USER_ACCOUNTS", "CERTIFICATES",
+                  "ATTACHMENTS", "PLUGINS", "PACKAGE_RECEIPTS", "FONTS", "SECURITY", "OPERATING_SYSTEM",
+                  "LICENSED_SOFTWARE", "IBEACONS", "SOFTWARE_UPDATES", "EXTENSION_ATTRIBUTES", "CONTENT_CACHING",
+                  "GROUP_MEMBERSHIPS"),
+    "devices": ("GENERAL", "HARDWARE", "USER_AND_LOCATION", "PURCHASING", "SECURITY", "APPLICATIONS", "EBOOKS",
+                "NETWORK", "SERVICE_SUBSCRIPTIONS", "CERTIFICATES", "PROFILES", "USER_PROFILES",
+                "EXTENSION_ATTRIBUTES", "GROUPS", "SHARED_USERS"),
+}
+
+# Where the id, name and serial number of a record are, as dotted paths usable in filters and sorts
+RECORD_FIELDS = {
+    "computers": {"id": "id", "name": "general.name", "serial_number": "hardware.serialNumber"},
+    "devices": {"id": "mobileDeviceId", "name": "general.displayName", "serial_number": "hardware.serialNumber"},
+}
+
+# Function to quote a value for an RSQL filter ("*" stays a wildcard)
+def rsql_value(value):
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+# Function to build one RSQL comparison, e.g. rsql("general.name", "MAC*") -> general.name=="MAC*"
+# A list or tuple value becomes =in= (or =out= with operator "!=").
+def rsql(field, value, operator="=="):
+    if isinstance(value, (list, tuple, set)):
+        operator = "=out=" if operator == "!=" else "=in="
+        return f"{field}{operator}({','.join(rsql_value(item) for item in value)})"
+    return f"{field}{operator}{rsql_value(value)}"
+
+# Function to join RSQL expressions so that all of them must match
+def rsql_all(*expressions):
+    expressions = [expression for expression in expressions if expression]
+    return ";".join(f"({expression})" if "," in expression else expression for expression in expressions)
+
+# Function to join RSQL expressions so that any of them may match
+def rsql_any(*expressions):
+    expressions = [expression for expression in expressions if expression]
+    return ",".join(expressions)
+
+# Function to read a dotted field ("general.name") of a Jamf Pro API record, or None
+def record_value(record, field):
+    value = record
+    for key in field.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+# Function to build the endpoint of one inventory page
+# sort is a list of "field:asc"/"field:desc" entries, sections a list of SECTIONS names.
+def inventory_endpoint(kind, page=0, page_size=DEFAULT_PAGE_SIZE, sections=(), rsql_filter=None, sort=()):
+    unknown = [section for section in sections if section not in SECTIONS[kind]]
+    if unknown:
+        raise ValueError(f"Unknown {kind} inventory section: {', '.join(unknown)}")
+    params = [("page", page), ("page-size", page_size)]
+    params += [("section", section) for section in sections]
+    if sort:
+        params.append(("sort", ",".join(sort)))
+    if rsql_filter:
+        params.append(("filter", rsql_filter))
+    return f"{INVENTORY_ENDPOINTS[kind]}?{urlencode(params, safe=',:*')}"
+
+# Function to yield the pages of a Jamf Pro API inventory query, one request per page as they are asked for
+# Each page is {"page": n, "total": totalCount, "results": [records]}. Filtering and sorting happen on the
+# server, so only matching records are downloaded; stop iterating to stop fetching.
+# ttl is passed to JamfClient (0 bypasses the response cache).
+def iter_inventory_pages(jamf_url, kind, sections=(), rsql_filter=None, sort=(), page_size=None, token=None, ttl=None):
+    if page_size is None:
+        page_size = int(os.getenv("JAMF_INVENTORY_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    client = JamfClient(jamf_url, token, ttl)
+    page = 0
+    fetched = 0
+    while True:
+        data = client.get_json(inventory_endpoint(kind, page, page_size, sections, rsql_filter, sort))
+        if data is None:
+            raise RuntimeError(f"Could not fetch page {page} of the {kind} inventory")
+        results = data.get("results", [])
+        total = data.get("totalCount", 0)
+        fetched += len(results)
+        yield {"page": page, "total": total, "results": results}
+        if len(results) < page_size or fetched >= total:
+            return
+        page += 1
+
+# Function to yield the records of a Jamf Pro API inventory query, fetching pages lazily
+# limit stops after that many records; pages are then no larger than needed.
+def iter_inventory(jamf_url, kind, sections=(), rsql_filter=None, sort=(), page_size=None, limit=None, token=None, ttl=None):
+    if limit is not None:
+        if limit <= 0:
+            return
+        page_size = min(page_size or int(os.getenv("JAMF_INVENTORY_PAGE_SIZE", DEFAULT_PAGE_SIZE)), limit)
+    count = 0
+    for page in iter_inventory_pages(jamf_url, kind, sections, rsql_filter, sort, page_size, token, ttl):
+        for record in page["results"]:
+            yield record
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+# Function to search records by name (substring) or exact serial number on the server
+# Returns (name, id) rows sorted by name, for member lists of the GUI.
+def search_inventory(jamf_url, kind, term, limit=DEFAULT_SEARCH_LIMIT, token=None):
+    fields = RECORD_FIELDS[kind]
+    term = term.strip()
+    rsql_filter = rsql_any(rsql(fields["name"], f"*{term}*"), rsql(fields["serial_number"], term)) if term else None
+    records = iter_inventory(jamf_url, kind, sections=("GENERAL", "HARDWARE"), rsql_filter=rsql_filter,
+                             sort=(f"{fields['name']}:asc",), limit=limit, token=token)
+    rows = [(record_value(record, fields["name"]), str(record_value(record, fields["id"]))) for record in records]
+    logging.debug(f"Server search for {term!r} found {len(rows)} {kind}")
+    return rows
@@ -0,0 +1,184 @@
+import io
+import re
+import json
+import gzip
+import time
+import base64
+import atexit
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from src.governor import GovernedAdapter
+
+ARCHIVE_VERSION = 1
+# Response headers kept in an archive; everything else (cookies, server details...) is dropped
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After", "Cache-Control")
+# Endpoints whose JSON responses carry credentials, scrubbed before they are written
+TOKEN_PATHS = re.compile(r"api/(oauth/token|v1/auth/token|v1/auth/keep-alive)")
+# JSON keys and query parameters whose values are replaced with REDACTED
+SECRET_KEYS = re.compile(r"token|secret|password|client_id", re.IGNORECASE)
+REDACTED = "REDACTED"
+
+# Function to drop the scheme and host of a URL and scrub secret query parameters, giving the key an exchange is stored under
+def archive_url(url):
+    parts = urlsplit(url)
+    query = [(name, REDACTED if SECRET_KEYS.search(name) else value) for name, value in parse_qsl(parts.query, keep_blank_values=True)]
+    return parts.path + (f"?{urlencode(query, safe='&=,:')}" if query else "")
+
+def _scrub(value):
+    if isinstance(value, dict):
+        return {key: REDACTED if SECRET_KEYS.search(key) and not isinstance(item, (dict, list)) else _scrub(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_scrub(item) for item in value]
+    return value
+
+# Function to remove credentials from a response body before it is archived
+def scrub_body(path, body):
+    if not TOKEN_PATHS.search(path):
+        return body
+    try:
+        return json.dumps(_scrub(json.loads(body))).encode()
+    except ValueError:
+        return REDACTED.encode()
+
+# Compact archive of HTTP exchanges: gzip-compressed JSON lines, each distinct body stored once
+# Line types: "archive" (header), "body" (sha1 and content) and "exchange" (request key, status,
+# kept headers, body sha1, latency to the headers and total duration in seconds).
+# Request headers and bodies are never stored, so bearer tokens and client secrets stay out of it.
+class ArchiveWriter:
+    def __init__(self, path, base_url=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.bodies = set()
+        self.started = time.monotonic()
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"type": "archive", "version": ARCHIVE_VERSION, "created": time.time(), "base_url": base_url})
+        atexit.register(self.close)
+        logging.info(f"Recording HTTP exchanges to {path}")
+
+    def record(self, request, status=None, headers=None, body=b"", latency=0.0, duration=0.0, error=None):
+        path = archive_url(request.url)
+        exchange = {"type": "exchange", "method": request.method, "url": path,
+                    "accept": request.headers.get("Accept", "*/*"), "offset": round(time.monotonic() - self.started, 4),
+                    "latency": round(latency, 4), "duration": round(duration, 4)}
+        if error is not None:
+            exchange["error"] = error
+        else:
+            body = scrub_body(path, body or b"")
+            sha = hashlib.sha1(body).hexdigest()
+            exchange.update(status=status, headers={name: headers[name] for name in KEPT_HEADERS if name in headers}, body=sha)
+        with self.lock:
+            if self.file is None:
+                return
+            if error is None and sha not in self.bodies:
+                self.bodies.add(sha)
+                try:
+                    entry = {"type": "body", "sha": sha, "text": body.decode("utf-8")}
+                except UnicodeDecodeError:
+                    entry = {"type": "body", "sha": sha, "base64": base64.b64encode(body).decode()}
+                self._write(entry)
+            self._write(exchange)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+# Recorded exchanges, served back in the order they were recorded for each (method, URL, Accept)
+# Once the recordings of a request have all been served, the last one is repeated.
+class Archive:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.header = {}
+        self.bodies = {}
+        self.exchanges = defaultdict(deque)
+        self.misses = 0
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                entry = json.loads(line)
+                if entry["type"] == "archive":
+                    self.header = entry
+                elif entry["type"] == "body":
+                    self.bodies[entry["sha"]] = entry["text"].encode("utf-8") if "text" in entry else base64.b64decode(entry["base64"])
+                elif entry["type"] == "exchange":
+                    self.exchanges[(entry["method"], entry["url"], entry["accept"])].append(entry)
+        logging.info(f"Replaying {sum(len(queue) for queue in self.exchanges.values())} HTTP exchanges from {path}")
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.exchanges.values())
+
+    # Next recorded exchange for a request (any Accept header if none matches exactly), or None
+    def next_exchange(self, method, url, accept):
+        key = (method, archive_url(url), accept or "*/*")
+        with self.lock:
+            queue = self.exchanges.get(key)
+            if queue is None:
+                queue = next((queue for (m, u, _), queue in self.exchanges.items() if m == key[0] and u == key[1]), None)
+            if not queue:
+                self.misses += 1
+                return None
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def body(self, exchange):
+        return self.bodies.get(exchange["body"], b"")
+
+# Transport that sends requests to the server and records every exchange to an ArchiveWriter
+# Bodies are read in full to be recorded, including those of streamed responses, which are then
+# served to the caller from memory.
+class RecordingTransport(HTTPAdapter):
+    def __init__(self, archive=None, **kwargs):
+        self.archive = archive
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        start = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.archive.record(request, latency=time.monotonic() - start, error=type(e).__name__)
+            raise
+        latency = time.monotonic() - start
+        body = response.content
+        self.archive.record(request, response.status_code, response.headers, body, latency, time.monotonic() - start)
+        return response
+
+# Transport that answers requests from an Archive instead of the network, waiting the recorded latency
+# (scaled by speed; 0 answers at once). Requests that were never recorded get a 404.
+class ReplayTransport(HTTPAdapter):
+    def __init__(self, archive=None, speed=1.0, **kwargs):
+        self.archive = archive
+        self.speed = speed
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        exchange = self.archive.next_exchange(request.method, request.url, request.headers.get("Accept"))
+        if exchange is None:
+            logging.warning(f"No recorded response for {request.method} {archive_url(request.url)}")
+            return self.build_response(request, HTTPResponse(body=io.BytesIO(b"Not recorded"), status=404, preload_content=False))
+        if self.speed:
+            time.sleep(exchange["duration"] / self.speed)
+        if "error" in exchange:
+            error = getattr(requests.exceptions, exchange["error"], requests.exceptions.ConnectionError)
+            raise error(f"Recorded {exchange['error']}", request=request)
+        body = self.archive.body(exchange)
+        raw = HTTPResponse(body=io.BytesIO(body), headers=dict(exchange["headers"], **{"Content-Length": str(len(body))}),
+                           status=exchange["status"], preload_content=False, decode_content=False)
+        return self.build_response(request, raw)
+
+# Governed adapters that record to, or replay from, an archive (see src/session.py)
+class RecordingAdapter(GovernedAdapter, RecordingTransport):
+    pass
+
+class ReplayAdapter(GovernedAdapter, ReplayTransport):
+    pass
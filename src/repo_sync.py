@@ -0,0 +1,84 @@
+import os
+import time
+import shutil
+import logging
+import subprocess
+from src.mdm_catalog import REPO_DIR, read_git_head, get_mdm_catalog, invalidate_mdm_catalog
+
+# Defaults for the MDM command repository (override with environment variables)
+DEFAULT_REPO_URL = "https://github.com/apple/device-management.git"
+DEFAULT_REPO_PATHS = "mdm/commands"
+DEFAULT_REPO_MAX_AGE = 86400
+GIT_TIMEOUT = 300
+
+# File inside .git whose mtime records the last successful sync
+SYNC_MARKER = "jamfcommander-synced"
+
+def run_git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, timeout=GIT_TIMEOUT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+# Function to get the seconds since the last successful sync of a checkout, or None if it never synced
+def repo_age(repo_dir=REPO_DIR):
+    try:
+        return time.time() - os.path.getmtime(os.path.join(repo_dir, ".git", SYNC_MARKER))
+    except OSError:
+        return None
+
+# Function to make a shallow, sparse checkout of the repository containing only the given directories
+# The clone goes to a temporary directory first so an interrupted clone never leaves a broken checkout.
+def clone_repo(repo_url, repo_dir, paths):
+    partial_dir = f"{repo_dir}.partial"
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(repo_dir) or ".", exist_ok=True)
+    logging.info(f"Cloning {', '.join(paths)} of {repo_url} to {repo_dir}")
+    run_git("clone", "--depth", "1", "--filter=blob:none", "--sparse", "--no-tags", repo_url, partial_dir)
+    run_git("sparse-checkout", "set", *paths, cwd=partial_dir)
+    shutil.rmtree(repo_dir, ignore_errors=True)
+    os.replace(partial_dir, repo_dir)
+
+# Function to move an existing checkout to the newest commit of its remote, keeping it shallow
+def update_repo(repo_url, repo_dir, paths):
+    logging.info(f"Updating {repo_dir}")
+    run_git("remote", "set-url", "origin", repo_url, cwd=repo_dir)
+    run_git("sparse-checkout", "set", *paths, cwd=repo_dir)
+    run_git("fetch", "--depth", "1", "--filter=blob:none", "--no-tags", "origin", "HEAD", cwd=repo_dir)
+    run_git("reset", "--hard", "FETCH_HEAD", cwd=repo_dir)
+
+# Function to bring the MDM command repository up to date and return the command catalog
+# Skips the network entirely while the checkout is younger than max_age seconds. A failed
+# fetch keeps the existing checkout. on_ready(catalog) is called once the catalog is loaded
+# (on the calling thread), and the catalog is returned as well.
+def sync_repo(repo_dir=REPO_DIR, repo_url=None, paths=None, max_age=None, force=False, on_ready=None):
+    repo_url = repo_url or os.getenv("JAMF_MDM_REPO_URL", DEFAULT_REPO_URL)
+    if paths is None:
+        paths = [path.strip() for path in os.getenv("JAMF_MDM_REPO_PATHS", DEFAULT_REPO_PATHS).split(",") if path.strip()]
+    if max_age is None:
+        max_age = int(os.getenv("JAMF_MDM_REPO_MAX_AGE", DEFAULT_REPO_MAX_AGE))
+
+    start = time.perf_counter()
+    age = repo_age(repo_dir)
+    head = read_git_head(repo_dir)
+    if head and age is not None and age < max_age and not force:
+        logging.debug(f"MDM command repository synced {age:.0f}s ago, skipping fetch")
+    else:
+        try:
+            if head:
+                update_repo(repo_url, repo_dir, paths)
+            else:
+                clone_repo(repo_url, repo_dir, paths)
+            with open(os.path.join(repo_dir, ".git", SYNC_MARKER), "w"):
+                pass
+            if read_git_head(repo_dir) != head:
+                invalidate_mdm_catalog()
+            logging.info(f"MDM command repository synced in {time.perf_counter() - start:.2f}s")
+        except FileNotFoundError:
+            logging.error("git is not installed; MDM commands are unavailable")
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
+            stderr = getattr(e, "stderr", None)
+            logging.error(f"Error syncing MDM command repository: {e}" + (f": {stderr.strip()}" if stderr else ""))
+
+    catalog = get_mdm_catalog()
+    if on_ready:
+        on_ready(catalog)
+    return catalog
@@ -0,0 +1,180 @@
+import os
+import re
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from src.inventory import get_inventory_store, TABLES
+
+# Fields looked up by exact value, and the inventory column holding each one per kind
+EXACT_FIELDS = {
+    "computers": {"id": "id", "serial_number": "serial_number", "mac_address": "mac_address", "ip_address": "ip_address"},
+    "devices": {"id": "id", "serial_number": "serial_number", "mac_address": "wifi_mac_address", "ip_address": "ip_address"},
+}
+
+_MAC_SEPARATORS = re.compile(r"[:\-\.]")
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+# Function to normalise a value for exact lookups (case-insensitive, MAC separators ignored)
+def normalize_exact(value):
+    value = str(value).strip().lower()
+    stripped = _MAC_SEPARATORS.sub("", value)
+    if len(stripped) == 12 and all(c in "0123456789abcdef" for c in stripped):
+        return stripped
+    return value
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+# In-memory index over records that each have an id, a name and optional exact-match fields
+# Names are searchable by substring through a trigram index (and by prefix for 1-2 character terms);
+# serial numbers, MAC/IP addresses and ids are hash lookups. Records can be added and removed one at a time.
+class SearchIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = {}
+        self.names = {}
+        self.trigram_index = defaultdict(set)
+        self.exact_index = defaultdict(set)
+        self.sorted_names = []
+        self.sorted_dirty = False
+        # Newest inventory synced_at already indexed (see refresh_record_index)
+        self.synced_until = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    # Add or replace a record; exact holds extra values (serial, MAC, IP...) to match exactly
+    def add(self, record_id, name, record, exact=()):
+        with self.lock:
+            self._remove(record_id)
+            name_key = (name or "").lower()
+            self.records[record_id] = record
+            self.names[record_id] = (name_key, tuple(normalize_exact(value) for value in exact if value))
+            for gram in trigrams(name_key):
+                self.trigram_index[gram].add(record_id)
+            for value in self.names[record_id][1]:
+                self.exact_index[value].add(record_id)
+            self.sorted_dirty = True
+
+    def remove(self, record_id):
+        with self.lock:
+            self._remove(record_id)
+
+    # Return matching records sorted by name: exact field hits first, otherwise name matches
+    def search(self, term, limit=None):
+        start = time.perf_counter()
+        term = term.strip()
+        with self.lock:
+            if not term:
+                ids = list(self.records)
+            else:
+                ids = list(self.exact_index.get(normalize_exact(term), ()))
+                if not ids:
+                    ids = self._search_names(term.lower())
+            ids.sort(key=lambda record_id: self.names[record_id][0])
+            results = [self.records[record_id] for record_id in ids]
+        if limit is not None:
+            results = results[:limit]
+        logging.debug(f"Search for {term!r} matched {len(results)} of {len(self.records)} records in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return results
+
+    def _search_names(self, term):
+        if len(term) < 3:
+            return self._search_prefix(term)
+        candidates = None
+        for gram in sorted(trigrams(term), key=lambda gram: len(self.trigram_index.get(gram, ()))):
+            matches = self.trigram_index.get(gram)
+            if not matches:
+                return []
+            candidates = set(matches) if candidates is None else candidates & matches
+        return [record_id for record_id in candidates if term in self.names[record_id][0]]
+
+    # Rebuild the sorted name list used by prefix searches (done once after bulk updates)
+    def prepare(self):
+        with self.lock:
+            self._sort_names()
+
+    def _sort_names(self):
+        if self.sorted_dirty:
+            self.sorted_names = sorted((name_key, record_id) for record_id, (name_key, exact) in self.names.items())
+            self.sorted_dirty = False
+
+    def _search_prefix(self, term):
+        self._sort_names()
+        position = bisect.bisect_left(self.sorted_names, (term,))
+        ids = []
+        while position < len(self.sorted_names) and self.sorted_names[position][0].startswith(term):
+            ids.append(self.sorted_names[position][1])
+            position += 1
+        return ids
+
+    def _remove(self, record_id):
+        if record_id not in self.records:
+            return
+        name_key, exact = self.names.pop(record_id)
+        del self.records[record_id]
+        for gram in trigrams(name_key):
+            ids = self.trigram_index.get(gram)
+            if ids is not None:
+                ids.discard(record_id)
+                if not ids:
+                    del self.trigram_index[gram]
+        for value in exact:
+            ids = self.exact_index.get(value)
+            if ids is not None:
+                ids.discard(record_id)
+                if not ids:
+                    del self.exact_index[value]
+        self.sorted_dirty = True
+
+# Function to get a named index ("computers", "devices", "computers_groups" or "devices_groups")
+# Indexes are kept per server (by default the current JAMF_PRO_URL), like the inventory stores they index.
+def get_search_index(name, jamf_url=None):
+    key = ((jamf_url or os.getenv("JAMF_PRO_URL", "")).rstrip("/").lower(), name)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SearchIndex()
+        return _indexes[key]
+
+# Function to (re)index the groups of a kind from a fetch_computer_groups style listing
+def index_groups(kind, groups):
+    index = get_search_index(f"{kind}_groups")
+    listed = {group["id"] for group in groups}
+    for record_id in [record_id for record_id in index.records if record_id not in listed]:
+        index.remove(record_id)
+    for group in groups:
+        index.add(group["id"], group["name"], group, exact=(group["id"],))
+    index.prepare()
+    return index
+
+# Function to bring the computer or device index in line with the inventory store
+# Only records synced since the last refresh are re-indexed, and records gone from the store are dropped.
+def refresh_record_index(kind, jamf_url=None):
+    store = get_inventory_store(jamf_url)
+    index = get_search_index(kind, jamf_url)
+    fields = EXACT_FIELDS[kind]
+    table = TABLES[kind]
+    conn = store.connection()
+    since = index.synced_until
+
+    stored_ids = {row[0] for row in conn.execute(f"SELECT id FROM {table}")}
+    for record_id in [record_id for record_id in index.records if record_id not in stored_ids]:
+        index.remove(record_id)
+
+    synced_until = since
+    for row in conn.execute(f"SELECT * FROM {table} WHERE synced_at > ?", (since,)):
+        record = dict(row)
+        index.add(record["id"], record["name"], record, exact=[record[column] for column in fields.values()])
+        synced_until = max(synced_until, record["synced_at"] or 0)
+    index.synced_until = synced_until
+    index.prepare()
+    return index
+
+# Function to refresh both record indexes after an inventory sync
+def refresh_search_indexes(jamf_url=None):
+    for kind in TABLES:
+        refresh_record_index(kind, jamf_url)
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlparse
+
+import requests
+from src.governor import GovernedAdapter, get_governor
+from src.metrics import get_metrics
+
+# Defaults for the shared session (override with environment variables)
+DEFAULT_POOL_SIZE = 10
+# Replay speed: recorded latencies are divided by it (2 replays twice as fast, 0 without waiting)
+DEFAULT_REPLAY_SPEED = 1.0
+PREWARM_TIMEOUT = 5
+
+_session = None
+_session_lock = threading.Lock()
+_prewarmed_hosts = set()
+
+# Session that records the latency and size of every response in the shared metrics (see src/metrics.py)
+# For streamed responses the latency is the time to the headers; their bytes are counted by the reader.
+class MeteredSession(requests.Session):
+    def send(self, request, **kwargs):
+        metrics = get_metrics()
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.exceptions.RequestException:
+            metrics.record_request(request.url, time.perf_counter() - start, failed=True)
+            raise
+        size = None if kwargs.get("stream") else response_size(response)
+        metrics.record_request(request.url, time.perf_counter() - start, size, failed=response.status_code >= 400)
+        return response
+
+# Function to get the bytes of a response body read so far as sent on the wire (before decompression), or None
+def response_size(response):
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+# Function to build the transport adapter of a session
+# JAMF_HTTP_REPLAY answers every request from a recorded archive instead of the network, and
+# JAMF_HTTP_RECORD records every exchange to a new archive (see src/recording.py).
+def create_adapter(governor, pool_size):
+    replay_path = os.getenv("JAMF_HTTP_REPLAY")
+    record_path = os.getenv("JAMF_HTTP_RECORD")
+    if replay_path:
+        from src.recording import Archive, ReplayAdapter
+        speed = float(os.getenv("JAMF_REPLAY_SPEED", DEFAULT_REPLAY_SPEED))
+        return ReplayAdapter(governor, archive=Archive(replay_path), speed=speed, pool_connections=pool_size, pool_maxsize=pool_size)
+    if record_path:
+        from src.recording import ArchiveWriter, RecordingAdapter
+        archive = ArchiveWriter(record_path, os.getenv("JAMF_PRO_URL"))
+        return RecordingAdapter(governor, archive=archive, pool_connections=pool_size, pool_maxsize=pool_size)
+    return GovernedAdapter(governor, pool_connections=pool_size, pool_maxsize=pool_size)
+
+# Function to build a session with keep-alive connection pooling
+# Rate limiting, retries and backoff are handled by the governor (see src/governor.py).
+def create_session(pool_size=None, governor=None):
+    if pool_size is None:
+        pool_size = int(os.getenv("JAMF_POOL_SIZE", DEFAULT_POOL_SIZE))
+    governor = governor or get_governor()
+
+    adapter = create_adapter(governor, pool_size)
+
+    session = MeteredSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    logging.debug(f"Created HTTP session (pool size {pool_size}, {governor.max_rps:g} requests/s, {governor.max_in_flight} in flight)")
+    return session
+
+# Function to get the process-wide session shared by every Jamf API call
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+# Function to close the shared session and drop its pooled connections
+def reset_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        _prewarmed_hosts.clear()
+
+# Function to open a pooled connection to the Jamf Pro server ahead of the first API call
+def prewarm_connection(jamf_url):
+    jamf_url = jamf_url.strip()
+    if not jamf_url:
+        return
+    if not jamf_url.startswith("http://") and not jamf_url.startswith("https://"):
+        jamf_url = f"https://{jamf_url}"
+
+    parsed = urlparse(jamf_url)
+    if not parsed.hostname or "." not in parsed.hostname:
+        return
+    base_url = f"{parsed.scheme}://{parsed.netloc}"
+    if base_url in _prewarmed_hosts:
+        return
+    _prewarmed_hosts.add(base_url)
+
+    def warm():
+        try:
+            get_session().head(base_url, timeout=PREWARM_TIMEOUT, allow_redirects=False)
+            logging.debug(f"Pre-warmed connection to {base_url}")
+        except requests.exceptions.RequestException as e:
+            # Allow another attempt once the user has finished typing
+            _prewarmed_hosts.discard(base_url)
+            logging.debug(f"Pre-warm of {base_url} failed: {e}")
+
+    threading.Thread(target=warm, daemon=True).start()
@@ -0,0 +1,180 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+EXPIRY_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+# Seconds before expiry at which the token is renewed in the background (override with JAMF_TOKEN_REFRESH_MARGIN)
+DEFAULT_REFRESH_MARGIN = 60
+# Shortest wait before a background renewal, so a short-lived token can never be renewed in a loop
+MIN_REFRESH_DELAY = 1
+
+# Context manager holding an exclusive lock on a file shared by every JamfCommander process on the host
+@contextmanager
+def file_lock(lock_path):
+    with open(lock_path, "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Keeps the bearer token in memory and renews it before it expires
+# request_token() must return (token, expires_in) like get_token, or (None, None) on failure.
+# Only one renewal runs at a time: concurrent callers wait for it, and the file lock
+# lets other processes pick up a token minted here instead of requesting their own.
+class TokenManager:
+    def __init__(self, token_file, request_token, refresh_margin=None):
+        if refresh_margin is None:
+            refresh_margin = int(os.getenv("JAMF_TOKEN_REFRESH_MARGIN", DEFAULT_REFRESH_MARGIN))
+        self.token_file = token_file
+        self.lock_file = f"{token_file}.lock"
+        self.request_token = request_token
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.token = None
+        self.expiry = None
+        self.stored_at = None
+        self.lock = threading.Lock()
+        self.renewal = None
+        self.timer = None
+
+    # Return a valid token, renewing it only when the cached one has expired
+    def get_token(self):
+        with self.lock:
+            if self._is_valid():
+                return self.token
+
+        # Another process may already have written a fresh token
+        if self._read_file() and self._is_valid():
+            return self.token
+        logging.debug("Token expired or missing, renewing token")
+        return self.renew()
+
+    # Store a token obtained elsewhere (e.g. at login) and share it with other processes
+    def set_token(self, token, expiry_time):
+        with file_lock(self.lock_file):
+            self._write_file(token, expiry_time)
+        self._store(token, expiry_time)
+
+    # Forget the token in memory and on disk
+    def clear(self):
+        with self.lock:
+            self.token = None
+            self.expiry = None
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+        with file_lock(self.lock_file):
+            if os.path.exists(self.token_file):
+                os.remove(self.token_file)
+        logging.debug("Token cleared")
+
+    # Renew the token; concurrent callers share the renewal already in flight
+    def renew(self, force=False):
+        with self.lock:
+            renewal = self.renewal
+            if renewal is None:
+                self.renewal = threading.Event()
+        if renewal is not None:
+            renewal.wait()
+            with self.lock:
+                return self.token if self._is_valid() else None
+
+        try:
+            with file_lock(self.lock_file):
+                # Re-check under the lock in case another process renewed while we waited
+                if self._read_file() and not self._is_expiring() and not force:
+                    return self.token
+
+                token, expires_in = self.request_token()
+                if not token:
+                    logging.error("Token renewal failed")
+                    return None
+                expiry_time = datetime.utcnow() + timedelta(seconds=expires_in)
+                self._write_file(token, expiry_time)
+            self._store(token, expiry_time)
+            logging.debug("Token renewed and saved to file")
+            return token
+        finally:
+            with self.lock:
+                self.renewal.set()
+                self.renewal = None
+
+    def _is_valid(self):
+        return self.token is not None and datetime.utcnow() < self.expiry
+
+    def _is_expiring(self):
+        return self.token is None or datetime.utcnow() >= self.expiry - self._margin()
+
+    # Renew no earlier than halfway through the token's lifetime, however short the token lives
+    def _margin(self):
+        return min(self.refresh_margin, (self.expiry - self.stored_at) / 2)
+
+    def _store(self, token, expiry_time):
+        with self.lock:
+            self.token = token
+            self.expiry = expiry_time
+            self.stored_at = datetime.utcnow()
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+            if self.expiry <= self.stored_at:
+                # Already expired (e.g. read from an old file); get_token renews it when it is needed
+                return
+            delay = (self.expiry - self._margin() - datetime.utcnow()).total_seconds()
+            self.timer = threading.Timer(max(delay, MIN_REFRESH_DELAY), self._refresh_in_background)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _refresh_in_background(self):
+        logging.debug("Refreshing token ahead of expiry")
+        self.renew()
+
+    def _read_file(self):
+        if not os.path.exists(self.token_file):
+            return False
+        try:
+            with open(self.token_file, "r") as token_file:
+                token_data = json.load(token_file)
+            token = token_data.get("token")
+            expiry = token_data.get("expiry")
+            if not token or not expiry:
+                return False
+            expiry_time = datetime.strptime(expiry, EXPIRY_FORMAT)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error reading token file: {e}")
+            return False
+
+        if token != self.token:
+            logging.debug("Token loaded from file")
+            self._store(token, expiry_time)
+        return True
+
+    def _write_file(self, token, expiry_time):
+        token_data = {
+            "token": token,
+            "expiry": expiry_time.strftime(EXPIRY_FORMAT)
+        }
+        with open(self.token_file, "w") as token_file:
+            json.dump(token_data, token_file)
+        logging.debug(f"Token saved to {self.token_file}")
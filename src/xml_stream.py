@@ -0,0 +1,111 @@
+import json
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from src.metrics import get_metrics
+
+# Element tags that hold a group member in Classic API group documents
+MEMBER_TAGS = ("computer", "mobile_device")
+
+# Function to yield (name, id) for each group member as its element is decoded
+# chunks can be any iterable of bytes/str, e.g. response.iter_content() or [whole_body].
+# Processed members are detached from the tree so memory stays flat on very large groups.
+def iter_group_members(chunks):
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _drain_members(parser, stack)
+    parser.close()
+    yield from _drain_members(parser, stack)
+
+def _drain_members(parser, stack):
+    for event, elem in parser.read_events():
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag in MEMBER_TAGS and stack:
+            name = elem.findtext("name")
+            member_id = elem.findtext("id")
+            # Criteria and other sections can reuse the tag; members always carry an id
+            if member_id is not None:
+                yield (name, member_id)
+            stack[-1].remove(elem)
+
+# Function to read the top-level <size> of a Classic API listing, stopping as soon as it is seen
+# Returns None if the document has no top-level <size>.
+def read_size(chunks):
+    parser = ET.XMLPullParser(events=("start", "end"))
+    depth = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1 and elem.tag == "size":
+                return elem.text
+            if depth == 1:
+                # Drop finished top-level items so a listing without <size> is not held in memory
+                elem.clear()
+    return None
+
+# Function to split an iterable into lists of at most batch_size items
+def batched(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Extracts a fixed set of fields from the JSON form of a record document
+# fields is a sequence of (label, path) pairs, the path naming keys below the record
+# (e.g. "general/name"). The paths are split once; extract_json() then reads every field with a
+# few dictionary lookups and records its parse time.
+class FieldExtractor:
+    def __init__(self, fields, name="record"):
+        self.name = name
+        self.labels = [label for label, path in fields]
+        self.paths = [(label, path.split("/")) for label, path in fields]
+        self.lock = threading.Lock()
+        self.stats = {"records": 0, "seconds": 0.0}
+
+    # Return {label: text} in field order for a JSON document such as {"computer": {"general": {...}}};
+    # labels whose key is missing map to None. Values read as the text of the matching XML element
+    # would: "true"/"false", numbers as digits.
+    def extract_json(self, data):
+        start = time.perf_counter()
+        document = json.loads(data)
+        # The record sits under a single root key, like the root element of the XML document
+        record = next(iter(document.values())) if isinstance(document, dict) and len(document) == 1 else document
+        values = dict.fromkeys(self.labels)
+        for label, path in self.paths:
+            value = record
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            if values[label] is None:
+                values[label] = json_text(value)
+        return self._finish(values, start)
+
+    def _finish(self, values, start):
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.stats["records"] += 1
+            self.stats["seconds"] += elapsed
+        get_metrics().record_parse(f"{self.name} fields", elapsed)
+        logging.debug(f"Extracted {len(self.labels)} {self.name} fields in {elapsed * 1000:.2f} ms")
+        return values
+
+# Function to turn a JSON value into the text its XML element would hold (None for sections and lists)
+def json_text(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    return str(value)
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, os.path.join(ROOT_DIR, "benchmarks")]
+
+# Requests are not spaced and retries wait next to nothing, unless a test builds its own Governor
+os.environ.setdefault("JAMF_MAX_RPS", "0")
+os.environ.setdefault("JAMF_RETRY_BACKOFF", "0.01")
+
+from mock_jamf import Fleet, start_server  # noqa: E402
+import src.utils  # noqa: E402
+import src.session  # noqa: E402
+import src.governor  # noqa: E402
+import src.cache  # noqa: E402
+import src.counts  # noqa: E402
+import src.inventory  # noqa: E402
+import src.membership  # noqa: E402
+import src.search_index  # noqa: E402
+
+# Every test runs in its own directory, with a fresh process-wide session, governor, token manager,
+# response cache, inventory stores and search indexes (several keep paths relative to the working directory)
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src.session.reset_session()
+    monkeypatch.setattr(src.governor, "_governor", None)
+    monkeypatch.setattr(src.utils, "_token_manager", None)
+    monkeypatch.setattr(src.cache, "_cache", None)
+    monkeypatch.setattr(src.counts, "_unavailable", set())
+    monkeypatch.setattr(src.inventory, "_stores", {})
+    monkeypatch.setattr(src.membership, "_trackers", {})
+    monkeypatch.setattr(src.search_index, "_indexes", {})
+    return tmp_path
+
+# Function to start a mock Jamf Pro server for a test, logged in through the credentials file
+def start_jamf(monkeypatch, fleet=None, **options):
+    server = start_server(fleet or Fleet(computers=60, devices=60, groups=4), **options)
+    monkeypatch.setenv("JAMF_PRO_URL", server.url)
+    with open(".jcinf.json", "w") as file:
+        json.dump({"client_id": "test", "client_secret": "secret", "grant_type": "client_credentials"}, file)
+    return server
+
+# Function to count the requests a mock server answered for an endpoint (ids replaced by {id})
+# The mock counts a request after sending its response, so the count is read once it has settled.
+def served(server, endpoint):
+    count = None
+    while True:
+        time.sleep(0.02)
+        with server.lock:
+            latest = server.stats.get(endpoint, {}).get("requests", 0)
+        if latest == count:
+            return count
+        count = latest
+
+# Mock Jamf Pro server (benchmarks/mock_jamf.py) with a small fleet; JAMF_PRO_URL points at it
+@pytest.fixture
+def jamf(monkeypatch):
+    server = start_jamf(monkeypatch)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+# HTTP server answering each request with the next of a list of scripted responses
+# A response is (status, headers, body) and may carry a "delay" header (seconds to wait before
+# answering, not sent). requests holds (method, path, headers) of every request received.
+class ScriptedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, responses):
+        super().__init__(("127.0.0.1", 0), ScriptedHandler)
+        self.responses = list(responses)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_response(self, request):
+        with self.lock:
+            self.requests.append(request)
+            return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.answer("GET")
+
+    def do_POST(self):
+        self.answer("POST")
+
+    def answer(self, method):
+        status, headers, body = self.server.next_response((method, self.path, dict(self.headers)))
+        headers = dict(headers)
+        delay = float(headers.pop("delay", 0))
+        if delay:
+            threading.Event().wait(delay)
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up waiting (timeout tests)
+
+@pytest.fixture
+def scripted():
+    servers = []
+
+    def start(*responses):
+        server = ScriptedServer(responses)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
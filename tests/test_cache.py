@@ -0,0 +1,71 @@
+import time
+
+from src.cache import ResponseCache, cached_get, get_response_cache, ttl_for_url
+
+def test_entries_expire_after_their_ttl():
+    cache = ResponseCache("cache")
+    cache.store("http://jamf/a", "application/json", b"body", {}, ttl=0.2)
+    entry = cache.lookup("http://jamf/a", "application/json")
+    assert cache.is_fresh(entry) and cache.read(entry) == b"body"
+    time.sleep(0.25)
+    assert not cache.is_fresh(entry)
+
+def test_entries_are_keyed_by_url_and_accept():
+    cache = ResponseCache("cache")
+    cache.store("http://jamf/a", "application/json", b"json", {}, ttl=60)
+    assert cache.lookup("http://jamf/a", "application/xml") is None
+    assert cache.lookup("http://jamf/b", "application/json") is None
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache = ResponseCache("cache", max_bytes=10)
+    cache.store("http://jamf/1", "*/*", b"1111", {}, ttl=60)
+    cache.store("http://jamf/2", "*/*", b"2222", {}, ttl=60)
+    cache.lookup("http://jamf/1", "*/*")  # Now more recently used than 2
+    cache.store("http://jamf/3", "*/*", b"3333", {}, ttl=60)
+    assert cache.lookup("http://jamf/2", "*/*") is None
+    assert cache.lookup("http://jamf/1", "*/*") is not None
+    assert cache.lookup("http://jamf/3", "*/*") is not None
+    assert cache.total_bytes == 8 and cache.stats["evictions"] == 1
+
+def test_index_is_reloaded_from_disk():
+    ResponseCache("cache").store("http://jamf/a", "*/*", b"body", {"ETag": '"v1"'}, ttl=60)
+    entry = ResponseCache("cache").lookup("http://jamf/a", "*/*")
+    assert entry["etag"] == '"v1"' and entry["size"] == 4
+
+def test_endpoint_ttls():
+    assert ttl_for_url("https://jamf/api/oauth/token") == 0
+    assert ttl_for_url("https://jamf/JSSResource/computergroups/id/4") == 120
+    assert ttl_for_url("https://jamf/JSSResource/computergroups") == 300
+
+def test_fresh_entries_are_served_without_a_request(scripted):
+    server = scripted((200, {"ETag": '"v1"', "Content-Type": "application/json"}, b'{"a": 1}'))
+    url = f"{server.url}/JSSResource/policies"
+    assert cached_get(url, {"Accept": "application/json"}).json() == {"a": 1}
+    assert cached_get(url, {"Accept": "application/json"}).json() == {"a": 1}
+    assert len(server.requests) == 1
+    assert get_response_cache().stats["hits"] == 1
+
+def test_stale_entries_are_revalidated_with_their_etag(scripted):
+    server = scripted(
+        (200, {"ETag": '"v1"', "Content-Type": "application/json"}, b'{"a": 1}'),
+        (304, {"ETag": '"v1"'}, b""),
+        (200, {"ETag": '"v2"', "Content-Type": "application/json"}, b'{"a": 2}'),
+    )
+    url = f"{server.url}/JSSResource/policies"
+    cached_get(url, {"Accept": "application/json"}, ttl=0.1)
+    time.sleep(0.15)
+    assert cached_get(url, {"Accept": "application/json"}, ttl=0.1).json() == {"a": 1}
+    assert server.requests[1][2].get("If-None-Match") == '"v1"'
+    assert get_response_cache().stats["revalidated"] == 1
+
+    time.sleep(0.15)
+    assert cached_get(url, {"Accept": "application/json"}, ttl=0.1).json() == {"a": 2}
+    assert get_response_cache().lookup(url, "application/json")["etag"] == '"v2"'
+
+def test_ttl_zero_bypasses_the_cache(scripted):
+    server = scripted((200, {"ETag": '"v1"'}, b"body"))
+    url = f"{server.url}/JSSResource/policies"
+    cached_get(url, ttl=0)
+    cached_get(url, ttl=0)
+    assert len(server.requests) == 2
+    assert not get_response_cache().entries
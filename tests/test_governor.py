@@ -0,0 +1,107 @@
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+
+from src.governor import Governor, parse_retry_after, MAX_RETRY_AFTER, DECREASE_INTERVAL
+from src.session import create_session
+
+def governor(**options):
+    settings = dict(max_rps=0, max_in_flight=8, max_retries=2, backoff_factor=0.01, latency_target=5.0)
+    settings.update(options)
+    return Governor(**settings)
+
+def test_parse_retry_after_seconds_and_dates():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after(later) <= 30
+
+def test_retry_delay_prefers_retry_after_up_to_the_cap():
+    assert governor().retry_delay(0, 2.5) == 2.5
+    assert governor().retry_delay(0, MAX_RETRY_AFTER * 10) == MAX_RETRY_AFTER
+    assert 0 <= governor(backoff_factor=1).retry_delay(3) <= 8
+
+def test_limit_grows_additively_and_halves_once_per_burst():
+    gov = governor(max_in_flight=8)
+    gov.limit = 4.0
+    for _ in range(4):
+        gov.acquire()
+        gov.release(latency=0.01)
+    grown = gov.limit
+    assert 4.8 < grown < 5
+
+    for _ in range(3):
+        gov.acquire()
+        gov.release(failed=True)
+    assert gov.limit == pytest.approx(grown / 2)
+    assert gov.stats()["decreases"] == 1
+
+    gov.last_decrease -= DECREASE_INTERVAL
+    gov.acquire()
+    gov.release(latency=10.0)  # Slower than the latency target
+    assert gov.limit == pytest.approx(grown / 4)
+
+def test_limit_never_exceeds_max_in_flight_or_drops_below_one():
+    gov = governor(max_in_flight=2)
+    for _ in range(20):
+        gov.acquire()
+        gov.release(latency=0.01)
+    assert gov.limit == 2
+    for _ in range(10):
+        gov.last_decrease = 0
+        gov.acquire()
+        gov.release(failed=True)
+    assert gov.limit == 1
+
+def test_requests_are_spaced_to_max_rps():
+    gov = governor(max_rps=50)
+    start = time.monotonic()
+    for _ in range(6):
+        gov.acquire()
+        gov.release(latency=0.01)
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+def test_retry_after_pauses_and_retries_get(scripted):
+    server = scripted((429, {"Retry-After": "0.3"}, b""), (200, {}, b"ok"))
+    gov = governor()
+    start = time.monotonic()
+    response = create_session(governor=gov).get(f"{server.url}/JSSResource/computers")
+    assert response.status_code == 200
+    assert time.monotonic() - start >= 0.25
+    assert len(server.requests) == 2
+    assert gov.stats()["throttled"] == 1 and gov.stats()["retries"] == 1
+
+def test_gives_up_after_max_retries(scripted):
+    server = scripted((503, {}, b""))
+    gov = governor(max_retries=2)
+    response = create_session(governor=gov).get(f"{server.url}/JSSResource/computers")
+    assert response.status_code == 503
+    assert len(server.requests) == 3
+
+def test_post_is_never_retried(scripted):
+    server = scripted((503, {"Retry-After": "0"}, b""), (201, {}, b""))
+    response = create_session(governor=governor()).post(f"{server.url}/JSSResource/computercommands/command/X/id/1")
+    assert response.status_code == 503
+    assert len(server.requests) == 1
+
+def test_default_read_timeout_fails_and_retries_stalled_requests(scripted, monkeypatch):
+    monkeypatch.setenv("JAMF_READ_TIMEOUT", "0.2")
+    server = scripted((200, {"delay": "1"}, b"late"), (200, {}, b"ok"))
+    gov = governor(max_retries=1)
+    response = create_session(governor=gov).get(f"{server.url}/JSSResource/computers")
+    assert response.text == "ok"
+    assert gov.stats()["errors"] == 1
+    assert gov.stats()["in_flight"] == 0
+
+def test_timeout_raises_once_retries_are_spent(scripted, monkeypatch):
+    monkeypatch.setenv("JAMF_READ_TIMEOUT", "0.2")
+    server = scripted((200, {"delay": "1"}, b"late"))
+    gov = governor(max_retries=0)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        create_session(governor=gov).get(f"{server.url}/JSSResource/computers")
+    assert gov.stats()["in_flight"] == 0
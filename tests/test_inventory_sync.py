@@ -0,0 +1,166 @@
+import re
+import time
+
+from mock_jamf import Fleet
+from tests.conftest import served, start_jamf
+from src.client import JamfClient
+from src.inventory import (InventoryStore, get_inventory_store, inventory_db_path, sync_computers, sync_mobile_devices,
+                           sync_groups, sync_inventory, sync_due)
+from src.membership import MembershipTracker
+
+COMPUTER_DETAIL = "JSSResource/computers/id/{id}/subset/General&Hardware"
+DEVICE_PAGES = "api/v2/mobile-devices/detail"
+
+# Function to make the mock fleet report a new inventory for some records
+def update_records(server, monkeypatch, kind, record_ids, os_version="99.0"):
+    build = server.fleet.computer if kind == "computers" else server.fleet.mobile_device
+
+    def updated(record_id):
+        record = build(record_id)
+        if record_id in record_ids:
+            if kind == "computers":
+                record["general"]["report_date_utc"] = "2025-06-01T00:00:00.000+0000"
+                record["hardware"]["os_version"] = os_version
+            else:
+                record["general"]["last_inventory_update_utc"] = "2025-06-01T00:00:00.000+0000"
+                record["general"]["os_version"] = os_version
+        return record
+
+    monkeypatch.setattr(server.fleet, "computer" if kind == "computers" else "mobile_device", updated)
+    server.listings.clear()
+
+def reset_stats(server):
+    served(server, "")
+    with server.lock:
+        server.stats.clear()
+
+def test_only_computers_with_a_new_report_date_are_fetched_again(jamf, monkeypatch):
+    store = get_inventory_store()
+    assert sync_computers(store, jamf.url, full=True)["details"] == 60
+    reset_stats(jamf)
+    assert sync_computers(store, jamf.url)["details"] == 0
+    assert served(jamf, COMPUTER_DETAIL) == 0
+
+    update_records(jamf, monkeypatch, "computers", {3, 40})
+    summary = sync_computers(store, jamf.url)
+    assert (summary["changed"], summary["details"]) == (2, 2)
+    assert store.get("computers", 3)["os_version"] == "99.0"
+    assert store.get("computers", 3)["report_date_utc"] == "2025-06-01T00:00:00.000+0000"
+
+def test_computers_whose_details_failed_are_fetched_again(jamf, monkeypatch):
+    get_json = JamfClient.get_json
+    failing = {7, 8}
+
+    def flaky(self, endpoint, *args, **kwargs):
+        match = re.search(r"computers/id/(\d+)/", endpoint)
+        if match and int(match.group(1)) in failing:
+            return None
+        return get_json(self, endpoint, *args, **kwargs)
+
+    monkeypatch.setattr(JamfClient, "get_json", flaky)
+    store = get_inventory_store()
+    assert sync_computers(store, jamf.url, full=True)["details"] == 58
+    assert store.get("computers", 7)["report_date_utc"] is None
+    assert store.get("computers", 7)["name"] == "MAC-000007"
+
+    failing.clear()
+    summary = sync_computers(store, jamf.url)
+    assert (summary["changed"], summary["details"]) == (2, 2)
+    assert store.get("computers", 7)["os_version"]
+    assert sync_computers(store, jamf.url)["changed"] == 0
+
+def test_devices_are_synced_by_last_inventory_update(jamf, monkeypatch):
+    store = get_inventory_store()
+    summary = sync_mobile_devices(store, jamf.url, full=True)
+    assert (summary["listed"], summary["details"]) == (60, 60)
+    device = store.get("devices", 5)
+    assert device["name"] == "DEV-000005" and device["os_version"] and device["last_inventory_update_utc"]
+
+    reset_stats(jamf)
+    assert sync_mobile_devices(store, jamf.url)["details"] == 0
+    assert served(jamf, DEVICE_PAGES) == 1  # One filtered page, answered with the newest devices only
+
+    update_records(jamf, monkeypatch, "devices", {5, 44})
+    assert sync_mobile_devices(store, jamf.url)["details"] == 2
+    assert store.get("devices", 5)["os_version"] == "99.0"
+    assert store.get("devices", 6)["os_version"] != "99.0"
+
+def test_new_and_removed_devices(jamf):
+    store = get_inventory_store()
+    sync_mobile_devices(store, jamf.url, full=True)
+    jamf.fleet.devices = 63
+    jamf.listings.clear()
+    summary = sync_mobile_devices(store, jamf.url)
+    assert summary["details"] == 3
+    assert store.get("devices", 62)["serial_number"]
+
+    jamf.fleet.devices = 50
+    jamf.listings.clear()
+    assert sync_mobile_devices(store, jamf.url)["removed"] == 13
+    assert store.count("devices") == 50
+
+def test_unchanged_groups_are_not_written_again(jamf):
+    store = get_inventory_store()
+    sync_computers(store, jamf.url, full=True)
+    first = sync_groups(store, jamf.url, "computers", full=True)
+    assert first == {"groups": 4, "unchanged": 0, "memberships": 60 + 30 + 20 + 15}
+    assert len(store.group_members("computers", 2)) == 30
+
+    second = sync_groups(store, jamf.url, "computers")
+    assert (second["unchanged"], second["memberships"]) == (4, 0)
+
+    jamf.fleet.computers = 66
+    jamf.listings.clear()
+    third = sync_groups(store, jamf.url, "computers")
+    assert third["unchanged"] == 0  # Every group of the mock grows with the fleet
+    assert MembershipTracker(store).changed_groups("computers") == set()  # None was viewed yet
+
+def test_deleted_groups_are_cleaned_up(jamf):
+    store = get_inventory_store()
+    sync_groups(store, jamf.url, "devices", full=True)
+    MembershipTracker(store).record_view("devices", 4, {"4": "DEV-000004"})
+    jamf.fleet.groups = 3
+    jamf.listings.clear()
+    sync_groups(store, jamf.url, "devices")
+    assert len(store.groups("devices")) == 3
+    assert store.group_members("devices", 4) == []
+    assert MembershipTracker(store).viewed_members("devices", 4) is None
+
+def test_first_sync_is_full_and_later_ones_incremental(jamf):
+    summary = sync_inventory(jamf.url)
+    assert summary["computers"]["details"] == 60 and summary["devices"]["details"] == 60
+    summary = sync_inventory(jamf.url)
+    assert summary["computers"]["changed"] == 0 and summary["device_groups"]["unchanged"] == 4
+
+def test_sync_due_after_the_interval():
+    store = InventoryStore("inventory.sqlite3")
+    assert sync_due(store, 3600)
+    store.mark_synced("computers", True)
+    assert not sync_due(store, 3600)
+    assert sync_due(store, 0)
+
+def test_every_server_has_its_own_store(monkeypatch):
+    assert inventory_db_path("https://Jamf.example.com/") == inventory_db_path("jamf.example.com")
+    assert inventory_db_path("https://jamf.example.com") != inventory_db_path("https://other.example.com")
+
+    one = start_jamf(monkeypatch, Fleet(computers=12, devices=3, groups=2))
+    two = start_jamf(monkeypatch, Fleet(computers=5, devices=2, groups=2, seed=2))
+    two.tokens = one.tokens  # The process logs in once; both servers accept its token
+    try:
+        monkeypatch.setenv("JAMF_PRO_URL", one.url)
+        sync_inventory(one.url)
+        monkeypatch.setenv("JAMF_PRO_URL", two.url)
+        assert get_inventory_store().count("computers") == 0
+        sync_inventory(two.url)
+        assert get_inventory_store().count("computers") == 5
+        assert get_inventory_store(one.url).count("computers") == 12
+    finally:
+        for server in (one, two):
+            server.shutdown()
+            server.server_close()
+
+def test_sync_requests_bypass_the_response_cache(jamf):
+    from src.cache import get_response_cache
+    sync_inventory(jamf.url)
+    time.sleep(0.05)
+    assert not get_response_cache().entries
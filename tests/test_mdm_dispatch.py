@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from tests.conftest import served
+from src.utils import load_token
+from src.mdm_dispatch import (DispatchLog, UnfinishedDispatchError, MAX_URL_LENGTH, command_url, pack_batches,
+                              dispatch_command, dispatch_to_group, dispatch_job_key, incomplete_dispatch_log,
+                              read_dispatch_log)
+
+IDS = [str(member_id) for member_id in range(1, 51)]
+
+def command_posts(server):
+    return served(server, "JSSResource/mobiledevicecommands/command/UpdateInventory/id/{id}")
+
+def test_batches_respect_the_batch_size():
+    assert pack_batches(range(1, 8), 50, 3) == [[1, 2, 3], [4, 5, 6], [7]]
+    assert pack_batches([], 50, 3) == []
+
+def test_batches_keep_the_url_short():
+    ids = [f"{member_id:06d}" for member_id in range(1000)]
+    base = command_url("https://jamf.example.com", "computers", "DeviceLock", {"passcode": "123456"}, [])
+    batches = pack_batches(ids, len(base), 1000)
+    assert sum(len(batch) for batch in batches) == len(ids)
+    for batch in batches:
+        assert len(command_url("https://jamf.example.com", "computers", "DeviceLock", {"passcode": "123456"}, batch)) <= MAX_URL_LENGTH
+
+def test_command_url_quotes_parameters():
+    url = command_url("https://jamf", "devices", "DeviceLock", {"lock_message": "Call IT/help"}, [1, 2])
+    assert url == "https://jamf/JSSResource/mobiledevicecommands/command/DeviceLock/lock_message/Call%20IT%2Fhelp/id/1,2"
+
+def test_log_is_resumed_from_disk():
+    log = DispatchLog("dispatch/job.jsonl", {"command": "X"})
+    log.record(["1", "2"], "sent", 0)
+    log.record(["3"], "unknown", 1, "HTTP 500")
+    log.record(["4"], "failed", 2, "HTTP 400")
+    with open("dispatch/job.jsonl", "a") as file:
+        file.write('{"id": "5", "sta')  # Cut short by a crash
+
+    resumed = DispatchLog("dispatch/job.jsonl", {"command": "ignored"})
+    assert resumed.header["command"] == "X"
+    assert resumed.sent() == {"1", "2", "3"}
+    assert not resumed.completed
+    resumed.complete()
+    assert DispatchLog("dispatch/job.jsonl", {}).completed
+
+def test_job_key_includes_the_server():
+    key = dispatch_job_key("https://one.example.com", "devices", "UpdateInventory", {}, "group:1")
+    assert key == dispatch_job_key("https://ONE.example.com/", "devices", "UpdateInventory", {}, "group:1")
+    assert key != dispatch_job_key("https://two.example.com", "devices", "UpdateInventory", {}, "group:1")
+    assert key != dispatch_job_key("https://one.example.com", "devices", "UpdateInventory", {}, "group:2")
+
+def test_completed_job_is_sent_again_as_a_new_job(jamf):
+    token = load_token()
+    first = dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10)
+    second = dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10)
+    assert first["sent"] == second["sent"] == 50 and second["skipped"] == 0
+    assert first["log"] != second["log"]
+    assert command_posts(jamf) == 10
+
+def test_stopped_job_needs_a_resume_or_new_decision(jamf):
+    token = load_token()
+    stopped = dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10, max_workers=1,
+                               progress=lambda summary: False)
+    assert stopped["stopped"] and stopped["sent"] == 10
+    assert incomplete_dispatch_log(jamf.url, "devices", "UpdateInventory", None, sorted(IDS)) == stopped["log"]
+
+    with pytest.raises(UnfinishedDispatchError):
+        dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10)
+
+    resumed = dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10, resume=True)
+    assert resumed["log"] == stopped["log"]
+    assert (resumed["sent"], resumed["skipped"]) == (40, 10)
+    assert incomplete_dispatch_log(jamf.url, "devices", "UpdateInventory", None, sorted(IDS)) is None
+    assert command_posts(jamf) == 5
+
+def test_new_job_sends_to_every_member_again(jamf):
+    token = load_token()
+    dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10, max_workers=1,
+                     progress=lambda summary: False)
+    fresh = dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10, resume=False)
+    assert (fresh["sent"], fresh["skipped"]) == (50, 0)
+
+def test_server_errors_are_unknown_and_not_sent_again(jamf):
+    token = load_token()
+    jamf.error_rate = 1.0
+    stopped = dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10, max_workers=1,
+                               progress=lambda summary: False)
+    assert (stopped["sent"], stopped["unknown"]) == (0, 10)
+    assert command_posts(jamf) == 1  # A POST answered 500 is not retried
+    assert set(read_dispatch_log(stopped["log"])[1].values()) == {"unknown"}
+
+    jamf.error_rate = 0.0
+    resumed = dispatch_command(jamf.url, token, "devices", "UpdateInventory", IDS, batch_size=10, resume=True)
+    assert (resumed["sent"], resumed["skipped"]) == (40, 10)
+
+def test_group_dispatch_targets_the_group(jamf):
+    summary = dispatch_to_group(jamf.url, load_token(), "devices", 2, "UpdateInventory", batch_size=100)
+    assert summary["total"] == summary["sent"] == 30
+    with open(summary["log"]) as file:
+        header = json.loads(file.readline())
+    assert header["target"] == "group:2" and header["url"] == jamf.url
@@ -0,0 +1,35 @@
+from src.inventory import InventoryStore
+from src.membership import MembershipTracker, diff_memberships, membership_hash, summarize_diff
+
+def test_hash_ignores_member_order():
+    assert membership_hash({"1": "a", "2": "b"}) == membership_hash({"2": "b", "1": "a"})
+    assert membership_hash({"1": "a"}) != membership_hash({"1": "renamed"})
+
+def test_diff_finds_added_removed_and_renamed_members():
+    diff = diff_memberships({"1": "a", "2": "b", "3": "c"}, {"1": "a", "2": "B", "4": "d"})
+    assert diff == {"added": {"4": "d"}, "removed": {"3": "c"}, "renamed": {"2": ("b", "B")}}
+    assert summarize_diff(diff) == "1 added, 1 removed, 1 renamed"
+    assert summarize_diff(diff_memberships({"1": "a"}, {"1": "a"})) == "no changes"
+
+def test_views_are_diffed_against_the_previous_view():
+    tracker = MembershipTracker(InventoryStore("inventory.sqlite3"))
+    assert tracker.viewed_members("computers", 7) is None
+    assert tracker.record_view("computers", 7, {"1": "a", "2": "b"}) is None
+
+    diff = tracker.record_view("computers", 7, {"2": "b2", "3": "c"})
+    assert diff == {"added": {"3": "c"}, "removed": {"1": "a"}, "renamed": {"2": ("b", "b2")}}
+    assert tracker.viewed_members("computers", 7) == {"2": "b2", "3": "c"}
+    # Another kind with the same group id is tracked separately
+    assert tracker.viewed_members("devices", 7) is None
+
+def test_groups_changed_since_viewed_are_reported():
+    tracker = MembershipTracker(InventoryStore("inventory.sqlite3"))
+    tracker.record_view("devices", 1, {"1": "a"})
+    tracker.record_view("devices", 2, {"1": "a"})
+    tracker.record_snapshot("devices", 1, {"1": "a", "2": "b"})
+    tracker.record_snapshot("devices", 2, {"1": "a"})
+    tracker.record_snapshot("devices", 3, {"5": "never viewed"})
+    assert tracker.changed_groups("devices") == {"1"}
+
+    tracker.record_view("devices", 1, {"1": "a", "2": "b"})
+    assert tracker.changed_groups("devices") == set()
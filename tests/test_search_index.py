@@ -0,0 +1,47 @@
+from src.search_index import SearchIndex, normalize_exact, get_search_index
+
+def index_of(*names):
+    index = SearchIndex()
+    for record_id, name in enumerate(names, 1):
+        serial = f"C02{record_id:04d}"
+        index.add(record_id, name, {"id": record_id, "name": name}, exact=(record_id, serial, f"AA:BB:CC:00:00:{record_id:02X}"))
+    index.prepare()
+    return index
+
+def names(results):
+    return [record["name"] for record in results]
+
+def test_substring_matches_are_sorted_by_name():
+    index = index_of("MAC-Sales-02", "MAC-Finance-01", "iPad-Sales-01", "MAC-sales-01")
+    assert names(index.search("sales")) == ["iPad-Sales-01", "MAC-sales-01", "MAC-Sales-02"]
+    assert names(index.search("zzz")) == []
+    assert len(index.search("")) == 4
+
+def test_short_terms_match_name_prefixes():
+    index = index_of("MAC-01", "iPad-01", "Mac mini")
+    assert names(index.search("ma")) == ["Mac mini", "MAC-01"]
+    assert names(index.search("01")) == []
+
+def test_exact_fields_win_over_name_matches():
+    index = index_of("C020002 lookalike", "Other")
+    assert names(index.search("C020002")) == ["Other"]
+    assert names(index.search("aa-bb-cc-00-00-01")) == ["C020002 lookalike"]
+    assert normalize_exact("AA:BB:CC:00:00:01") == normalize_exact("aabb.cc00.0001")
+
+def test_records_can_be_replaced_and_removed():
+    index = index_of("Old name", "Other")
+    index.add(1, "New name", {"id": 1, "name": "New name"})
+    assert names(index.search("old")) == []
+    assert names(index.search("new")) == ["New name"]
+    index.remove(1)
+    assert names(index.search("new")) == [] and len(index) == 1
+    assert not any(1 in ids for ids in index.trigram_index.values())
+
+def test_limit_caps_results():
+    index = index_of(*[f"MAC-{number:03d}" for number in range(50)])
+    assert len(index.search("mac", limit=10)) == 10
+
+def test_indexes_are_kept_per_server():
+    get_search_index("computers", "https://one.example.com").add(1, "One", {})
+    assert len(get_search_index("computers", "https://one.example.com/")) == 1
+    assert len(get_search_index("computers", "https://two.example.com")) == 0
@@ -0,0 +1,73 @@
+import time
+import threading
+from datetime import datetime, timedelta
+
+from src.token_manager import TokenManager, MIN_REFRESH_DELAY
+
+# Token source counting its calls; each token is valid for lifetime seconds
+class TokenSource:
+    def __init__(self, lifetime=1200, delay=0.0):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            number = self.calls
+        time.sleep(self.delay)
+        return f"token-{number}", self.lifetime
+
+def manager(source, refresh_margin=60):
+    return TokenManager("token.json", source, refresh_margin=refresh_margin)
+
+def test_concurrent_callers_share_one_renewal():
+    source = TokenSource(delay=0.2)
+    tokens = manager(source)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tokens.get_token())) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert source.calls == 1
+    assert results == ["token-1"] * 10
+
+def test_valid_token_is_served_from_memory_and_from_the_file():
+    source = TokenSource()
+    assert manager(source).get_token() == "token-1"
+    # Another process (a new manager on the same file) picks up the token written by the first
+    assert manager(source).get_token() == "token-1"
+    assert source.calls == 1
+
+def test_expired_token_is_renewed():
+    source = TokenSource()
+    tokens = manager(source)
+    tokens.set_token("old", datetime.utcnow() - timedelta(seconds=1))
+    assert tokens.timer is None
+    assert tokens.get_token() == "token-1"
+
+def test_refresh_margin_is_at_most_half_the_lifetime():
+    tokens = manager(TokenSource(), refresh_margin=60)
+    tokens.set_token("long", datetime.utcnow() + timedelta(seconds=1200))
+    assert tokens._margin() == timedelta(seconds=60)
+    assert not tokens._is_expiring()
+
+    tokens.set_token("short", datetime.utcnow() + timedelta(seconds=45))
+    assert timedelta(seconds=22) <= tokens._margin() <= timedelta(seconds=22.5)
+    assert not tokens._is_expiring()
+    tokens.clear()
+
+def test_short_lived_token_is_not_renewed_in_a_loop():
+    source = TokenSource(lifetime=2)
+    tokens = manager(source, refresh_margin=60)
+    tokens.get_token()
+    time.sleep(MIN_REFRESH_DELAY * 2.5)
+    tokens.clear()
+    # One renewal about every second (half the lifetime), not one per timer tick
+    assert 2 <= source.calls <= 4
+
+def test_failed_renewal_returns_none():
+    tokens = manager(lambda: (None, None))
+    assert tokens.get_token() is None